@@ -1,18 +1,49 @@
 """FastAPI application entrypoint."""
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.routers import chat, health, search, sources, debug
+from backend.llm.provider import close_clients
+from backend.routers import admin, chat, health, search, sources, debug
+from backend.services.batching import close_batchers
+from backend.services.executor import shutdown_pools
+from backend.services.store_reload import watch_store_versions
+from backend.services.warmup import mark_ready, warm_up
 from backend.settings import get_settings, get_cors_origins
 
 settings = get_settings()
 cors_origins = get_cors_origins()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in the background (readiness stays false until done), watch for
+    new store versions; clean up on exit."""
+    tasks = []
+    if settings.warmup_enabled:
+        tasks.append(asyncio.create_task(warm_up()))
+    else:
+        mark_ready()
+    if settings.store_reload_interval_s > 0:
+        tasks.append(asyncio.create_task(watch_store_versions()))
+    yield
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    # Release batchers, worker pools and pooled LLM clients
+    await close_batchers()
+    shutdown_pools(wait=False)
+    await close_clients()
+
+
 app = FastAPI(
     title="NDT Bot API",
     description="RAG-powered chatbot in the style of Neil deGrasse Tyson",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -44,6 +75,7 @@ app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(sources.router, prefix="/api", tags=["sources"])
 app.include_router(debug.router, prefix="/api", tags=["debug"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 
 @app.get("/")
@@ -1,30 +1,160 @@
-from typing import List, Dict
+"""LLM provider registry with long-lived, pooled async clients.
+
+One ``AsyncAnthropic`` / ``AsyncOpenAI`` client is created per process and
+reused for every call, so requests ride on warm keep-alive connections
+instead of paying client construction and TLS setup each time.
+"""
+
+import asyncio
+import random
+from collections.abc import AsyncIterator
+from typing import Any, Dict, List
+
+import httpx
 
 from backend.settings import get_settings
 
 try:
-    from anthropic import Anthropic
+    from anthropic import AsyncAnthropic
 except Exception:
-    Anthropic = None  # type: ignore
+    AsyncAnthropic = None  # type: ignore
 
 try:
-    from openai import OpenAI  # OpenAI Python SDK v1.x
+    from openai import AsyncOpenAI  # OpenAI Python SDK v1.x
 except Exception:
-    OpenAI = None  # type: ignore
+    AsyncOpenAI = None  # type: ignore
+
+NOT_CONFIGURED = "Model provider not configured or SDK missing."
+
+# Provider name -> long-lived async client
+_clients: dict[str, Any] = {}
 
 
-def generate_chat(messages: List[Dict[str, str]], max_tokens: int = 1024) -> str:
+def _http_client() -> httpx.AsyncClient:
+    """Shared-pool HTTP client with configured connection limits and keep-alive."""
+    settings = get_settings()
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout),
+    )
+
+
+def get_provider() -> str | None:
+    """Return the configured provider name if its SDK and key are available."""
     settings = get_settings()
     provider = settings.model_provider.lower()
-    model = settings.llm_model
-
-    if provider == "anthropic" and Anthropic is not None and settings.anthropic_api_key:
-        client = Anthropic(api_key=settings.anthropic_api_key)
-        resp = client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            messages=messages,
+    if provider == "anthropic" and AsyncAnthropic is not None and settings.anthropic_api_key:
+        return provider
+    if provider == "openai" and AsyncOpenAI is not None and settings.openai_api_key:
+        return provider
+    return None
+
+
+def get_client(provider: str) -> Any:
+    """Get or create the long-lived async client for a provider."""
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+
+    settings = get_settings()
+    # Retries are handled here (with jitter), not inside the SDKs
+    if provider == "anthropic":
+        client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=_http_client(),
+            max_retries=0,
+        )
+    elif provider == "openai":
+        client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=_http_client(),
+            max_retries=0,
         )
+    else:
+        raise ValueError(f"Unknown model provider: {provider}")
+
+    _clients[provider] = client
+    return client
+
+
+async def close_clients() -> None:
+    """Close all pooled clients (called on application shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"[provider] Error closing client: {e}")
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Rate limits, overloads, server errors, timeouts and dropped connections."""
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    base = get_settings().llm_retry_base_delay
+    return random.uniform(0, base * (2**attempt))
+
+
+def _split_system(messages: List[Dict[str, str]]) -> tuple[str | None, List[Dict[str, str]]]:
+    """Anthropic takes the system prompt as a separate argument."""
+    system = [m["content"] for m in messages if m.get("role") == "system"]
+    rest = [m for m in messages if m.get("role") != "system"]
+    return ("\n\n".join(system) if system else None), rest
+
+
+async def _create(
+    provider: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    timeout: float,
+    stream: bool = False,
+) -> Any:
+    """Issue one provider request (no retries)."""
+    settings = get_settings()
+    client = get_client(provider)
+
+    if provider == "anthropic":
+        system, rest = _split_system(messages)
+        kwargs: dict[str, Any] = {
+            "model": settings.llm_model,
+            "max_tokens": max_tokens,
+            "messages": rest,
+            "timeout": timeout,
+        }
+        if system:
+            kwargs["system"] = system
+        if stream:
+            kwargs["stream"] = True
+        return await client.messages.create(**kwargs)
+
+    kwargs = {
+        "model": settings.llm_model,
+        "messages": messages,
+        "temperature": settings.temperature,
+        "max_tokens": max_tokens,
+        "timeout": timeout,
+    }
+    if stream:
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+    return await client.chat.completions.create(**kwargs)
+
+
+def _extract_text(provider: str, resp: Any) -> str:
+    if provider == "anthropic":
         # Anthropic returns content array; concatenate text parts
         parts = []
         for blk in getattr(resp, "content", []) or []:
@@ -36,18 +166,86 @@ def generate_chat(messages: List[Dict[str, str]], max_tokens: int = 1024) -> str
         # Fallback: try to get any text from response object
         return getattr(resp, "text", None) or "Error: Unable to extract response from model."
 
-    if provider == "openai" and OpenAI is not None and settings.openai_api_key:
-        client = OpenAI(api_key=settings.openai_api_key)
-        completion = client.chat.completions.create(
-            model=model,
-            messages=messages,  # type: ignore[arg-type]
-            temperature=settings.temperature,
-            max_tokens=max_tokens,
-        )
-        content = completion.choices[0].message.content
-        if content is None or not isinstance(content, str):
-            return "Error: Model returned empty or invalid response."
-        return content
+    content = resp.choices[0].message.content
+    if content is None or not isinstance(content, str):
+        return "Error: Model returned empty or invalid response."
+    return content
+
+
+async def generate_chat(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1024,
+    timeout: float | None = None,
+) -> str:
+    """Generate a complete chat response with the configured provider."""
+    provider = get_provider()
+    if provider is None:
+        # Fallback: return simple string if neither provider configured
+        return NOT_CONFIGURED
+
+    settings = get_settings()
+    timeout = timeout or settings.llm_timeout
+    for attempt in range(settings.llm_max_retries + 1):
+        try:
+            resp = await _create(provider, messages, max_tokens, timeout)
+            return _extract_text(provider, resp)
+        except Exception as e:
+            if attempt >= settings.llm_max_retries or not _is_retryable(e):
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"[provider] {provider} call failed ({e}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    raise RuntimeError("unreachable")
 
-    # Fallback: return simple string if neither provider configured
-    return "Model provider not configured or SDK missing."
+
+async def astream_chat(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1024,
+    timeout: float | None = None,
+    usage: dict[str, int] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat response as text deltas.
+
+    If ``usage`` is given it is filled with ``input_tokens``/``output_tokens``
+    as the provider reports them. Retries only happen before the first token;
+    once text has been yielded a failure is raised to the caller.
+    """
+    provider = get_provider()
+    if provider is None:
+        yield NOT_CONFIGURED
+        return
+
+    settings = get_settings()
+    timeout = timeout or settings.llm_timeout
+    if usage is None:
+        usage = {}
+    for attempt in range(settings.llm_max_retries + 1):
+        started = False
+        try:
+            stream = await _create(provider, messages, max_tokens, timeout, stream=True)
+            async for event in stream:
+                text = None
+                if provider == "anthropic":
+                    if event.type == "content_block_delta":
+                        text = getattr(event.delta, "text", None)
+                    elif event.type == "message_start":
+                        usage["input_tokens"] = event.message.usage.input_tokens
+                    elif event.type == "message_delta":
+                        usage["output_tokens"] = event.usage.output_tokens
+                else:
+                    if event.choices:
+                        text = event.choices[0].delta.content
+                    if getattr(event, "usage", None):
+                        usage["input_tokens"] = event.usage.prompt_tokens
+                        usage["output_tokens"] = event.usage.completion_tokens
+                if text:
+                    started = True
+                    yield text
+            return
+        except Exception as e:
+            if started or attempt >= settings.llm_max_retries or not _is_retryable(e):
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"[provider] {provider} stream failed ({e}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
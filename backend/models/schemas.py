@@ -1,6 +1,6 @@
 """Pydantic schemas for API requests and responses."""
 
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -25,6 +25,7 @@ class SearchRequest(BaseModel):
 
     query: str = Field(..., min_length=1)
     top_k: int | None = Field(None, ge=1, le=50)
+    mode: Literal["dense", "hybrid", "lexical"] | None = None
 
 
 class SearchResult(BaseModel):
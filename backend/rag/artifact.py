@@ -0,0 +1,434 @@
+"""Pickle-free on-disk index artifact.
+
+Layout of a store directory:
+
+    manifest.json    format/index version, dimension, count, file checksums
+    index.faiss      FAISS index (memory-mapped where FAISS supports it)
+    vectors.f32      raw float32 vectors, row i = FAISS position i
+    chunks.sqlite    documents (text + metadata, once each) and chunk spans
+                     (id, document, start, end), sliced lazily by id
+
+Usage:
+    python -m backend.rag.artifact convert --store-path storage/vector_store
+    python -m backend.rag.artifact verify --store-path storage/vector_store
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.rag.index_builder import (
+    VECTORS_FILENAME,
+    index_type_of,
+    reconstruct_vectors,
+    write_vectors,
+)
+from backend.utils.hashing import hash_file
+
+FORMAT_VERSION = 2  # 2: chunks are spans of shared documents; 1: one row per chunk
+SUPPORTED_FORMATS = (1, 2)
+MANIFEST_FILENAME = "manifest.json"
+INDEX_FILENAME = "index.faiss"
+CHUNKS_FILENAME = "chunks.sqlite"
+ARTIFACT_FILES = (INDEX_FILENAME, VECTORS_FILENAME, CHUNKS_FILENAME)
+
+CHUNKS_SCHEMA = (
+    "CREATE TABLE documents (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, "
+    "text TEXT NOT NULL, metadata TEXT NOT NULL)",
+    "CREATE TABLE chunks (position INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+    "document INTEGER NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, extra TEXT)",
+)
+
+
+# Keys of synthetic documents holding chunks that had no source document
+_LOOSE_KEY_PREFIXES = ("chunk:", "group:")
+
+
+def _chunk_metadata(metadata: dict, extra: str | dict | None) -> dict:
+    if not extra:
+        return metadata
+    return {**metadata, **(json.loads(extra) if isinstance(extra, str) else extra)}
+
+
+class SpanDocstore(Docstore):
+    """In-memory docstore of chunk spans over shared documents.
+
+    Each document's text and metadata are held once; a chunk is
+    (document key, start, end) plus any chunk-only metadata (``extra``), and
+    its text is sliced when read. Chunks added with ``add_text`` (no source
+    document) are grouped by metadata into synthetic documents on save.
+    """
+
+    def __init__(self):
+        self.documents: dict[str, tuple[str, dict]] = {}
+        self.spans: dict[str, tuple[str, int, int, dict | None]] = {}
+        self._loose: set[str] = set()
+
+    def add_document(self, key: str, text: str, metadata: dict) -> None:
+        self.documents.setdefault(key, (text, metadata))
+
+    def add_span(self, chunk_id: str, key: str, start: int, end: int, extra: dict | None = None) -> None:
+        self.spans[chunk_id] = (key, start, end, extra or None)
+
+    def add_text(self, chunk_id: str, text: str, metadata: dict) -> None:
+        key = f"chunk:{chunk_id}"
+        self.documents[key] = (text, metadata)
+        self._loose.add(key)
+        self.add_span(chunk_id, key, 0, len(text))
+
+    def metadata(self, chunk_id: str) -> dict:
+        key, _, _, extra = self.spans[chunk_id]
+        return _chunk_metadata(self.documents[key][1], extra)
+
+    def annotate(self, chunk_id: str, extra: dict) -> None:
+        """Merge chunk-only metadata into one chunk."""
+        key, start, end, current = self.spans[chunk_id]
+        self.spans[chunk_id] = (key, start, end, {**(current or {}), **extra})
+
+    def search(self, search: str) -> str | Document:
+        if search not in self.spans:
+            return f"ID {search} not found."
+        key, start, end, extra = self.spans[search]
+        text, metadata = self.documents[key]
+        return Document(page_content=text[start:end], metadata=_chunk_metadata(metadata, extra))
+
+    def span(self, chunk_id: str) -> tuple[str, int, int] | None:
+        """(document key, start, end) of a chunk, or None if it has no source document."""
+        if chunk_id not in self.spans:
+            return None
+        key, start, end, _ = self.spans[chunk_id]
+        return None if key.startswith(_LOOSE_KEY_PREFIXES) else (key, start, end)
+
+    def rows(self, ids: list[str]) -> tuple[list[tuple], list[tuple]]:
+        """(documents, chunks) table rows for the chunks ``ids``, in that order."""
+        # Loose chunks sharing metadata become one document, joined with blank lines
+        groups: dict[str, list[str]] = {}
+        for chunk_id in ids:
+            key = self.spans[chunk_id][0]
+            if key in self._loose:
+                groups.setdefault(json.dumps(self.documents[key][1], sort_keys=True), []).append(chunk_id)
+        placed: dict[str, tuple[str, int, int]] = {}
+        merged: dict[str, tuple[str, dict]] = {}
+        for members in groups.values():
+            group_key = f"group:{members[0]}"
+            parts, offset = [], 0
+            for chunk_id in members:
+                text = self.documents[self.spans[chunk_id][0]][0]
+                placed[chunk_id] = (group_key, offset, offset + len(text))
+                parts.append(text)
+                offset += len(text) + 2
+            merged[group_key] = ("\n\n".join(parts), self.documents[self.spans[members[0]][0]][1])
+
+        numbers: dict[str, int] = {}
+        documents, chunks = [], []
+        for position, chunk_id in enumerate(ids):
+            key, start, end, extra = self.spans[chunk_id]
+            if chunk_id in placed:
+                key, start, end = placed[chunk_id]
+            if key not in numbers:
+                numbers[key] = len(numbers)
+                text, metadata = merged.get(key) or self.documents[key]
+                documents.append((numbers[key], key, text, json.dumps(metadata, ensure_ascii=False)))
+            chunks.append(
+                (position, chunk_id, numbers[key], start, end, json.dumps(extra, ensure_ascii=False) if extra else None)
+            )
+        return documents, chunks
+
+    @classmethod
+    def from_docstore(cls, docstore: Docstore, ids: list[str]) -> "SpanDocstore":
+        """Span copy of any docstore's chunks (each chunk its own loose document)."""
+        store = cls()
+        for chunk_id in ids:
+            doc = docstore.search(chunk_id)
+            store.add_text(chunk_id, doc.page_content, doc.metadata)
+        return store
+
+
+class SqliteDocstore(Docstore):
+    """Read-only docstore that fetches chunks from chunks.sqlite on demand.
+
+    Chunk text is sliced out of its document by SQLite, so a lookup reads
+    one chunk's worth of text.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._spans = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents'"
+        ).fetchone() is not None
+
+    def search(self, search: str) -> str | Document:
+        with self._lock:
+            if self._spans:
+                row = self._conn.execute(
+                    "SELECT substr(d.text, c.start + 1, c.end - c.start), d.metadata, c.extra "
+                    "FROM chunks c JOIN documents d ON d.id = c.document WHERE c.id = ?",
+                    (search,),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT content, metadata, NULL FROM chunks WHERE id = ?", (search,)
+                ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=_chunk_metadata(json.loads(row[1]), row[2]))
+
+    def span(self, chunk_id: str) -> tuple[str, int, int] | None:
+        """(document key, start, end) of a chunk, or None if it has no source document."""
+        if not self._spans:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT d.key, c.start, c.end FROM chunks c JOIN documents d ON d.id = c.document WHERE c.id = ?",
+                (chunk_id,),
+            ).fetchone()
+        if row is None or row[0].startswith(_LOOSE_KEY_PREFIXES):
+            return None
+        return row
+
+    def iter_metadata(self) -> Iterator[dict]:
+        """Yield every chunk's metadata (in index order) without loading texts."""
+        with self._lock:
+            if self._spans:
+                documents = {
+                    number: json.loads(metadata)
+                    for number, metadata in self._conn.execute("SELECT id, metadata FROM documents")
+                }
+                rows = self._conn.execute("SELECT document, extra FROM chunks ORDER BY position").fetchall()
+            else:
+                documents = {}
+                rows = [
+                    (None, metadata)
+                    for (metadata,) in self._conn.execute("SELECT metadata FROM chunks ORDER BY position")
+                ]
+        for document, extra in rows:
+            yield _chunk_metadata(documents[document], extra) if document is not None else json.loads(extra)
+
+    def to_spans(self) -> SpanDocstore:
+        """Load every document and span into memory."""
+        store = SpanDocstore()
+        with self._lock:
+            if self._spans:
+                keys = {}
+                for number, key, text, metadata in self._conn.execute("SELECT id, key, text, metadata FROM documents"):
+                    keys[number] = key
+                    store.add_document(key, text, json.loads(metadata))
+                for chunk_id, document, start, end, extra in self._conn.execute(
+                    "SELECT id, document, start, end, extra FROM chunks ORDER BY position"
+                ):
+                    store.add_span(chunk_id, keys[document], start, end, json.loads(extra) if extra else None)
+            else:
+                for chunk_id, content, metadata in self._conn.execute(
+                    "SELECT id, content, metadata FROM chunks ORDER BY position"
+                ):
+                    store.add_text(chunk_id, content, json.loads(metadata))
+        return store
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def has_artifact(store_path: Path) -> bool:
+    """True if the directory holds the manifest-based layout."""
+    return (store_path / MANIFEST_FILENAME).exists()
+
+
+def read_manifest(store_path: Path) -> dict[str, Any]:
+    return json.loads((store_path / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+
+
+def _read_ids(conn: sqlite3.Connection) -> dict[int, str]:
+    return dict(conn.execute("SELECT position, id FROM chunks ORDER BY position"))
+
+
+def load_artifact(store_path: Path, embeddings: Embeddings, writable: bool = False) -> FAISS:
+    """
+    Open an artifact as a LangChain FAISS store.
+
+    Read-only (default): index memory-mapped where supported and a lazy
+    SQLite docstore, so opening costs milliseconds. ``writable=True`` loads
+    the index and every document and span into memory (a ``SpanDocstore``)
+    so chunks can be added or dropped.
+    """
+    manifest = read_manifest(store_path)
+    if manifest.get("format_version") not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {store_path}")
+
+    index_file = str(store_path / INDEX_FILENAME)
+    if writable:
+        index = faiss.read_index(index_file)
+    else:
+        try:
+            index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            index = faiss.read_index(index_file)
+
+    if index.d != manifest["dimension"] or index.ntotal != manifest["count"]:
+        raise ValueError(
+            f"Artifact mismatch in {store_path}: index d={index.d} n={index.ntotal}, "
+            f"manifest d={manifest['dimension']} n={manifest['count']}"
+        )
+
+    docstore = SqliteDocstore(store_path / CHUNKS_FILENAME)
+    with docstore._lock:
+        index_to_id = _read_ids(docstore._conn)
+    if writable:
+        spans = docstore.to_spans()
+        docstore.close()
+        docstore = spans
+
+    return FAISS(embeddings, index, docstore, index_to_id)
+
+
+def iter_documents(store: FAISS) -> Iterator[Document]:
+    """Yield every document of a store in index order (either docstore kind)."""
+    for i in range(len(store.index_to_docstore_id)):
+        doc = store.docstore.search(store.index_to_docstore_id[i])
+        if isinstance(doc, Document):
+            yield doc
+
+
+def iter_metadata(store: FAISS) -> Iterator[dict]:
+    """Yield every chunk's metadata; avoids loading texts for the SQLite docstore."""
+    if isinstance(store.docstore, SqliteDocstore):
+        yield from store.docstore.iter_metadata()
+    else:
+        for doc in iter_documents(store):
+            yield doc.metadata
+
+
+def save_artifact(
+    store: FAISS,
+    store_path: Path,
+    vectors: np.ndarray | None,
+    embedding_model: str = "",
+    index_version: str | None = None,
+) -> dict[str, Any]:
+    """Write a store (index, raw vectors, chunks, manifest) in the artifact layout.
+
+    ``vectors`` None means ``vectors.f32`` is already in place.
+    """
+    store_path.mkdir(parents=True, exist_ok=True)
+
+    # Index
+    tmp_index = store_path / f"{INDEX_FILENAME}.tmp"
+    faiss.write_index(store.index, str(tmp_index))
+    tmp_index.replace(store_path / INDEX_FILENAME)
+
+    # Raw vectors
+    if vectors is not None:
+        write_vectors(store_path, vectors)
+
+    # Documents once each, chunks as spans into them, by FAISS position
+    ids = [store.index_to_docstore_id[pos] for pos in range(len(store.index_to_docstore_id))]
+    docstore = store.docstore
+    if not isinstance(docstore, SpanDocstore):
+        docstore = SpanDocstore.from_docstore(docstore, ids)
+    documents, chunks = docstore.rows(ids)
+    tmp_chunks = store_path / f"{CHUNKS_FILENAME}.tmp"
+    tmp_chunks.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_chunks)
+    try:
+        for statement in CHUNKS_SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO documents VALUES (?, ?, ?, ?)", documents)
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", chunks)
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_chunks.replace(store_path / CHUNKS_FILENAME)
+
+    # Manifest last: it is what marks the directory as a complete artifact
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "index_version": index_version or f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "embedding_model": embedding_model,
+        "index_type": index_type_of(store.index),
+        "dimension": int(store.index.d),
+        "count": int(store.index.ntotal),
+        "checksums": {name: hash_file(str(store_path / name)) for name in ARTIFACT_FILES},
+    }
+    tmp_manifest = store_path / f"{MANIFEST_FILENAME}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp_manifest.replace(store_path / MANIFEST_FILENAME)
+    return manifest
+
+
+def verify_artifact(store_path: Path) -> list[str]:
+    """Check file checksums against the manifest; returns a list of problems."""
+    manifest = read_manifest(store_path)
+    problems = []
+    for name, expected in manifest.get("checksums", {}).items():
+        path = store_path / name
+        if not path.exists():
+            problems.append(f"{name}: missing")
+        elif hash_file(str(path)) != expected:
+            problems.append(f"{name}: checksum mismatch")
+    return problems
+
+
+def convert_legacy(
+    store_path: Path,
+    embeddings: Embeddings,
+    embedding_model: str = "",
+    remove_pickle: bool = False,
+) -> dict[str, Any]:
+    """Convert an index.faiss + index.pkl pair into the artifact layout (one-time unpickle)."""
+    try:
+        # Prefer newer signature
+        store = FAISS.load_local(str(store_path), embeddings, allow_dangerous_deserialization=True)
+    except TypeError:
+        # Older signature without allow_dangerous_deserialization
+        store = FAISS.load_local(str(store_path), embeddings)
+    vectors = None
+    if not (store_path / VECTORS_FILENAME).exists():
+        if index_type_of(store.index) != "flat":
+            raise ValueError(f"Non-flat legacy index in {store_path} has no {VECTORS_FILENAME}")
+        vectors = reconstruct_vectors(store.index)
+    manifest = save_artifact(store, store_path, vectors, embedding_model)
+    if remove_pickle:
+        (store_path / "index.pkl").unlink(missing_ok=True)
+    return manifest
+
+
+def main():
+    from backend.deps import get_embeddings
+    from backend.settings import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Convert or verify a vector store artifact")
+    parser.add_argument("action", choices=["convert", "verify"])
+    parser.add_argument("--store-path", type=Path, default=Path(settings.vector_store_path))
+    parser.add_argument("--remove-pickle", action="store_true", help="Delete index.pkl after converting")
+    args = parser.parse_args()
+
+    if args.action == "convert":
+        manifest = convert_legacy(args.store_path, get_embeddings(), settings.embedding_model, args.remove_pickle)
+        print(f"✅ Converted {args.store_path}: {manifest['count']} chunks, dim {manifest['dimension']}")
+    else:
+        problems = verify_artifact(args.store_path)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            raise SystemExit(1)
+        print(f"✅ {args.store_path} matches its manifest")
+
+
+if __name__ == "__main__":
+    main()
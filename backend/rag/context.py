@@ -1,4 +1,92 @@
-"""Context formatting for LLM prompts."""
+"""Context formatting for LLM prompts.
+
+``build_context`` assembles the prompt context under a token budget
+(``context_max_tokens``, counted with a local tiktoken encoding):
+
+- chunks that overlap or touch in the same source document (by their
+  ``doc_id``/``start``/``end`` span) are merged into one passage, with the
+  ``chunk_overlap`` text kept once
+- passages are ordered by their best chunk's relevance (the input order)
+- passages are added until the budget runs out; the one that doesn't fit
+  is cut at a sentence boundary (at a token boundary if not even its first
+  sentence fits)
+
+It returns the text and the sources actually used. ``format_context`` is
+the unbounded, one-block-per-chunk formatter.
+"""
+
+import re
+import threading
+import time
+from typing import Any
+
+from backend.settings import get_settings
+
+# Spans this close are adjacent chunks: the splitter strips the whitespace between them
+_MAX_SPAN_GAP = 2
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+# tiktoken encodings by model. Loading may download the encoding file, so it
+# happens in warm-up (on a pool) or a background thread, never in a request;
+# until then (or if it failed) tokens are estimated, and a failed load is
+# retried after _ENCODING_RETRY_S.
+_encodings: dict[str, Any] = {}
+_encoding_attempts: dict[str, float] = {}  # model -> when its last load started
+_encoding_lock = threading.Lock()
+_ENCODING_RETRY_S = 300.0
+
+
+def load_encoding(model: str | None = None) -> Any | None:
+    """Load and cache the tiktoken encoding for a model (default: the LLM); None if unavailable. Blocking."""
+    model = model or get_settings().llm_model
+    with _encoding_lock:
+        if model in _encodings:
+            return _encodings[model]
+        _encoding_attempts[model] = time.monotonic()
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Unknown to tiktoken (newer OpenAI or Anthropic models): close enough for budgeting
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Not installed, or the encoding file can't be fetched
+        print(f"[context] tiktoken unavailable ({e}); estimating ~4 chars/token")
+        return None
+    with _encoding_lock:
+        _encodings[model] = encoding
+    return encoding
+
+
+def _encoding(model: str) -> Any | None:
+    encoding = _encodings.get(model)
+    if encoding is None:
+        with _encoding_lock:
+            last = _encoding_attempts.get(model)
+            retry = last is None or time.monotonic() - last >= _ENCODING_RETRY_S
+            if retry:
+                _encoding_attempts[model] = time.monotonic()
+        if retry:
+            threading.Thread(target=load_encoding, args=(model,), daemon=True).start()
+    return encoding
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the LLM's tokenizer (~4 chars/token if tiktoken is unavailable)."""
+    encoding = _encoding(get_settings().llm_model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _display_title(source: str, metadata: dict) -> str:
+    # Use title if available, otherwise domain or source
+    if "/" not in source:
+        return source
+    return metadata.get("title", "") or metadata.get("domain", "") or source.split("/")[2]
 
 
 def format_context(documents: list[dict]) -> str:
@@ -18,13 +106,7 @@ def format_context(documents: list[dict]) -> str:
         source = doc.get("source", "Unknown")
         content = doc.get("content", "")
 
-        # Extract title and domain from metadata
-        metadata = doc.get("metadata", {})
-        title = metadata.get("title", "")
-        domain = metadata.get("domain", "")
-
-        # Use title if available, otherwise domain or source
-        display_title = title or domain or source.split("/")[2] if "/" in source else source
+        display_title = _display_title(source, doc.get("metadata", {}))
 
         # Format with title for cleaner citations
         context_parts.append(f"[{display_title}]\n{content}\n[Source: {source}]")
@@ -51,3 +133,128 @@ def extract_sources(documents: list[dict]) -> list[dict]:
             }
 
     return list(sources.values())
+
+
+def _passages(documents: list[dict]) -> list[dict]:
+    """Merge chunks that overlap or touch in the same document into passages.
+
+    Passages come back ordered by their best (earliest) chunk.
+    """
+    passages = []
+    by_document: dict[str, list[tuple[int, dict]]] = {}
+    for rank, doc in enumerate(documents):
+        if doc.get("doc_id") is None:
+            passages.append({"rank": rank, "text": doc.get("content", ""), "documents": [doc]})
+        else:
+            by_document.setdefault(doc["doc_id"], []).append((rank, doc))
+
+    for chunks in by_document.values():
+        chunks.sort(key=lambda item: item[1]["start"])
+        current = None
+        for rank, doc in chunks:
+            if current is not None and doc["start"] <= current["end"] + _MAX_SPAN_GAP:
+                if doc["end"] > current["end"]:
+                    if doc["start"] > current["end"]:
+                        current["text"] += "\n" + doc["content"]
+                    else:
+                        # Drop the overlap: the text both chunks share
+                        current["text"] += doc["content"][current["end"] - doc["start"]:]
+                    current["end"] = doc["end"]
+                current["rank"] = min(current["rank"], rank)
+                current["documents"].append(doc)
+                continue
+            current = {"rank": rank, "text": doc["content"], "documents": [doc], "end": doc["end"]}
+            passages.append(current)
+
+    passages.sort(key=lambda passage: passage["rank"])
+    return passages
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Leading part of ``text`` within ``max_tokens``.
+
+    Cut after the last whole sentence that fits, keeping the text up to
+    there as is (paragraph breaks included); if not even the first sentence
+    fits, cut at a token boundary instead.
+    """
+    if max_tokens <= 0:
+        return ""
+    end = 0
+    used = 0
+    for match in _SENTENCE_END.finditer(text):
+        used += count_tokens(text[end : match.start()]) + 1
+        if used > max_tokens:
+            break
+        end = match.start()
+    if end:
+        return text[:end]
+
+    # One token of slack: a re-encoded prefix can tokenize differently
+    encoding = _encoding(get_settings().llm_model)
+    if encoding is None:
+        return text[: (max_tokens - 1) * 4].rstrip()
+    return encoding.decode(encoding.encode(text, disallowed_special=())[: max_tokens - 1]).rstrip()
+
+
+def build_context(documents: list[dict], max_tokens: int | None = None) -> dict:
+    """
+    Assemble prompt context from ranked documents within a token budget.
+
+    Passages use the ``format_context`` layout ([title], text, [Source: ...]).
+
+    Returns:
+        {
+            "context": assembled context string,
+            "sources": [{"title", "domain", "url", "chunk_ids", "tokens"}, ...]
+                for the sources used, in order of first use,
+            "tokens": context size in tokens,
+            "truncated": whether anything was cut or left out,
+        }
+    """
+    max_tokens = max_tokens or get_settings().context_max_tokens
+    if not documents:
+        return {"context": "No relevant context found.", "sources": [], "tokens": 0, "truncated": False}
+
+    parts: list[str] = []
+    sources: dict[str, dict] = {}
+    used = 0
+    truncated = False
+    passages = _passages(documents)
+    for i, passage in enumerate(passages):
+        first = passage["documents"][0]
+        source = first.get("source", "Unknown")
+        metadata = first.get("metadata", {})
+        header = f"[{_display_title(source, metadata)}]\n"
+        footer = f"\n[Source: {source}]"
+        separator = 1 if parts else 0  # "\n\n" between passages
+        overhead = count_tokens(header) + count_tokens(footer) + separator
+        text = passage["text"]
+        tokens = count_tokens(text)
+        if used + overhead + tokens > max_tokens:
+            truncated = True
+            text = _truncate(text, max_tokens - used - overhead)
+            if not text:
+                break
+            tokens = count_tokens(text)
+
+        parts.append(f"{header}{text}{footer}")
+        used += overhead + tokens
+        entry = sources.setdefault(
+            source,
+            {
+                "title": metadata.get("title", ""),
+                "domain": metadata.get("domain", ""),
+                "url": source,
+                "chunk_ids": [],
+                "tokens": 0,
+            },
+        )
+        entry["chunk_ids"].extend(doc["chunk_id"] for doc in passage["documents"] if doc.get("chunk_id"))
+        entry["tokens"] += overhead + tokens
+        if truncated:
+            break
+    truncated = truncated or len(parts) < len(passages)
+
+    if not parts:
+        return {"context": "No relevant context found.", "sources": [], "tokens": 0, "truncated": truncated}
+    return {"context": "\n\n".join(parts), "sources": list(sources.values()), "tokens": used, "truncated": truncated}
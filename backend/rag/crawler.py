@@ -0,0 +1,292 @@
+"""Concurrent async HTML fetcher for ingestion.
+
+One shared ``httpx.AsyncClient`` fetches many URLs at once, bounded by a
+global and a per-host concurrency limit, with a politeness delay between
+requests to the same host and retry with backoff on transient failures.
+
+Responses are kept in the fetch cache (``backend.rag.fetch_cache``):
+compressed bodies plus ETag / Last-Modified. Pages fetched within
+``fetch_cache_fresh_s`` are served without a request; older ones are
+revalidated with If-None-Match / If-Modified-Since so unchanged pages cost
+a 304 (pages without validators are refetched). ``revalidate=False`` uses
+the cache as-is. Cache reads and writes (gzip, SQLite, file I/O) run in
+worker threads, off the event loop.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlparse
+
+import httpx
+
+from backend.rag.fetch_cache import FetchCache
+from backend.settings import get_settings
+from backend.utils.hashing import hash_bytes
+
+USER_AGENT = "ndt-chatbot-ingest/1.0 (+https://neil-degrasse-tyson-ai-chatbot.com)"
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one URL."""
+
+    url: str
+    html: str | None = None
+    # "fetched", "not_modified" (304, served from cache), "cached" (no request) or "error"
+    status: str = "error"
+    http_status: int | None = None
+    body_hash: str | None = None  # sha256 of the response body (the extraction cache key)
+    bytes: int = 0
+    attempts: int = 0
+    elapsed_s: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class CrawlStats:
+    """Counts and throughput for one crawl."""
+
+    total: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    cached: int = 0
+    errors: int = 0
+    retries: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    elapsed_s: float = 0.0
+
+    def record(self, result: FetchResult) -> None:
+        if result.status == "error":
+            self.errors += 1
+        else:
+            setattr(self, result.status, getattr(self, result.status) + 1)
+        self.retries += max(0, result.attempts - 1)
+        self.bytes += result.bytes
+
+    @property
+    def done(self) -> int:
+        return self.fetched + self.not_modified + self.cached + self.errors
+
+    def summary(self) -> str:
+        elapsed = self.elapsed_s or (time.perf_counter() - self.started)
+        rate = self.done / elapsed if elapsed else 0.0
+        mb_s = self.bytes / 1e6 / elapsed if elapsed else 0.0
+        return (
+            f"{self.done}/{self.total} URLs in {elapsed:.1f}s ({rate:.1f} URLs/s, {mb_s:.2f} MB/s): "
+            f"{self.fetched} fetched, {self.not_modified} not modified, {self.cached} cached, "
+            f"{self.errors} errors, {self.retries} retries"
+        )
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class Crawler:
+    """Fetch URLs concurrently with per-host limits, politeness and revalidation.
+
+    Use as an async context manager (owns its client unless one is passed)::
+
+        async with Crawler(cache_dir) as crawler:
+            results = await crawler.crawl(urls)
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        max_concurrency: int | None = None,
+        per_host_concurrency: int | None = None,
+        delay_s: float | None = None,
+        max_retries: int | None = None,
+        timeout: float | None = None,
+        revalidate: bool = True,
+        client: httpx.AsyncClient | None = None,
+    ):
+        settings = get_settings()
+        self.cache_dir = cache_dir
+        self.cache: FetchCache | None = None  # opened on enter
+        self.fresh_s = settings.fetch_cache_fresh_s
+        self.max_concurrency = max_concurrency or settings.crawl_max_concurrency
+        self.per_host_concurrency = per_host_concurrency or settings.crawl_per_host_concurrency
+        self.delay_s = settings.crawl_delay_s if delay_s is None else delay_s
+        self.max_retries = settings.crawl_max_retries if max_retries is None else max_retries
+        self.max_retry_after_s = settings.crawl_max_retry_after_s
+        self.timeout = timeout or settings.crawl_timeout
+        self.revalidate = revalidate
+        self.stats = CrawlStats()
+
+        self._client = client
+        self._owns_client = client is None
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._host_locks: dict[str, asyncio.Lock] = {}
+        self._next_slot: dict[str, float] = {}
+
+    async def __aenter__(self) -> "Crawler":
+        if self.cache_dir is not None and self.cache is None:
+            self.cache = await asyncio.to_thread(FetchCache, self.cache_dir)
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout, connect=min(10.0, self.timeout)),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    async def _polite_wait(self, host: str) -> None:
+        """Space request starts to the same host at least ``delay_s`` apart."""
+        if self.delay_s <= 0:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay_s
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after_s)
+        return random.uniform(0, 0.5 * (2**attempt))
+
+    async def _get(self, url: str, headers: dict[str, str], result: FetchResult) -> httpx.Response:
+        """GET with retries on transport errors and retryable statuses (counted in ``result``)."""
+        host = urlparse(url).netloc
+        host_sem = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+        for attempt in range(self.max_retries + 1):
+            result.attempts += 1
+            delay = None
+            async with host_sem:
+                # Politeness spacing holds only this host's slot; a global one is taken just for the request
+                await self._polite_wait(host)
+                async with self._global:
+                    try:
+                        response = await self._client.get(url, headers=headers)
+                    except httpx.TransportError:
+                        if attempt == self.max_retries:
+                            raise
+                        delay = self._backoff(attempt, None)
+                    else:
+                        result.http_status = response.status_code
+                        if response.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                            delay = self._backoff(attempt, _retry_after(response))
+            if delay is None:
+                return response
+            # Back off after releasing the slots, so other URLs keep them busy meanwhile
+            await asyncio.sleep(delay)
+        return response
+
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch one URL (or revalidate / reuse its cached copy)."""
+        started = time.perf_counter()
+        result = FetchResult(url=url)
+        entry = await asyncio.to_thread(self.cache.lookup, url) if self.cache is not None else None
+        if entry is not None and (not self.revalidate or entry.age_s < self.fresh_s):
+            result.html = await asyncio.to_thread(self.cache.read, entry)
+            if result.html is not None:
+                result.body_hash = entry.body_hash
+                result.status = "cached"
+                return self._finish(result, started)
+            entry = None
+
+        # Conditional GET if we have validators, else a plain refetch
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            response = await self._get(url, headers, result)
+            cached_html = None
+            if response.status_code == 304 and entry is not None:
+                cached_html = await asyncio.to_thread(self.cache.read, entry)
+                if cached_html is None:
+                    # Validated, but the cached body is gone (evicted or unreadable): fetch it outright
+                    response = await self._get(url, {}, result)
+            if cached_html is not None:
+                await asyncio.to_thread(self.cache.refreshed, entry, response.headers)
+                result.html = cached_html
+                result.body_hash = entry.body_hash
+                result.status = "not_modified"
+            else:
+                response.raise_for_status()
+                result.html = response.text
+                result.bytes = len(response.content)
+                result.status = "fetched"
+                if self.cache is not None:
+                    stored = await asyncio.to_thread(
+                        self.cache.store,
+                        url,
+                        response.content,
+                        response.status_code,
+                        response.headers,
+                        response.encoding,
+                    )
+                    result.body_hash = stored.body_hash
+                else:
+                    result.body_hash = hash_bytes(response.content)
+        except Exception as e:
+            result.status = "error"
+            result.error = f"{type(e).__name__}: {e}"
+
+        return self._finish(result, started)
+
+    def _finish(self, result: FetchResult, started: float) -> FetchResult:
+        """Record a result and print a progress line."""
+        result.elapsed_s = time.perf_counter() - started
+        self.stats.record(result)
+        icon = "❌" if result.status == "error" else "✓"
+        detail = result.error if result.status == "error" else result.status
+        print(f"[{self.stats.done}/{self.stats.total}] {icon} {result.url} ({detail}, {result.elapsed_s:.2f}s)")
+        return result
+
+    def begin(self, total: int) -> None:
+        """Reset stats for a run of ``total`` URLs fetched via ``fetch``."""
+        self.stats = CrawlStats(total=total)
+
+    def end(self) -> None:
+        """Print the throughput summary for the run."""
+        self.stats.elapsed_s = time.perf_counter() - self.stats.started
+        print(f"[crawler] {self.stats.summary()}")
+
+    async def crawl(self, urls: list[str]) -> list[FetchResult]:
+        """Fetch all URLs concurrently; results are in input order."""
+        self.begin(len(urls))
+        results = await asyncio.gather(*(self.fetch(url) for url in urls))
+        self.end()
+        return list(results)
+
+
+def crawl_urls(urls: list[str], cache_dir: Path | None = None, **kwargs) -> list[FetchResult]:
+    """Blocking wrapper around ``Crawler.crawl`` for CLI use."""
+
+    async def _run() -> list[FetchResult]:
+        async with Crawler(cache_dir, **kwargs) as crawler:
+            return await crawler.crawl(urls)
+
+    return asyncio.run(_run())
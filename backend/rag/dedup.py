@@ -0,0 +1,160 @@
+"""Near-duplicate chunk detection with MinHash-LSH.
+
+Each chunk is shingled into word n-grams (``dedup_shingle_size``) and
+summarised by a ``dedup_num_perm``-value MinHash signature. Signatures are
+bucketed by LSH bands sized for ``dedup_threshold``, so only chunks that
+share a band are compared; a candidate whose estimated Jaccard similarity
+reaches the threshold makes the new chunk a duplicate. The first occurrence
+is kept and later sources are recorded on it as ``alt_sources``. A source
+whose chunks were dropped depends on the survivors it matched (recorded in
+the source manifest as ``dedup_survivors``): if a survivor's source changes
+or is purged, the ingest pipeline re-ingests the dependent source in full.
+
+The index can be seeded with the chunks already in the store, so an
+incremental run also catches duplicates of sources it skips as unchanged.
+A source's own previous chunks never count against it.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from backend.deps import get_embeddings
+from backend.rag.artifact import has_artifact, iter_documents, load_artifact
+from backend.rag.store import chunk_id
+from backend.settings import get_settings
+
+_WORD_RE = re.compile(r"\w+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def _bands_for(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve midpoint is closest to threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+@dataclass
+class DedupStats:
+    """What deduplication removed."""
+
+    chunks: int = 0
+    duplicates: int = 0
+    bytes_saved: int = 0
+
+    def summary(self, dimension: int | None = None) -> str:
+        vector_bytes = f", ~{self.duplicates * dimension * 4 / 1e6:.1f} MB of vectors" if dimension else ""
+        return (
+            f"{self.duplicates}/{self.chunks} chunks were near-duplicates: "
+            f"{self.bytes_saved / 1e6:.2f} MB of text and {self.duplicates} vectors saved{vector_bytes}"
+        )
+
+
+@dataclass
+class _Entry:
+    chunk_id: str
+    source: str  # owning source key (URL or file path)
+    seeded: bool  # already in the store before this run
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH index of chunk signatures; first occurrence wins."""
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        num_perm: int | None = None,
+        shingle_size: int | None = None,
+        seed: int = 1,
+    ):
+        settings = get_settings()
+        self.threshold = threshold if threshold is not None else settings.dedup_threshold
+        self.num_perm = num_perm or settings.dedup_num_perm
+        self.shingle_size = shingle_size or settings.dedup_shingle_size
+        self.bands, self.rows = _bands_for(self.threshold, self.num_perm)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: ((a * x + b) mod 2^64) >> 32
+        self._a = rng.integers(1, 2**63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=self.num_perm, dtype=np.uint64)
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: list[np.ndarray] = []
+        self._entries: list[_Entry] = []
+        self.stats = DedupStats()
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        with np.errstate(over="ignore"):
+            permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return (permuted & _MASK32).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find(self, signature: np.ndarray, source: str) -> _Entry | None:
+        """First indexed chunk similar enough to ``signature`` (ignoring a source's own old chunks)."""
+        seen: set[int] = set()
+        best = None
+        for band, key in enumerate(self._band_keys(signature)):
+            for idx in self._buckets[band].get(key, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                entry = self._entries[idx]
+                if entry.seeded and entry.source == source:
+                    # The previous version of the source being re-ingested
+                    continue
+                if float(np.mean(self._signatures[idx] == signature)) >= self.threshold:
+                    if best is None or idx < best:
+                        best = idx
+        return self._entries[best] if best is not None else None
+
+    def add(self, signature: np.ndarray, chunk_id: str, source: str, seeded: bool = False) -> None:
+        idx = len(self._entries)
+        self._signatures.append(signature)
+        self._entries.append(_Entry(chunk_id, source, seeded))
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(idx)
+
+    def seed(self, store_dir: Path, exclude: set[str]) -> int:
+        """Index the chunks already in a store (except those of ``exclude`` sources)."""
+        if not has_artifact(store_dir):
+            return 0
+        store = load_artifact(store_dir, get_embeddings())
+        count = 0
+        for position, doc in enumerate(iter_documents(store)):
+            source = doc.metadata.get("file_path") or doc.metadata.get("source", "")
+            if source in exclude:
+                continue
+            self.add(self.signature(doc.page_content), store.index_to_docstore_id[position], source, seeded=True)
+            count += 1
+        return count
+
+    def filter(self, source: str, chunks: list[dict]) -> tuple[list[dict], dict[str, str]]:
+        """
+        Drop the chunks of one source that near-duplicate an indexed chunk.
+
+        Survivors are indexed under the ids ``update_store`` will give them.
+        Returns the kept chunks and {surviving chunk id: survivor's source}
+        for the duplicates of other sources' chunks: the text the source
+        now relies on them to keep.
+        """
+        kept, survivors = [], {}
+        for chunk in chunks:
+            self.stats.chunks += 1
+            signature = self.signature(chunk["content"])
+            match = self.find(signature, source)
+            if match is not None:
+                self.stats.duplicates += 1
+                self.stats.bytes_saved += len(chunk["content"].encode())
+                if match.source != source:
+                    survivors[match.chunk_id] = match.source
+                continue
+            self.add(signature, chunk_id(source, len(kept), chunk["content"]), source)
+            kept.append(chunk)
+        return kept, survivors
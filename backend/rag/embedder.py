@@ -0,0 +1,198 @@
+"""Token-budgeted, concurrent batch embedding for index builds.
+
+Texts are packed in input order into batches of at most
+``embedding_batch_tokens`` tokens and ``embedding_batch_size`` inputs, and
+up to ``embedding_concurrency`` batches are in flight at once against the
+OpenAI-compatible ``{embedding_base_url}/embeddings`` endpoint. Rate limits
+(429), server errors and dropped connections are retried with full-jitter
+backoff (``embedding_retry_base_delay``) that honours Retry-After up to
+``embedding_max_retry_after_s``. Results come back in input order, and
+each finished batch is handed to ``on_batch`` right away (so a cache keeps
+whatever succeeded even if a later batch fails).
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from functools import lru_cache
+
+import httpx
+import numpy as np
+
+from backend.settings import get_settings
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# Output size of known models, for shaping empty results before any request
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+
+
+@lru_cache
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with the embedding models' tokenizer (~4 chars/token if unavailable)."""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def pack_batches(texts: list[str], max_tokens: int, max_size: int) -> list[tuple[int, int]]:
+    """Split texts into consecutive [start, end) ranges under the token and size budgets."""
+    batches = []
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text)
+        if i > start and (tokens + n > max_tokens or i - start >= max_size):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class BatchEmbedder:
+    """Embeds lists of texts in parallel, budgeted batches."""
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        model: str | None = None,
+        max_batch_tokens: int | None = None,
+        max_batch_size: int | None = None,
+        concurrency: int | None = None,
+        max_retries: int | None = None,
+        timeout: float | None = None,
+    ):
+        settings = get_settings()
+        self.base_url = (base_url or settings.embedding_base_url).rstrip("/")
+        self.api_key = api_key or settings.openai_api_key
+        self.model = model or settings.embedding_model
+        self.max_batch_tokens = max_batch_tokens or settings.embedding_batch_tokens
+        self.max_batch_size = max_batch_size or settings.embedding_batch_size
+        self.concurrency = concurrency or settings.embedding_concurrency
+        self.max_retries = settings.embedding_max_retries if max_retries is None else max_retries
+        self.timeout = timeout or settings.embedding_request_timeout
+        self.base_delay = settings.embedding_retry_base_delay
+        self.max_retry_after_s = settings.embedding_max_retry_after_s
+        self._dimension: int | None = None
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "texts": 0, "tokens": 0}
+
+    @property
+    def dimension(self) -> int:
+        """Embedding size: as last returned by the API, else known for the model (0 if unknown)."""
+        return self._dimension or EMBEDDING_DIMENSIONS.get(self.model, 0)
+
+    async def _request(self, client: httpx.AsyncClient, texts: list[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                response = await client.post(
+                    f"{self.base_url}/embeddings",
+                    json={"model": self.model, "input": texts, "encoding_format": "float"},
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    body = response.json()
+                    data = sorted(body["data"], key=lambda item: item["index"])
+                    if len(data) != len(texts):
+                        raise ValueError(f"Expected {len(texts)} embeddings, got {len(data)}")
+                    self.stats["tokens"] += body.get("usage", {}).get("total_tokens", 0)
+                    vectors = np.asarray([item["embedding"] for item in data], dtype=np.float32)
+                    self._dimension = vectors.shape[1]
+                    return vectors
+                if response.status_code == 429:
+                    self.stats["rate_limited"] += 1
+                retry_after = _retry_after(response)
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt >= self.max_retries:
+                raise RuntimeError(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts ({error})")
+            if retry_after is not None:
+                delay = min(retry_after, self.max_retry_after_s)
+            else:
+                delay = random.uniform(0, self.base_delay * (2**attempt))
+            self.stats["retries"] += 1
+            print(f"[embedder] {error}; retrying batch of {len(texts)} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def aembed(
+        self,
+        texts: list[str],
+        on_batch: Callable[[list[str], np.ndarray], None] | None = None,
+    ) -> np.ndarray:
+        """Embed texts; returns a float32 (n, dim) array in input order."""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        batches = pack_batches(texts, self.max_batch_tokens, self.max_batch_size)
+        results: list[np.ndarray | None] = [None] * len(batches)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async with httpx.AsyncClient(
+            timeout=self.timeout,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        ) as client:
+
+            async def run(i: int, start: int, end: int) -> None:
+                async with semaphore:
+                    results[i] = await self._request(client, texts[start:end])
+                if on_batch is not None:
+                    on_batch(texts[start:end], results[i])
+
+            outcomes = await asyncio.gather(
+                *(run(i, start, end) for i, (start, end) in enumerate(batches)),
+                return_exceptions=True,
+            )
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+
+        self.stats["texts"] += len(texts)
+        elapsed = time.perf_counter() - started
+        print(
+            f"[embedder] {len(texts)} texts in {len(batches)} batches in {elapsed:.1f}s "
+            f"({len(texts) / elapsed if elapsed else 0.0:.0f} texts/s)"
+        )
+        return np.vstack(results)
+
+    def embed(
+        self,
+        texts: list[str],
+        on_batch: Callable[[list[str], np.ndarray], None] | None = None,
+    ) -> np.ndarray:
+        """Blocking ``aembed`` (call from a worker thread, not the event loop)."""
+        return asyncio.run(self.aembed(texts, on_batch))
+
+
+@lru_cache
+def get_batch_embedder() -> BatchEmbedder:
+    return BatchEmbedder()
@@ -0,0 +1,194 @@
+"""Persistent chunk embedding cache for ingestion.
+
+Vectors are keyed by (embedding model, ``hash_content(chunk text)``) and
+kept as float32 blobs in one SQLite file, so rebuilds and re-ingests only
+call the embeddings API for text it has never seen. Lookups are batched;
+when the file grows past ``embedding_cache_max_mb`` the least recently
+used vectors are evicted.
+
+Usage:
+    python -m backend.rag.embedding_cache stats
+    python -m backend.rag.embedding_cache clear
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+
+# SQLite caps bound parameters per statement; stay well under it
+_LOOKUP_BATCH = 500
+
+
+def _key(model: str, text: str) -> str:
+    return hash_content(f"{model}\n{hash_content(text)}")
+
+
+class EmbeddingCache:
+    """SQLite-backed (model, content hash) -> float32 vector store with LRU eviction."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self._stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def get_many(self, model: str, texts: list[str]) -> list[np.ndarray | None]:
+        """Cached vectors for texts (None where missing), in input order."""
+        keys = [_key(model, text) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start:start + _LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+            hits = sum(key in found for key in keys)
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model: str, texts: list[str], vectors: np.ndarray) -> None:
+        """Store vectors for texts, then evict if over the size budget."""
+        now = time.time()
+        rows = [
+            (_key(model, text), np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            existing = self._existing_bytes([key for key, _, _ in rows])
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+            self._bytes += sum(len(blob) for _, blob, _ in rows) - existing
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _existing_bytes(self, keys: list[str]) -> int:
+        total = 0
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            total += self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchone()[0]
+        return total
+
+    def _evict(self) -> None:
+        """Drop least recently used vectors until under 90% of the budget."""
+        target = int(self.max_bytes * 0.9)
+        while self._bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            victims = []
+            for key, size in rows:
+                if self._bytes <= target:
+                    break
+                victims.append((key,))
+                self._bytes -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+            self._stats["evicted"] += len(victims)
+        self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": count,
+                "size_mb": self._bytes / 1e6,
+                "max_mb": self.max_bytes / 1e6,
+            }
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache | None:
+    """The configured cache, or None if disabled."""
+    settings = get_settings()
+    if not settings.embedding_cache_path:
+        return None
+    return EmbeddingCache(Path(settings.embedding_cache_path), int(settings.embedding_cache_max_mb * 1e6))
+
+
+def embed_texts_cached(texts: list[str], model: str | None = None) -> np.ndarray:
+    """
+    Embed texts as a float32 (n, dim) array, calling the API only for cache misses.
+
+    Misses go through the batch embedder (``backend.rag.embedder``);
+    duplicate texts are embedded once, and each finished batch is cached
+    immediately so a failed build doesn't lose the batches that succeeded.
+    """
+    from backend.rag.embedder import get_batch_embedder
+
+    embedder = get_batch_embedder()
+    model = model or embedder.model
+    if not texts:
+        return np.zeros((0, embedder.dimension), dtype=np.float32)
+    cache = get_embedding_cache()
+    if cache is None:
+        return embedder.embed(texts)
+
+    cached = cache.get_many(model, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+    fresh: dict[str, np.ndarray] = {}
+    if missing:
+        vectors = embedder.embed(missing, on_batch=lambda batch, vecs: cache.put_many(model, batch, vecs))
+        fresh = dict(zip(missing, vectors))
+    return np.vstack([vector if vector is not None else fresh[text] for text, vector in zip(texts, cached)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the chunk embedding cache")
+    parser.add_argument("action", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    cache = get_embedding_cache()
+    if cache is None:
+        raise SystemExit("Embedding cache is disabled (embedding_cache_path is empty)")
+    if args.action == "clear":
+        cache.clear()
+        print(f"✅ Cleared {cache.path}")
+    else:
+        for name, value in cache.stats().items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
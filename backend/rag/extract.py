@@ -0,0 +1,182 @@
+"""Parallel text extraction for ingestion (trafilatura for HTML, pypdf for PDF).
+
+Extraction is CPU-bound, so it runs on a ``ProcessPoolExecutor``
+(``extract_workers`` processes, default one per core). Large PDFs are split
+into page ranges (``pdf_pages_per_task``) that are extracted in parallel
+and joined in page order. Each task is bounded by ``extract_timeout_s``:
+a pathological document fails on its own instead of hanging the run.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.settings import get_settings
+
+
+@dataclass
+class ExtractStats:
+    """Throughput of one extraction run."""
+
+    documents: int = 0
+    pages: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        docs_s = self.documents / elapsed if elapsed else 0.0
+        pages_s = self.pages / elapsed if elapsed else 0.0
+        return (
+            f"{self.documents} documents ({self.pages} pages) in {elapsed:.1f}s: "
+            f"{docs_s:.1f} docs/s, {pages_s:.1f} pages/s, {self.failed} failed"
+        )
+
+
+def _workers() -> int:
+    return get_settings().extract_workers or os.cpu_count() or 1
+
+
+class ExtractionTimeout(BaseException):
+    """Raised in a worker when a task exceeds its time limit.
+
+    A BaseException so parsers that swallow ``Exception`` can't ignore it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("extraction timed out")
+
+
+def _with_timeout(timeout: float, fn, *args):
+    """Run fn in a worker process, interrupting it after ``timeout`` seconds (Unix)."""
+    if not hasattr(signal, "setitimer") or timeout <= 0:
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _html_task(html: str, url: str, timeout: float) -> tuple[str, dict]:
+    from backend.rag.ingest_html import extract_text_from_html
+
+    return _with_timeout(timeout, extract_text_from_html, html, url)
+
+
+def _pdf_page_count(pdf_path: Path) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(pdf_path).pages)
+
+
+def _extract_pdf_pages(pdf_path: Path, start: int, end: int) -> list[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _pdf_task(pdf_path: Path, start: int, end: int, timeout: float) -> list[str]:
+    return _with_timeout(timeout, _extract_pdf_pages, pdf_path, start, end)
+
+
+class Extractor:
+    """A process pool for extraction, awaited one document at a time.
+
+    Many documents can be in flight at once (see ``backend.rag.ingest_pipeline``).
+    Workers come from a fork server where available, so they are never forked
+    from a process that already has pipeline threads running.
+    """
+
+    def __init__(self, workers: int | None = None):
+        settings = get_settings()
+        self.workers = workers or _workers()
+        self.timeout = settings.extract_timeout_s
+        self.pages_per_task = max(1, settings.pdf_pages_per_task)
+        self.stats = ExtractStats()
+        context = multiprocessing.get_context("forkserver") if os.name == "posix" else None
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self._stuck: list[str] = []
+
+    def __enter__(self) -> "Extractor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def _await(self, future: Future, label: str):
+        """Await a task; a parent-side deadline backs up the in-worker alarm.
+
+        The deadline starts once the task is handed to a worker (queued tasks
+        don't count) and allows a full extra ``timeout`` of grace.
+        """
+        wrapped = asyncio.wrap_future(future)
+        deadline = None
+        while not wrapped.done():
+            if deadline is None and future.running():
+                deadline = time.monotonic() + 2 * self.timeout
+            if deadline is not None and time.monotonic() >= deadline:
+                self._stuck.append(label)
+                print(f"❌ Extraction timed out (worker unresponsive): {label}")
+                return None
+            wait = 1.0 if deadline is None else max(0.0, deadline - time.monotonic())
+            await asyncio.wait([wrapped], timeout=wait)
+        try:
+            return wrapped.result()
+        except ExtractionTimeout:
+            # Raised inside the worker (in-worker alarm)
+            print(f"❌ Extraction timed out: {label}")
+        except Exception as e:
+            print(f"❌ Extraction failed: {label}: {e}")
+        return None
+
+    async def html(self, html: str, url: str) -> tuple[str, dict] | None:
+        """(text, metadata) for one page, or None if extraction failed."""
+        result = await self._await(self._pool.submit(_html_task, html, url, self.timeout), url)
+        self.stats.documents += 1
+        self.stats.pages += 1
+        self.stats.failed += result is None
+        return result
+
+    async def pdf(self, pdf_path: Path) -> str | None:
+        """Text of one PDF (page ranges extracted in parallel), or None if it failed."""
+        count = await self._await(self._pool.submit(_pdf_page_count, pdf_path), str(pdf_path))
+        parts = None
+        if count is not None:
+            # One task per page range, so a 500-page book spreads across every core
+            ranges = [
+                (start, min(start + self.pages_per_task, count))
+                for start in range(0, count, self.pages_per_task)
+            ]
+            parts = await asyncio.gather(
+                *(
+                    self._await(
+                        self._pool.submit(_pdf_task, pdf_path, start, end, self.timeout),
+                        f"{pdf_path} pages {start}-{end - 1}",
+                    )
+                    for start, end in ranges
+                )
+            )
+        self.stats.documents += 1
+        if parts is None or any(part is None for part in parts):
+            self.stats.failed += 1
+            return None
+        pages = [page for part in parts for page in part]
+        self.stats.pages += len(pages)
+        return "".join(f"{page}\n\n" for page in pages)
+
+    def close(self) -> None:
+        """Shut the pool down; kill workers still stuck on a timed-out task."""
+        self._pool.shutdown(wait=not self._stuck, cancel_futures=True)
+        if self._stuck:
+            for process in list((self._pool._processes or {}).values()):
+                process.terminate()
@@ -0,0 +1,362 @@
+"""Two-tier ingestion cache: compressed HTTP responses and extracted text.
+
+Tier 1 keeps each response body gzip-compressed and content-addressed
+(``<cache_dir>/bodies/<hash[:2]>/<sha256(body)>.gz``, so identical pages
+are stored once), with the response's status, ETag, Last-Modified,
+encoding, headers and fetch time in ``<cache_dir>/fetch_cache.sqlite``.
+
+Tier 2 keeps extracted text and metadata keyed by (body hash, extractor
+version): re-ingesting unchanged pages, e.g. after a chunking change,
+re-runs neither the request nor trafilatura, and bumping the extractor
+version invalidates it.
+
+Both tiers are size-bounded (``fetch_cache_max_mb``,
+``extract_cache_max_mb``) with least-recently-used eviction. Pages cached
+by the old ``<sha256(url)>.html`` layout are imported on first open.
+
+Hit / miss / eviction counters are kept per instance (``summary``, for one
+run) and accumulated in the database (``stats``, across runs).
+
+Usage:
+    python -m backend.rag.fetch_cache stats --cache-dir data/cache
+    python -m backend.rag.fetch_cache clear --cache-dir data/cache
+"""
+
+import argparse
+import gzip
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.settings import get_settings
+from backend.utils.hashing import hash_bytes, hash_content
+
+DB_FILENAME = "fetch_cache.sqlite"
+BODIES_DIRNAME = "bodies"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, body_hash TEXT NOT NULL, "
+    "status INTEGER NOT NULL, etag TEXT, last_modified TEXT, encoding TEXT, headers TEXT, fetched_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS bodies (hash TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+    "stored INTEGER NOT NULL, last_used REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, text BLOB NOT NULL, metadata TEXT NOT NULL, "
+    "stored INTEGER NOT NULL, last_used REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS bodies_last_used ON bodies (last_used)",
+    "CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+
+@dataclass
+class CachedResponse:
+    """A cached response's record (its body is read separately)."""
+
+    url: str
+    body_hash: str
+    status: int
+    etag: str | None
+    last_modified: str | None
+    encoding: str | None
+    fetched_at: float
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class FetchCache:
+    """Compressed, content-addressed response bodies plus cached extractions."""
+
+    def __init__(self, root: Path, max_bytes: int | None = None, extract_max_bytes: int | None = None):
+        settings = get_settings()
+        root.mkdir(parents=True, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes or int(settings.fetch_cache_max_mb * 1e6)
+        self.extract_max_bytes = extract_max_bytes or int(settings.extract_cache_max_mb * 1e6)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(root / DB_FILENAME, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        self._body_bytes, self._extract_bytes = self._sizes()
+        self._stats = {"body_hits": 0, "body_misses": 0, "extract_hits": 0, "extract_misses": 0, "evicted": 0}
+        self._import_legacy()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        """Bump a counter for this run and in the database (lock held; committed by the caller)."""
+        self._stats[name] += n
+        self._conn.execute(
+            "INSERT INTO counters VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def _body_path(self, body_hash: str) -> Path:
+        return self.root / BODIES_DIRNAME / body_hash[:2] / f"{body_hash}.gz"
+
+    def _sizes(self) -> tuple[int, int]:
+        bodies = self._conn.execute("SELECT COALESCE(SUM(stored), 0) FROM bodies").fetchone()[0]
+        extractions = self._conn.execute("SELECT COALESCE(SUM(stored), 0) FROM extractions").fetchone()[0]
+        return bodies, extractions
+
+    # Tier 1: responses
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """The cached response for a URL, if its body is still cached."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.url, r.body_hash, r.status, r.etag, r.last_modified, r.encoding, r.fetched_at "
+                "FROM responses r JOIN bodies b ON b.hash = r.body_hash WHERE r.key = ?",
+                (hash_content(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(url, *row[1:])
+
+    def read(self, entry: CachedResponse) -> str | None:
+        """Decoded body of a cached response (None if it was evicted meanwhile)."""
+        try:
+            body = gzip.decompress(self._body_path(entry.body_hash).read_bytes())
+        except (OSError, EOFError, zlib.error):
+            with self._lock:
+                self._count("body_misses")
+                self._conn.commit()
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE bodies SET last_used = ? WHERE hash = ?", (time.time(), entry.body_hash))
+            self._count("body_hits")
+            self._conn.commit()
+        return body.decode(entry.encoding or "utf-8", errors="replace")
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        status: int = 200,
+        headers: Mapping[str, str] | None = None,
+        encoding: str | None = None,
+        fetched_at: float | None = None,
+    ) -> CachedResponse:
+        """Cache a response body (compressed, stored once per content) and its headers."""
+        return self._put(hash_content(url), url, body, status, headers, encoding, fetched_at)
+
+    def _put(
+        self,
+        key: str,
+        url: str | None,
+        body: bytes,
+        status: int,
+        headers: Mapping[str, str] | None,
+        encoding: str | None,
+        fetched_at: float | None,
+    ) -> CachedResponse:
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        body_hash = hash_bytes(body)
+        path = self._body_path(body_hash)
+        now = time.time()
+        with self._lock:
+            known = self._conn.execute("SELECT stored FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+            if known is None or not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(gzip.compress(body, compresslevel=6))
+                tmp.replace(path)
+            stored = path.stat().st_size
+            self._body_bytes += stored - (known[0] if known else 0)
+            self._conn.execute("INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?)", (body_hash, len(body), stored, now))
+            entry = CachedResponse(
+                url=url or "",
+                body_hash=body_hash,
+                status=status,
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+                encoding=encoding,
+                fetched_at=fetched_at or now,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    body_hash,
+                    status,
+                    entry.etag,
+                    entry.last_modified,
+                    encoding,
+                    json.dumps(headers),
+                    entry.fetched_at,
+                ),
+            )
+            self._conn.commit()
+            self._evict_bodies()
+        return entry
+
+    def refreshed(self, entry: CachedResponse, headers: Mapping[str, str]) -> None:
+        """Record a 304: the cached body is current as of now (validators may be updated)."""
+        etag = headers.get("etag") or entry.etag
+        last_modified = headers.get("last-modified") or entry.last_modified
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, etag = ?, last_modified = ? WHERE key = ?",
+                (time.time(), etag, last_modified, hash_content(entry.url)),
+            )
+            self._conn.commit()
+
+    def _evict_bodies(self) -> None:
+        """Drop least recently used bodies until under 90% of the budget (lock held)."""
+        if self._body_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for body_hash, stored in self._conn.execute("SELECT hash, stored FROM bodies ORDER BY last_used").fetchall():
+            if self._body_bytes <= target:
+                break
+            self._body_path(body_hash).unlink(missing_ok=True)
+            self._conn.execute("DELETE FROM bodies WHERE hash = ?", (body_hash,))
+            self._conn.execute("DELETE FROM responses WHERE body_hash = ?", (body_hash,))
+            self._body_bytes -= stored
+            self._count("evicted")
+        self._conn.commit()
+
+    # Tier 2: extractions
+
+    def get_extraction(self, body_hash: str, version: str) -> tuple[str, dict] | None:
+        key = hash_content(f"{version}\n{body_hash}")
+        with self._lock:
+            row = self._conn.execute("SELECT text, metadata FROM extractions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count("extract_hits" if row is not None else "extract_misses")
+            self._conn.commit()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), json.loads(row[1])
+
+    def put_extraction(self, body_hash: str, version: str, text: str, metadata: dict) -> None:
+        key = hash_content(f"{version}\n{body_hash}")
+        blob = zlib.compress(text.encode("utf-8"), 6)
+        encoded = json.dumps(metadata, ensure_ascii=False)
+        stored = len(blob) + len(encoded.encode())
+        with self._lock:
+            known = self._conn.execute("SELECT stored FROM extractions WHERE key = ?", (key,)).fetchone()
+            self._extract_bytes += stored - (known[0] if known else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?)", (key, blob, encoded, stored, time.time())
+            )
+            self._conn.commit()
+            self._evict_extractions()
+
+    def _evict_extractions(self) -> None:
+        """Drop least recently used extractions until under 90% of the budget (lock held)."""
+        if self._extract_bytes <= self.extract_max_bytes:
+            return
+        target = int(self.extract_max_bytes * 0.9)
+        victims = []
+        for key, stored in self._conn.execute("SELECT key, stored FROM extractions ORDER BY last_used").fetchall():
+            if self._extract_bytes <= target:
+                break
+            victims.append((key,))
+            self._extract_bytes -= stored
+        self._conn.executemany("DELETE FROM extractions WHERE key = ?", victims)
+        self._count("evicted", len(victims))
+        self._conn.commit()
+
+    # Maintenance
+
+    def _import_legacy(self) -> None:
+        """Move pages cached as ``<sha256(url)>.html`` (+ ``.meta.json``) into the cache."""
+        legacy = sorted(self.root.glob("*.html"))
+        if not legacy:
+            return
+        for html_file in legacy:
+            meta_file = html_file.with_name(f"{html_file.stem}.meta.json")
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8")) if meta_file.exists() else {}
+            except ValueError:
+                meta = {}
+            headers = {
+                name: value
+                for name, value in (("etag", meta.get("etag")), ("last-modified", meta.get("last_modified")))
+                if value
+            }
+            # The file name is the URL hash, i.e. the record key (fetch_html kept no URL)
+            self._put(
+                html_file.stem,
+                meta.get("url"),
+                html_file.read_bytes(),
+                200,
+                headers,
+                "utf-8",
+                html_file.stat().st_mtime,
+            )
+            html_file.unlink()
+            meta_file.unlink(missing_ok=True)
+        print(f"[fetch_cache] Imported {len(legacy)} pages from the old cache layout")
+
+    def summary(self) -> str:
+        s = self._stats
+        return (
+            f"bodies {s['body_hits']} hits / {s['body_misses']} misses, "
+            f"extractions {s['extract_hits']} hits / {s['extract_misses']} misses, {s['evicted']} evicted"
+        )
+
+    def stats(self) -> dict:
+        """Cache contents, plus hit / miss / eviction counts across all runs."""
+        with self._lock:
+            counters = {name: 0 for name in self._stats}
+            counters.update(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            bodies, body_bytes, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0) FROM bodies"
+            ).fetchone()
+            responses = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            extractions, extracted = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored), 0) FROM extractions"
+            ).fetchone()
+        return {
+            **counters,
+            "responses": responses,
+            "bodies": bodies,
+            "body_mb": body_bytes / 1e6,
+            "stored_mb": stored / 1e6,
+            "compression_ratio": body_bytes / stored if stored else 0.0,
+            "max_mb": self.max_bytes / 1e6,
+            "extractions": extractions,
+            "extract_mb": extracted / 1e6,
+            "extract_max_mb": self.extract_max_bytes / 1e6,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            for table in ("responses", "bodies", "extractions", "counters"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            for path in (self.root / BODIES_DIRNAME).glob("*/*.gz"):
+                path.unlink()
+            self._body_bytes = self._extract_bytes = 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the ingestion fetch cache")
+    parser.add_argument("action", choices=["stats", "clear"])
+    parser.add_argument("--cache-dir", type=Path, default=Path("data/cache"))
+    args = parser.parse_args()
+
+    cache = FetchCache(args.cache_dir)
+    if args.action == "clear":
+        cache.clear()
+        print(f"✅ Cleared {args.cache_dir}")
+    else:
+        for name, value in cache.stats().items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Build Flat / IVF-Flat / IVF-PQ / HNSW FAISS indexes from stored vectors.
+
+Raw float32 vectors are kept in ``vectors.f32`` next to ``index.faiss`` so
+any index type can be (re)built without re-embedding. Run as a script to
+compare recall@k against the exact index and per-query latency:
+
+    python -m backend.rag.index_builder --store-path storage/vector_store --index-type all
+    python -m backend.rag.index_builder --index-type hnsw --write
+
+The live version (named by CURRENT under the store root) is measured;
+``--write`` publishes a copy of it with the built index type as a new
+version; published versions are never modified in place. Set INDEX_TYPE
+as well so later ingests keep that type.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from backend.settings import get_settings
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+VECTORS_FILENAME = "vectors.f32"
+# Rows copied per write when assembling a vector file (64k x 1536 dims ≈ 400 MB)
+VECTOR_BLOCK_ROWS = 65536
+
+
+def read_vectors(store_path: Path, dim: int, mmap: bool = False) -> np.ndarray | None:
+    """Read the raw vector file (row i = FAISS position i), or None if missing.
+
+    ``mmap=True`` maps the file read-only instead of loading it.
+    """
+    path = store_path / VECTORS_FILENAME
+    if not path.exists():
+        return None
+    if not mmap:
+        return np.fromfile(path, dtype=np.float32).reshape(-1, dim)
+    if path.stat().st_size == 0:
+        # np.memmap refuses empty files
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="r").reshape(-1, dim)
+
+
+def write_vectors(store_path: Path, vectors: np.ndarray) -> None:
+    """Write the raw vector file atomically."""
+    path = store_path / VECTORS_FILENAME
+    tmp = path.with_suffix(".tmp")
+    np.ascontiguousarray(vectors, dtype=np.float32).tofile(tmp)
+    tmp.replace(path)
+
+
+def copy_vector_rows(out, vectors: np.ndarray, rows: list[int] | None = None) -> None:
+    """Append ``vectors[rows]`` (every row if None) to an open binary file, a block at a time."""
+    count = len(vectors) if rows is None else len(rows)
+    for start in range(0, count, VECTOR_BLOCK_ROWS):
+        if rows is None:
+            block = vectors[start : start + VECTOR_BLOCK_ROWS]
+        else:
+            block = vectors[rows[start : start + VECTOR_BLOCK_ROWS]]
+        np.ascontiguousarray(block, dtype=np.float32).tofile(out)
+
+
+def reconstruct_vectors(index: faiss.Index) -> np.ndarray:
+    """Recover vectors from an index that stores them uncompressed (Flat)."""
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Name the index type of a FAISS index (one of INDEX_TYPES)."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def _nlist_for(n: int, nlist: int) -> int:
+    # FAISS wants ~39 training points per centroid
+    capped = max(1, min(nlist, n // 39))
+    if capped != nlist:
+        print(f"[index_builder] nlist {nlist} too large for {n} vectors; using {capped}")
+    return capped
+
+
+def build_index(vectors: np.ndarray, index_type: str | None = None) -> faiss.Index:
+    """Build (and train, if needed) an L2 index of the given type over vectors."""
+    settings = get_settings()
+    index_type = index_type or settings.index_type
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(d)
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFFlat(quantizer, d, _nlist_for(n, settings.ivf_nlist))
+    elif index_type == "ivf_pq":
+        if d % settings.pq_m:
+            raise ValueError(f"pq_m={settings.pq_m} must divide the vector dimension {d}")
+        if n < 2**settings.pq_nbits:
+            raise ValueError(f"IVF-PQ with pq_nbits={settings.pq_nbits} needs at least {2**settings.pq_nbits} vectors (have {n})")
+        quantizer = faiss.IndexFlatL2(d)
+        index = faiss.IndexIVFPQ(quantizer, d, _nlist_for(n, settings.ivf_nlist), settings.pq_m, settings.pq_nbits)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, settings.hnsw_m)
+        index.hnsw.efConstruction = settings.hnsw_ef_construction
+    else:
+        raise ValueError(f"Unknown index type '{index_type}' (expected one of {INDEX_TYPES})")
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    apply_search_params(index)
+    return index
+
+
+def apply_search_params(index: faiss.Index) -> None:
+    """Set query-time parameters (nprobe / efSearch) from settings."""
+    settings = get_settings()
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(settings.ivf_nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = settings.hnsw_ef_search
+
+
+def evaluate(
+    exact: faiss.Index,
+    candidate: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+) -> dict[str, float]:
+    """Recall@k of candidate vs. the exact index, and per-query latency."""
+    _, truth = exact.search(queries, k)
+
+    latencies = []
+    hits = 0
+    for i, q in enumerate(queries):
+        started = time.perf_counter()
+        _, found = candidate.search(q.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(set(found[0]) & set(truth[i]))
+
+    lat = np.array(latencies)
+    return {
+        "recall_at_k": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "mean_ms": float(lat.mean()),
+        "size_mb": faiss.serialize_index(candidate).nbytes / 1e6,
+    }
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build approximate FAISS indexes and report recall vs. latency")
+    parser.add_argument(
+        "--store-path",
+        type=Path,
+        default=Path(settings.vector_store_path),
+        help="Store root (the version named by CURRENT is used)",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=[*INDEX_TYPES, "all"],
+        default=settings.index_type,
+        help="Index type to build (\"all\" compares every type)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors")
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Publish the live store as a new version with the built index type",
+    )
+    args = parser.parse_args()
+
+    # Imported here: the store module builds its indexes with this one
+    from backend.rag.store import rebuild_index, resolve_store_dir
+
+    store_dir = resolve_store_dir(args.store_path)
+    index_path = store_dir / "index.faiss"
+    if not index_path.exists():
+        raise SystemExit(f"No index.faiss in {store_dir} (is the vector store built?)")
+    index = faiss.read_index(str(index_path))
+    vectors = read_vectors(store_dir, index.d)
+    if vectors is None:
+        if index_type_of(index) != "flat":
+            raise SystemExit(f"No {VECTORS_FILENAME} in {store_dir} and the index is not flat")
+        vectors = reconstruct_vectors(index)
+
+    exact = build_index(vectors, "flat")
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[sample]
+    k = min(args.k, len(vectors))
+
+    types = INDEX_TYPES if args.index_type == "all" else (args.index_type,)
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, k={k}")
+    print(f"{'type':<10} {'build_s':>8} {'recall@k':>9} {'p50_ms':>8} {'p95_ms':>8} {'size_mb':>8}")
+    built = None
+    for index_type in types:
+        started = time.perf_counter()
+        try:
+            built = build_index(vectors, index_type)
+        except ValueError as e:
+            print(f"{index_type:<10} skipped: {e}")
+            continue
+        build_s = time.perf_counter() - started
+        r = evaluate(exact, built, queries, k)
+        print(
+            f"{index_type:<10} {build_s:>8.2f} {r['recall_at_k']:>9.3f} "
+            f"{r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['size_mb']:>8.1f}"
+        )
+
+    if args.write:
+        if len(types) != 1 or built is None:
+            raise SystemExit("--write needs a single, successfully built --index-type")
+        rebuild_index(args.store_path, types[0])
+        print(f"✅ Published the store with a {types[0]} index (set INDEX_TYPE={types[0]} to keep it on ingest)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 """HTML ingestion with trafilatura."""
 
 import argparse
+import asyncio
 from pathlib import Path
 from urllib.parse import urlparse
 
 import httpx
 import trafilatura
 
+from backend.rag.crawler import Crawler
+from backend.rag.extract import Extractor
+from backend.rag.fetch_cache import FetchCache
+from backend.rag.ingest_pipeline import IngestItem, IngestPipeline, IngestSummary
 from backend.rag.splitter import split_with_attribution
-from backend.rag.store import add_to_store
 from backend.utils.hashing import hash_content
 
 # Curated seed sources - public interviews, essays, transcripts
@@ -35,24 +39,38 @@ SEED_URLS = [
 ]
 
 
+# Bump when extraction output changes (trafilatura options, post-processing)
+# so the fetch cache's extraction tier is not reused
+EXTRACTOR_VERSION = f"trafilatura-{trafilatura.__version__}/precision/1"
+
+
+# fetch_html's caches, one per directory (opened once, not per URL)
+_fetch_caches: dict[Path, FetchCache] = {}
+
+
+def _fetch_cache(cache_dir: Path) -> FetchCache:
+    cache = _fetch_caches.get(cache_dir)
+    if cache is None:
+        cache = _fetch_caches[cache_dir] = FetchCache(cache_dir)
+    return cache
+
+
 def fetch_html(url: str, cache_dir: Path | None = None) -> str:
     """Fetch HTML from URL with optional caching."""
-    cache_file = None
-    if cache_dir:
-        cache_file = cache_dir / f"{hash_content(url)}.html"
-        if cache_file.exists():
-            print(f"Using cached: {url}")
-            return cache_file.read_text(encoding="utf-8")
+    cache = _fetch_cache(cache_dir) if cache_dir else None
+    entry = cache.lookup(url) if cache else None
+    html = cache.read(entry) if entry else None
+    if html is not None:
+        print(f"Using cached: {url}")
+        return html
 
     print(f"Fetching: {url}")
     response = httpx.get(url, follow_redirects=True, timeout=30)
     response.raise_for_status()
 
-    html = response.text
-    if cache_file:
-        cache_file.write_text(html, encoding="utf-8")
-
-    return html
+    if cache:
+        cache.store(url, response.content, response.status_code, response.headers, response.encoding)
+    return response.text
 
 
 def extract_text_from_html(html: str, url: str = "") -> tuple[str, dict]:
@@ -63,21 +81,23 @@ def extract_text_from_html(html: str, url: str = "") -> tuple[str, dict]:
         include_tables=False,
         favor_precision=True,
     )
+    return text or "", page_metadata(url)
+
 
+def page_metadata(url: str) -> dict:
+    """Citation metadata derived from a page's URL."""
     # Extract title for better citations
     parsed = urlparse(url)
     domain = parsed.netloc.replace("www.", "")
     path_title = parsed.path.strip("/").split("/")[-1].replace("-", " ").title()
 
-    metadata = {
+    return {
         "url": url,
         "source": url,
         "title": path_title or domain,
         "domain": domain,
     }
 
-    return text or "", metadata
-
 
 def ingest_html(
     url: str,
@@ -86,7 +106,11 @@ def ingest_html(
     """Ingest a single HTML page."""
     html = fetch_html(url, cache_dir)
     text, metadata = extract_text_from_html(html, url)
+    return chunks_from_text(text, metadata, url)
+
 
+def chunks_from_text(text: str, metadata: dict, url: str) -> list[dict]:
+    """Split an already-extracted page."""
     # Skip if content too short (likely error page or boilerplate)
     if not text or len(text) < 400:
         print(f"⚠️  No meaningful content extracted from {url}")
@@ -103,34 +127,113 @@ def ingest_html(
     return chunks
 
 
-def ingest_urls_from_file(
-    urls_file: Path,
+async def _ingest_urls(
+    urls: list[str],
     cache_dir: Path,
     output_dir: Path,
-) -> None:
-    """Ingest URLs from a seed file."""
+    revalidate: bool,
+    resume: bool,
+    purge: bool,
+) -> IngestSummary:
+    async with Crawler(cache_dir, revalidate=revalidate) as crawler:
+        with Extractor() as extractor:
+
+            cache = crawler.cache
+
+            async def fetch(item: IngestItem) -> IngestItem:
+                result = await crawler.fetch(item.source)
+                if result.html is None:
+                    raise RuntimeError(result.error or "no content")
+                item.data = (result.html, result.body_hash)
+                return item
+
+            async def extract(item: IngestItem) -> IngestItem:
+                html, body_hash = item.data
+                cached = None
+                if cache:
+                    cached = await asyncio.to_thread(cache.get_extraction, body_hash, EXTRACTOR_VERSION)
+                if cached is not None:
+                    text, metadata = cached
+                    # URL-derived fields follow the URL (the same body may live at several)
+                    item.data = (text, {**metadata, **page_metadata(item.source)})
+                else:
+                    item.data = await extractor.html(html, item.source)
+                    if item.data is None:
+                        raise RuntimeError("extraction failed")
+                    if cache:
+                        await asyncio.to_thread(cache.put_extraction, body_hash, EXTRACTOR_VERSION, *item.data)
+                item.content_hash = hash_content(item.data[0])
+                return item
+
+            def split(item: IngestItem) -> IngestItem:
+                item.chunks = chunks_from_text(*item.data, item.source)
+                item.data = None
+                return item
+
+            pipeline = IngestPipeline(
+                output_dir,
+                "html",
+                extract,
+                split,
+                fetch=fetch,
+                fetch_workers=crawler.max_concurrency,
+                extract_workers=extractor.workers,
+                resume=resume,
+                purge=purge,
+            )
+            crawler.begin(len(urls))
+            summary = await pipeline.run([IngestItem(url) for url in urls])
+            crawler.end()
+            print(f"[extract] HTML: {extractor.stats.summary()}")
+            if cache:
+                print(f"[fetch_cache] {cache.summary()}")
+            return summary
+
+
+def ingest_urls(
+    urls: list[str],
+    cache_dir: Path,
+    output_dir: Path,
+    revalidate: bool = True,
+    resume: bool = False,
+    purge: bool = True,
+) -> IngestSummary:
+    """Stream URLs through fetch (``backend.rag.crawler``) → extract
+    (``backend.rag.extract``) → split → embed → index, flushing in batches
+    (``backend.rag.ingest_pipeline``). Pages whose extracted text is
+    unchanged since the last run are skipped; URLs no longer listed are
+    purged from the store unless ``purge`` is False."""
+    summary = asyncio.run(_ingest_urls(urls, cache_dir, output_dir, revalidate, resume, purge))
+    if summary.failed:
+        print(f"⚠️  HTML ingestion finished with {summary.failed} failed URLs")
+    elif summary.chunks or summary.unchanged or summary.purged:
+        print("✅ HTML ingestion complete")
+    else:
+        print("⚠️  No chunks generated from any URL")
+    return summary
+
+
+def read_urls_file(urls_file: Path) -> list[str]:
+    """URLs from a seed file (one per line, # comments)."""
     urls = []
     with open(urls_file) as f:
         for line in f:
             line = line.strip()
             if line and not line.startswith("#"):
                 urls.append(line)
+    return urls
 
-    cache_dir.mkdir(parents=True, exist_ok=True)
-
-    all_chunks = []
-    for url in urls:
-        try:
-            chunks = ingest_html(url, cache_dir)
-            all_chunks.extend(chunks)
-        except Exception as e:
-            print(f"❌ Error ingesting {url}: {e}")
 
-    # Add to vector store
-    if all_chunks:
-        print(f"Adding {len(all_chunks)} total chunks to store...")
-        add_to_store(all_chunks, output_dir)
-        print("✅ HTML ingestion complete")
+def ingest_urls_from_file(
+    urls_file: Path,
+    cache_dir: Path,
+    output_dir: Path,
+    revalidate: bool = True,
+    resume: bool = False,
+    purge: bool = True,
+) -> IngestSummary:
+    """Ingest URLs from a seed file."""
+    return ingest_urls(read_urls_file(urls_file), cache_dir, output_dir, revalidate, resume, purge)
 
 
 def main():
@@ -152,30 +255,32 @@ def main():
         default=Path("storage/vector_store"),
         help="Output directory for vector store",
     )
+    parser.add_argument(
+        "--no-revalidate",
+        action="store_true",
+        help="Use cached pages as-is instead of sending conditional GETs",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip sources an interrupted run already flushed to the store",
+    )
+    parser.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="Keep previously ingested URLs that are no longer listed",
+    )
     args = parser.parse_args()
+    options = (not args.no_revalidate, args.resume, not args.keep_missing)
 
     # Use seed URLs if no file provided
     if args.urls_file and args.urls_file.exists():
-        ingest_urls_from_file(args.urls_file, args.cache_dir, args.output_dir)
+        summary = ingest_urls_from_file(args.urls_file, args.cache_dir, args.output_dir, *options)
     else:
         print(f"Using {len(SEED_URLS)} curated seed URLs...")
-        cache_dir = args.cache_dir
-        cache_dir.mkdir(parents=True, exist_ok=True)
-
-        all_chunks = []
-        for url in SEED_URLS:
-            try:
-                chunks = ingest_html(url, cache_dir)
-                all_chunks.extend(chunks)
-            except Exception as e:
-                print(f"❌ Error ingesting {url}: {e}")
-
-        if all_chunks:
-            print(f"Adding {len(all_chunks)} total chunks to store...")
-            add_to_store(all_chunks, args.output_dir)
-            print("✅ HTML ingestion complete")
-        else:
-            print("⚠️  No chunks generated from any URL")
+        summary = ingest_urls(SEED_URLS, args.cache_dir, args.output_dir, *options)
+    if summary.failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -1,21 +1,21 @@
 """PDF ingestion with PyPDF."""
 
 import argparse
+import asyncio
 from pathlib import Path
 
 from pypdf import PdfReader
 
+from backend.rag.extract import Extractor
+from backend.rag.ingest_pipeline import IngestItem, IngestPipeline, IngestSummary
 from backend.rag.splitter import split_with_attribution
-from backend.rag.store import add_to_store
+from backend.utils.hashing import hash_file
 
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
     """Extract text from PDF file."""
     reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n\n"
-    return text
+    return "".join(f"{page.extract_text()}\n\n" for page in reader.pages)
 
 
 def ingest_pdf(
@@ -23,11 +23,15 @@ def ingest_pdf(
     source_name: str | None = None,
 ) -> list[dict]:
     """Ingest a single PDF file."""
-    if source_name is None:
-        source_name = pdf_path.stem
-
     print(f"Ingesting PDF: {pdf_path}")
     text = extract_text_from_pdf(pdf_path)
+    return chunks_from_text(text, pdf_path, source_name)
+
+
+def chunks_from_text(text: str, pdf_path: Path, source_name: str | None = None) -> list[dict]:
+    """Split an already-extracted PDF's text."""
+    if source_name is None:
+        source_name = pdf_path.stem
 
     # Split into chunks with attribution
     chunks = split_with_attribution(
@@ -40,31 +44,77 @@ def ingest_pdf(
     return chunks
 
 
+async def _ingest_pdfs(pdf_files: list[Path], output_dir: Path, resume: bool, purge: bool) -> IngestSummary:
+    with Extractor() as extractor:
+
+        async def extract(item: IngestItem) -> IngestItem:
+            item.data = await extractor.pdf(Path(item.source))
+            if item.data is None:
+                raise RuntimeError("extraction failed")
+            return item
+
+        def split(item: IngestItem) -> IngestItem:
+            print(f"Ingesting PDF: {item.source}")
+            item.chunks = chunks_from_text(item.data, Path(item.source))
+            item.data = None
+            return item
+
+        pipeline = IngestPipeline(
+            output_dir,
+            "pdf",
+            extract,
+            split,
+            # Page ranges already spread each PDF over the pool
+            extract_workers=2,
+            resume=resume,
+            purge=purge,
+        )
+        # Hash the file up front so unchanged PDFs skip extraction entirely
+        items = [IngestItem(str(path), content_hash=hash_file(str(path))) for path in pdf_files]
+        summary = await pipeline.run(items)
+        print(f"[extract] PDF: {extractor.stats.summary()}")
+        return summary
+
+
 def ingest_pdf_directory(
     input_dir: Path,
     output_dir: Path,
-) -> None:
-    """Ingest all PDFs in a directory."""
+    resume: bool = False,
+    purge: bool = True,
+) -> IngestSummary:
+    """Ingest all PDFs in a directory through the streaming pipeline
+    (``backend.rag.ingest_pipeline``), extracting on a process pool.
+
+    Unchanged files are skipped; PDFs removed from the directory are purged
+    from the store unless ``purge`` is False."""
     pdf_files = list(input_dir.glob("*.pdf"))
-
-    all_chunks = []
-    for pdf_file in pdf_files:
-        chunks = ingest_pdf(pdf_file)
-        all_chunks.extend(chunks)
-
-    # Add to vector store
-    print(f"Adding {len(all_chunks)} total chunks to store...")
-    add_to_store(all_chunks, output_dir)
-    print("✅ PDF ingestion complete")
+    summary = asyncio.run(_ingest_pdfs(pdf_files, output_dir, resume, purge))
+    if summary.failed:
+        print(f"⚠️  PDF ingestion finished with {summary.failed} failed PDFs")
+    else:
+        print("✅ PDF ingestion complete")
+    return summary
 
 
 def main():
     parser = argparse.ArgumentParser(description="Ingest PDF documents")
     parser.add_argument("--input-dir", type=Path, required=True)
     parser.add_argument("--output-dir", type=Path, required=True)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip PDFs an interrupted run already flushed to the store",
+    )
+    parser.add_argument(
+        "--keep-missing",
+        action="store_true",
+        help="Keep previously ingested PDFs that are no longer in the directory",
+    )
     args = parser.parse_args()
 
-    ingest_pdf_directory(args.input_dir, args.output_dir)
+    summary = ingest_pdf_directory(args.input_dir, args.output_dir, args.resume, not args.keep_missing)
+    if summary.failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,431 @@
+"""Streaming ingestion pipeline: fetch → extract → split → dedup → embed → index.
+
+Stages are connected by bounded asyncio queues (``ingest_queue_size``), so
+at most a few documents per stage are in memory at once and a slow stage
+pushes back on the ones before it. Each stage runs its own number of
+workers. The index stage buffers embedded chunks and flushes them every
+``ingest_flush_chunks`` chunks to an unpublished staging version
+(``backend.rag.store.StagedVersion``); after each flush the sources it
+covered are written to a checkpoint file, so ``resume=True`` reopens the
+staging version and skips them after an interrupted run. The staged
+sources (and purges) are published as one new store version when the run
+finishes, so servers never hot-swap onto a half-ingested store.
+
+Items a stage fails on are counted and reported in the run's
+``IngestSummary``; the ingesters exit non-zero when any failed.
+
+Re-runs are incremental: each item carries a content hash, and items whose
+hash (combined with the chunking settings, so a chunk-size change re-splits
+everything) matches the store's source manifest are skipped at the next
+stage.
+Changed sources replace their old chunks; sources of this ingester that
+are no longer listed are purged (``purge=False`` keeps them).
+
+With ``dedup_enabled``, a single dedup worker drops chunks that
+near-duplicate one already seen (in this run or in the store) before they
+are embedded; the kept chunk lists the other sources as ``alt_sources``.
+Before publishing, sources whose dropped chunks relied on a survivor that
+won't be in the new version (its source changed or was purged) are
+re-ingested without dedup; ones this run can't re-ingest lose their
+manifest hash so their ingester re-ingests them next time.
+
+The ingesters supply the source-specific stages (see ``ingest_html`` and
+``ingest_pdf``); embedding and indexing are shared.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.rag.dedup import NearDuplicateIndex
+from backend.rag.store import SourceUpdate, StagedVersion, embed_chunks, read_sources, resolve_store_dir
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+
+CHECKPOINT_FILENAME = "ingest_checkpoint.{name}.json"
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+@dataclass
+class IngestItem:
+    """One source document moving through the pipeline."""
+
+    source: str  # URL or file path; the checkpoint and manifest key
+    data: Any = None  # stage-specific payload (html, extracted text, ...)
+    content_hash: str | None = None  # set by the ingester once known
+    chunks: list[dict] = field(default_factory=list)
+    vectors: np.ndarray | None = None
+    dedup_survivors: dict[str, str] = field(default_factory=dict)  # see SourceUpdate
+    alt_source: str | None = None
+
+
+@dataclass
+class StageMetrics:
+    """Throughput and backpressure counters for one stage."""
+
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    dropped: int = 0
+    failed: int = 0  # the stage raised; the item is not indexed
+    unchanged: int = 0  # skipped: content hash matches the store's manifest
+    busy_s: float = 0.0
+    starved_s: float = 0.0  # waiting on an empty input queue
+    blocked_s: float = 0.0  # waiting on a full output queue (backpressure)
+    max_depth: int = 0  # deepest input queue seen
+
+    def line(self, elapsed: float) -> str:
+        rate = self.items_out / elapsed if elapsed else 0.0
+        return (
+            f"{self.name:<8} x{self.workers:<3} in={self.items_in:<6} out={self.items_out:<6} "
+            f"dropped={self.dropped:<4} failed={self.failed:<4} unchanged={self.unchanged:<5} "
+            f"{rate:>7.1f}/s busy={self.busy_s:>7.1f}s starved={self.starved_s:>7.1f}s blocked={self.blocked_s:>7.1f}s max_q={self.max_depth}"
+        )
+
+
+@dataclass
+class IngestSummary:
+    """Outcome of one pipeline run."""
+
+    chunks: int = 0  # chunks indexed
+    sources_updated: int = 0
+    unchanged: int = 0  # skipped: content hash matches the store's manifest
+    failed: int = 0  # items a stage raised on (not indexed)
+    purged: int = 0  # sources no longer listed, removed from the store
+
+
+class Checkpoint:
+    """Sources an interrupted run already flushed to its staging version."""
+
+    def __init__(self, path: Path, resume: bool):
+        self.path = path
+        self.done: set[str] = set()
+        self.staging: str | None = None
+        if path.exists():
+            state = json.loads(path.read_text(encoding="utf-8"))
+            if resume:
+                self.done = set(state.get("sources", []))
+                self.staging = state.get("staging")
+            else:
+                path.unlink()
+                if state.get("staging"):
+                    # Abandoned by an interrupted run that isn't being resumed
+                    StagedVersion.remove(path.parent, state["staging"])
+
+    def mark(self, sources: list[str]) -> None:
+        self.done.update(sources)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"staging": self.staging, "sources": sorted(self.done)}), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+Stage = Callable[[IngestItem], Awaitable[IngestItem | None]]
+
+
+class IngestPipeline:
+    """Run items through fetch/extract/split (supplied) and embed/index (shared).
+
+    ``fetch`` and ``extract`` are async callables; ``split`` is a plain
+    function run in a thread. A stage raises when it fails on an item (e.g.
+    a failed download), so the item is counted as failed; returning None
+    drops it on purpose. ``fetch`` may be None when items need no I/O.
+    """
+
+    def __init__(
+        self,
+        store_path: Path,
+        name: str,
+        extract: Stage,
+        split: Callable[[IngestItem], IngestItem | None],
+        fetch: Stage | None = None,
+        fetch_workers: int | None = None,
+        extract_workers: int | None = None,
+        resume: bool = False,
+        purge: bool = True,
+    ):
+        settings = get_settings()
+        self.store_path = store_path
+        self.name = name
+        self.queue_size = settings.ingest_queue_size
+        self.flush_chunks = settings.ingest_flush_chunks
+        self.progress_interval_s = settings.ingest_progress_interval_s
+        self.resume = resume
+        self.purge = purge
+        self._known: dict[str, str] = {}
+        self._manifest: dict[str, dict] = {}
+        self._stale: list[str] = []
+        self._force: set[str] = set()  # re-ingested in full, whatever their hash
+        self._dedup = NearDuplicateIndex() if settings.dedup_enabled else None
+        self._dimension: int | None = None
+        self._split_config = f"{settings.chunk_size}/{settings.chunk_overlap}"
+
+        async def _split(item: IngestItem) -> IngestItem | None:
+            return await asyncio.to_thread(split, item)
+
+        stages: list[tuple[str, Stage, int]] = []
+        if fetch is not None:
+            stages.append(("fetch", fetch, fetch_workers or settings.crawl_max_concurrency))
+        stages.append(("extract", extract, extract_workers or 1))
+        stages.append(("split", _split, settings.ingest_split_concurrency))
+        if self._dedup is not None:
+            # One worker: the index is shared state and "first" must mean something
+            stages.append(("dedup", self._dedup_chunks, 1))
+        stages.append(("embed", self._embed, settings.ingest_embed_concurrency))
+        self.stages = stages
+        self.metrics = [StageMetrics(name, workers) for name, _, workers in stages]
+        self.metrics.append(StageMetrics("index", 1))
+        self.chunks_indexed = 0
+        self.sources_updated = 0
+        self.flushes = 0
+        self._staged: StagedVersion | None = None
+
+    def _source_hash(self, item: IngestItem) -> str:
+        """Manifest hash: the content hash under the current chunking settings."""
+        if item.content_hash is None:
+            return hash_content("".join(chunk["content"] for chunk in item.chunks))
+        return hash_content(f"{item.content_hash}\n{self._split_config}")
+
+    async def _dedup_chunks(self, item: IngestItem) -> IngestItem:
+        if item.source in self._force or not item.chunks:
+            return item
+        item.alt_source = item.chunks[0]["source"]
+        item.chunks, item.dedup_survivors = await asyncio.to_thread(self._dedup.filter, item.source, item.chunks)
+        return item
+
+    async def _embed(self, item: IngestItem) -> IngestItem:
+        if item.chunks:
+            item.vectors = await asyncio.to_thread(embed_chunks, item.chunks)
+            self._dimension = item.vectors.shape[1]
+        return item
+
+    async def _worker(self, fn: Stage, inq: asyncio.Queue, outq: asyncio.Queue, metrics: StageMetrics) -> None:
+        while True:
+            metrics.max_depth = max(metrics.max_depth, inq.qsize())
+            started = time.perf_counter()
+            item = await inq.get()
+            metrics.starved_s += time.perf_counter() - started
+            if item is _DONE:
+                # Let sibling workers see the marker too
+                await inq.put(_DONE)
+                return
+            metrics.items_in += 1
+            if (
+                item.content_hash is not None
+                and item.source not in self._force
+                and self._known.get(item.source) == self._source_hash(item)
+            ):
+                metrics.unchanged += 1
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = await fn(item)
+            except Exception as e:
+                print(f"❌ {metrics.name} failed for {item.source}: {e}")
+                metrics.failed += 1
+                metrics.busy_s += time.perf_counter() - started
+                continue
+            metrics.busy_s += time.perf_counter() - started
+            if result is None:
+                metrics.dropped += 1
+                continue
+
+            started = time.perf_counter()
+            await outq.put(result)
+            metrics.blocked_s += time.perf_counter() - started
+            metrics.items_out += 1
+
+    async def _stage(self, fn: Stage, workers: int, inq, outq, metrics: StageMetrics) -> None:
+        await asyncio.gather(*(self._worker(fn, inq, outq, metrics) for _ in range(workers)))
+        await outq.put(_DONE)
+
+    async def _index(self, inq: asyncio.Queue, checkpoint: Checkpoint, metrics: StageMetrics) -> None:
+        """Single writer: buffer embedded items, flush in batches, checkpoint."""
+        buffer: list[IngestItem] = []
+        buffered = 0
+        while True:
+            metrics.max_depth = max(metrics.max_depth, inq.qsize())
+            started = time.perf_counter()
+            item = await inq.get()
+            metrics.starved_s += time.perf_counter() - started
+            if item is not _DONE:
+                metrics.items_in += 1
+                buffer.append(item)
+                buffered += len(item.chunks)
+            if buffer and (item is _DONE or buffered >= self.flush_chunks):
+                started = time.perf_counter()
+                await self._flush(buffer, checkpoint)
+                metrics.busy_s += time.perf_counter() - started
+                metrics.items_out += len(buffer)
+                buffer, buffered = [], 0
+            if item is _DONE:
+                return
+
+    async def _flush(self, items: list[IngestItem], checkpoint: Checkpoint) -> None:
+        updates = [
+            SourceUpdate(
+                key=item.source,
+                kind=self.name,
+                content_hash=self._source_hash(item),
+                chunks=item.chunks,
+                vectors=item.vectors,
+                dedup_survivors=item.dedup_survivors,
+                alt_source=item.alt_source,
+            )
+            for item in items
+        ]
+        chunks = sum(len(item.chunks) for item in items)
+        print(f"[pipeline] Staging {chunks} chunks from {len(items)} sources...")
+        await asyncio.to_thread(self._staged.add, updates)
+        self.chunks_indexed += chunks
+        self.sources_updated += len(items)
+        self.flushes += 1
+        checkpoint.mark([item.source for item in items])
+
+    async def _report(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval_s)
+            self._print_metrics(started)
+
+    def _print_metrics(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        unchanged = sum(metrics.unchanged for metrics in self.metrics)
+        print(
+            f"[pipeline] {self.name}: {elapsed:.1f}s, {self.sources_updated} sources updated "
+            f"({self.chunks_indexed} chunks), {unchanged} unchanged, {len(self._stale)} to purge"
+        )
+        for metrics in self.metrics:
+            print(f"[pipeline]   {metrics.line(elapsed)}")
+        if self._dedup is not None:
+            print(f"[pipeline]   dedup: {self._dedup.stats.summary(self._dimension)}")
+
+    def _broken(self, staged: dict[str, dict]) -> list[str]:
+        """Sources whose dropped near-duplicates rely on chunks the published version won't have."""
+        replaced = set(staged) | set(self._stale)
+        manifest = {key: entry for key, entry in self._manifest.items() if key not in replaced}
+        manifest.update(staged)
+        chunk_ids = {cid for entry in manifest.values() for cid in entry["chunk_ids"]}
+        # Survivors of untracked sources (stores older than the manifest) stay unless replaced
+        return sorted(
+            key
+            for key, entry in manifest.items()
+            if any(
+                survivor not in chunk_ids and (source in manifest or source in replaced)
+                for survivor, source in entry.get("dedup_survivors", {}).items()
+            )
+        )
+
+    async def _pass(self, items: list[IngestItem], checkpoint: Checkpoint) -> None:
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        tasks = [
+            asyncio.create_task(self._stage(fn, workers, queues[i], queues[i + 1], self.metrics[i]))
+            for i, (_, fn, workers) in enumerate(self.stages)
+        ]
+        tasks.append(asyncio.create_task(self._index(queues[-1], checkpoint, self.metrics[-1])))
+        try:
+            for item in items:
+                await queues[0].put(item)
+            await queues[0].put(_DONE)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _summary(self) -> IngestSummary:
+        return IngestSummary(
+            chunks=self.chunks_indexed,
+            sources_updated=self.sources_updated,
+            unchanged=sum(metrics.unchanged for metrics in self.metrics),
+            failed=sum(metrics.failed for metrics in self.metrics),
+            purged=len(self._stale),
+        )
+
+    async def run(self, items: list[IngestItem]) -> IngestSummary:
+        """Run every item through the pipeline, then publish what was staged as one version."""
+        self.store_path.mkdir(parents=True, exist_ok=True)
+        checkpoint = Checkpoint(self.store_path / CHECKPOINT_FILENAME.format(name=self.name), self.resume)
+        if checkpoint.staging and StagedVersion.exists(self.store_path, checkpoint.staging):
+            self._staged = StagedVersion(self.store_path, checkpoint.staging)
+            staged = await asyncio.to_thread(self._staged.sources)
+            self.sources_updated = len(staged)
+            self.chunks_indexed = sum(len(entry["chunk_ids"]) for entry in staged.values())
+        else:
+            # Nothing staged survives (or the staging was already published)
+            checkpoint.done.clear()
+            self._staged = StagedVersion(self.store_path)
+            checkpoint.staging = self._staged.name
+        checkpoint.mark([])
+        # What each source was listed with, for re-ingesting it after the stages consumed it
+        originals = {item.source: (item.data, item.content_hash) for item in items}
+        pending = [item for item in items if item.source not in checkpoint.done]
+        if len(pending) < len(items):
+            print(f"[pipeline] Resuming: {len(items) - len(pending)} sources already staged")
+
+        # Content hashes from the last run of this ingester
+        self._manifest = read_sources(resolve_store_dir(self.store_path))
+        self._known = {
+            key: entry["hash"] for key, entry in self._manifest.items() if entry.get("kind") == self.name
+        }
+        if self.purge:
+            listed = {item.source for item in items}
+            self._stale = sorted(key for key in self._known if key not in listed)
+        if self._dedup is not None:
+            seeded = await asyncio.to_thread(
+                self._dedup.seed, resolve_store_dir(self.store_path), set(self._stale)
+            )
+            if seeded:
+                print(f"[pipeline] Dedup index seeded with {seeded} stored chunks")
+
+        started = time.perf_counter()
+        reporter = asyncio.create_task(self._report(started))
+        try:
+            await self._pass(pending, checkpoint)
+            while True:
+                staged = await asyncio.to_thread(self._staged.sources)
+                broken = self._broken(staged)
+                # Each source is forced at most once: it keeps all its chunks, so relies on nothing
+                retry = [key for key in broken if key in originals and key not in self._force]
+                if not retry:
+                    break
+                print(f"[pipeline] Re-ingesting {len(retry)} sources whose near-duplicate survivors went away...")
+                self._force.update(retry)
+                await self._pass([IngestItem(key, *originals[key]) for key in retry], checkpoint)
+        finally:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+
+        self.sources_updated = len(staged)
+        self.chunks_indexed = sum(len(entry["chunk_ids"]) for entry in staged.values())
+        if broken:
+            print(
+                f"[pipeline] ⚠️  {len(broken)} sources rely on near-duplicate survivors that went away "
+                f"and will be re-ingested by their next run: {', '.join(broken[:5])}"
+                f"{', ...' if len(broken) > 5 else ''}"
+            )
+        if staged or self._stale or broken:
+            print(
+                f"[pipeline] Publishing {len(staged)} updated sources"
+                f"{f', purging {len(self._stale)} deleted sources' if self._stale else ''}..."
+            )
+            await asyncio.to_thread(self._staged.publish, self._stale, broken)
+        else:
+            self._staged.discard()
+        checkpoint.clear()
+        self._print_metrics(started)
+        summary = self._summary()
+        if summary.failed:
+            print(f"[pipeline] ⚠️  {summary.failed} sources failed and were not indexed")
+        return summary
@@ -0,0 +1,163 @@
+"""In-process BM25 lexical index over the vector store's docstore chunks.
+
+Persisted as ``index.bm25.json.gz`` next to ``index.faiss`` so it loads with
+the store instead of being rebuilt on every start.
+"""
+
+import gzip
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+from langchain_community.vectorstores import FAISS
+
+BM25_FILENAME = "index.bm25.json.gz"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from had has have how i if in into is it "
+    "its me my no not of on or our so than that the their them then there these they this "
+    "to was we were what when where which who why will with would you your".split()
+)
+
+# Loaded index, keyed by the store version it was built from
+_lexical_cache: tuple[str | None, "BM25Index"] | None = None
+_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens with stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of docstore ids."""
+
+    def __init__(
+        self,
+        doc_ids: list[str],
+        doc_lens: list[int],
+        postings: dict[str, list[list[int]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.doc_ids = doc_ids
+        self.doc_lens = doc_lens
+        # term -> [[doc index, term frequency], ...]
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self.avgdl = (sum(doc_lens) / len(doc_lens)) if doc_lens else 0.0
+        n = len(doc_ids)
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+
+    @classmethod
+    def build(cls, docs: list[tuple[str, str]]) -> "BM25Index":
+        """Build from (docstore id, text) pairs."""
+        doc_ids: list[str] = []
+        doc_lens: list[int] = []
+        postings: dict[str, list[list[int]]] = {}
+        for idx, (doc_id, text) in enumerate(docs):
+            tokens = tokenize(text)
+            doc_ids.append(doc_id)
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([idx, tf])
+        return cls(doc_ids, doc_lens, postings)
+
+    @classmethod
+    def from_store(cls, store: FAISS) -> "BM25Index":
+        """Build from the chunks in a FAISS store's docstore (in index order)."""
+        docs = []
+        for i in range(len(store.index_to_docstore_id)):
+            doc_id = store.index_to_docstore_id[i]
+            doc = store.docstore.search(doc_id)
+            if hasattr(doc, "page_content"):
+                docs.append((doc_id, doc.page_content))
+        return cls.build(docs)
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Return the top-k (docstore id, BM25 score) pairs."""
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for idx, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[idx] / (self.avgdl or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+        return [(self.doc_ids[idx], score) for idx, score in top]
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lens": self.doc_lens,
+            "postings": self.postings,
+        }
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(
+            payload["doc_ids"],
+            payload["doc_lens"],
+            payload["postings"],
+            k1=payload.get("k1", 1.5),
+            b=payload.get("b", 0.75),
+        )
+
+
+def build_lexical_index(store: FAISS, store_path: Path) -> BM25Index:
+    """Build the BM25 index for a store and persist it next to index.faiss."""
+    index = BM25Index.from_store(store)
+    index.save(store_path / BM25_FILENAME)
+    return index
+
+
+def get_lexical_index(store: FAISS, store_path: Path, version: str | None) -> BM25Index:
+    """Get the BM25 index for the loaded store (loaded from disk, or built once)."""
+    global _lexical_cache
+    with _lock:
+        if _lexical_cache is not None and _lexical_cache[0] == version:
+            return _lexical_cache[1]
+
+        index = None
+        path = store_path / BM25_FILENAME
+        if path.exists():
+            try:
+                index = BM25Index.load(path)
+                if len(index.doc_ids) != len(store.index_to_docstore_id):
+                    print("[lexical] BM25 index is stale; rebuilding")
+                    index = None
+            except Exception as e:
+                print(f"[lexical] Failed to load {path}: {e}")
+        if index is None:
+            index = build_lexical_index(store, store_path)
+
+        _lexical_cache = (version, index)
+        return index
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuse ranked key lists: score(d) = sum over lists of 1 / (k + rank)."""
+    fused: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
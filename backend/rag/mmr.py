@@ -0,0 +1,132 @@
+"""Maximal marginal relevance (MMR) selection over stored chunk vectors.
+
+Overlapping transcript chunks often fill several context slots with nearly
+the same text. MMR picks chunks one at a time, trading relevance against
+similarity to the chunks already picked:
+
+    argmax_i  lambda * relevance_i - (1 - lambda) * max_{j picked} cos(i, j)
+
+Candidate vectors come straight from the store (``vectors.f32``, memory
+mapped, row i = FAISS position i; or reconstructed from the index), never
+re-embedded, and the pairwise similarity matrix is one matrix product.
+Relevance is the cross-encoder score when documents have one, otherwise
+their retrieval rank.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from backend.rag.index_builder import VECTORS_FILENAME
+from backend.rag.store import StoreHandle, acquire_store
+from backend.services.executor import run_in_pool
+from backend.settings import get_settings
+
+# (store version, chunk id -> FAISS position, raw vectors or None)
+_vector_cache: tuple[str, dict[str, int], np.ndarray | None] | None = None
+_lock = threading.Lock()
+
+
+def _store_vectors(handle: StoreHandle) -> tuple[dict[str, int], np.ndarray | None]:
+    """Chunk id -> position map and memory-mapped vectors for a loaded store."""
+    global _vector_cache
+    with _lock:
+        if _vector_cache is not None and _vector_cache[0] == handle.version:
+            return _vector_cache[1], _vector_cache[2]
+
+        store = handle.store
+        positions = {chunk_id: position for position, chunk_id in store.index_to_docstore_id.items()}
+        vectors = None
+        path = handle.path / VECTORS_FILENAME
+        if path.exists() and path.stat().st_size == store.index.ntotal * store.index.d * 4:
+            vectors = np.memmap(path, dtype=np.float32, mode="r", shape=(store.index.ntotal, store.index.d))
+        _vector_cache = (handle.version, positions, vectors)
+        return positions, vectors
+
+
+def candidate_vectors(chunk_ids: list[str | None]) -> np.ndarray | None:
+    """Stored vectors for chunks (one row each), or None if any is unavailable."""
+    if not chunk_ids or any(chunk_id is None for chunk_id in chunk_ids):
+        return None
+    with acquire_store(Path(get_settings().vector_store_path)) as handle:
+        if handle is None:
+            return None
+        positions, vectors = _store_vectors(handle)
+        rows = [positions.get(chunk_id) for chunk_id in chunk_ids]
+        if any(row is None for row in rows):
+            # Chunk from a store version that has since been swapped out
+            return None
+        if vectors is not None:
+            return np.array(vectors[rows], dtype=np.float32)
+        try:
+            return np.stack([handle.store.index.reconstruct(int(row)) for row in rows])
+        except RuntimeError as e:
+            # Index without stored vectors (e.g. IVF without a direct map)
+            print(f"[mmr] Cannot read stored vectors: {e}")
+            return None
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> list[int]:
+    """Indices of ``k`` candidates picked by MMR, in pick order."""
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms > 0, norms, 1.0)
+    similarity = unit @ unit.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+    return selected
+
+
+def _relevance(documents: list[dict]) -> np.ndarray:
+    """Relevance in [0, 1]: min-max scaled rerank scores, else retrieval rank."""
+    n = len(documents)
+    if all("rerank_score" in doc for doc in documents):
+        scores = np.array([doc["rerank_score"] for doc in documents], dtype=np.float32)
+        spread = scores.max() - scores.min()
+        return (scores - scores.min()) / spread if spread > 0 else np.ones(n, dtype=np.float32)
+    # Retrieval scores differ by mode (L2 distance, RRF, BM25); the order doesn't
+    return 1.0 - np.arange(n, dtype=np.float32) / n
+
+
+async def diversify(
+    documents: list[dict],
+    k: int | None = None,
+    lambda_mult: float | None = None,
+) -> list[dict]:
+    """
+    Pick ``k`` relevant but mutually dissimilar documents with MMR.
+
+    ``documents`` are ranked best first (retriever order, or after
+    ``rerank_documents`` annotated them with ``rerank_score``) and need a
+    ``chunk_id``. If stored vectors can't be found for every candidate, the
+    top ``k`` by relevance are returned instead.
+    """
+    settings = get_settings()
+    k = k or settings.rerank_top_k
+    lambda_mult = settings.mmr_lambda if lambda_mult is None else lambda_mult
+    if len(documents) <= 1:
+        return documents[:k]
+
+    relevance = _relevance(documents)
+    # Vector reads can touch disk (memory-mapped file), so keep them off the event loop
+    vectors = await run_in_pool("embed", candidate_vectors, [doc.get("chunk_id") for doc in documents])
+    if vectors is None:
+        order = np.argsort(-relevance, kind="stable")[:k]
+        return [documents[i] for i in order]
+
+    selected = mmr_select(relevance, vectors, k, lambda_mult)
+    return [documents[i] for i in selected]
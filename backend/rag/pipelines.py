@@ -1,62 +1,78 @@
 """End-to-end RAG pipeline."""
 
 
-from backend.rag.context import format_context
+from backend.rag.context import build_context
 from backend.rag.rerank import rerank_documents
 from backend.rag.retriever import retrieve_documents
+from backend.services.executor import run_in_pool
+from backend.services.singleflight import SingleFlight
+from backend.utils.text import normalize_query
 
+# Identical concurrent questions share one retrieve → rerank → assemble run
+_pipeline_flight = SingleFlight("rag_pipeline")
 
-async def rag_pipeline(query: str) -> str:
-    """
-    Complete RAG pipeline: retrieve → rerank → format.
 
-    Returns formatted context string ready for LLM.
-    """
+async def _run_pipeline(query: str) -> dict:
+    """Retrieve → rerank → assemble, returning context, documents and sources."""
     # 1. Retrieve
     documents = await retrieve_documents(query)
 
     if not documents:
-        return "No relevant context found."
+        return {
+            "context": "No relevant context found.",
+            "documents": [],
+            "sources": [],
+            "context_sources": [],
+        }
 
     # 2. Rerank
     reranked = await rerank_documents(query, documents)
 
-    # 3. Format
-    context = format_context(reranked)
+    # 3. Assemble the context within the token budget (tokenizing is CPU work: off the event loop,
+    # on the pool of the reranking it follows)
+    context = await run_in_pool("rerank", build_context, reranked)
 
-    return context
+    return {
+        "context": context["context"],
+        "documents": reranked,
+        "sources": [source["url"] for source in context["sources"]],
+        "context_sources": context["sources"],
+    }
+
+
+async def rag_pipeline(query: str) -> str:
+    """
+    Complete RAG pipeline: retrieve → rerank → assemble context.
+
+    Returns formatted context string ready for LLM.
+    """
+    result = await rag_pipeline_with_sources(query)
+    return result["context"]
 
 
 async def rag_pipeline_with_sources(query: str) -> dict:
     """
     RAG pipeline that returns both context and sources.
 
+    Concurrent calls for the same (normalized) query share one run; each
+    caller gets its own copies of the documents and sources.
+
     Returns:
         {
             "context": formatted context string,
             "documents": list of document dicts,
-            "sources": list of unique source names
+            "sources": list of unique source names used in the context,
+            "context_sources": per source used: title, domain, url,
+                chunk_ids and tokens (see ``build_context``)
         }
     """
-    # 1. Retrieve
-    documents = await retrieve_documents(query)
-
-    if not documents:
-        return {
-            "context": "No relevant context found.",
-            "documents": [],
-            "sources": [],
-        }
-
-    # 2. Rerank
-    reranked = await rerank_documents(query, documents)
-
-    # 3. Format
-    context = format_context(reranked)
-    sources = list(set(doc["source"] for doc in reranked))
-
+    result = await _pipeline_flight.do(normalize_query(query), lambda: _run_pipeline(query))
+    # Coalesced callers each get their own copies: downstream code mutates them in place
     return {
-        "context": context,
-        "documents": reranked,
-        "sources": sources,
+        **result,
+        "documents": [dict(doc) for doc in result["documents"]],
+        "sources": list(result["sources"]),
+        "context_sources": [
+            {**source, "chunk_ids": list(source["chunk_ids"])} for source in result["context_sources"]
+        ],
     }
@@ -0,0 +1,104 @@
+"""Query embedding cache (in-memory LRU with an optional on-disk tier)."""
+
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from backend.deps import get_embeddings
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+from backend.utils.text import normalize_query
+
+# Global LRU of key -> embedding (most recently used at the end)
+_memory_cache: OrderedDict[str, list[float]] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def query_cache_key(query: str, model: str | None = None) -> str:
+    """Cache key from normalized query text plus embedding model."""
+    model = model or get_settings().embedding_model
+    return hash_content(f"{model}\n{normalize_query(query)}")
+
+
+def _disk_path(key: str) -> Path | None:
+    cache_dir = get_settings().query_embedding_cache_dir
+    if not cache_dir:
+        return None
+    return Path(cache_dir) / key[:2] / f"{key}.f32"
+
+
+def _read_disk(key: str) -> list[float] | None:
+    path = _disk_path(key)
+    if path is None or not path.exists():
+        return None
+    try:
+        vec = array("f")
+        vec.frombytes(path.read_bytes())
+        return vec.tolist()
+    except Exception as e:
+        print(f"[query_cache] Failed to read {path}: {e}")
+        return None
+
+
+def _write_disk(key: str, embedding: list[float]) -> None:
+    path = _disk_path(key)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(array("f", embedding).tobytes())
+        tmp.replace(path)
+    except Exception as e:
+        print(f"[query_cache] Failed to write {path}: {e}")
+
+
+def _remember(key: str, embedding: list[float]) -> None:
+    max_size = get_settings().query_embedding_cache_size
+    with _lock:
+        _memory_cache[key] = embedding
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > max_size:
+            _memory_cache.popitem(last=False)
+
+
+def embed_query_cached(query: str) -> list[float]:
+    """
+    Embed a query, reusing cached vectors where possible.
+
+    Lookup order: in-memory LRU → on-disk tier (if configured) → embeddings API.
+    """
+    key = query_cache_key(query)
+
+    with _lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            _memory_cache.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return cached
+
+    cached = _read_disk(key)
+    if cached is not None:
+        _stats["disk_hits"] += 1
+        _remember(key, cached)
+        return cached
+
+    _stats["misses"] += 1
+    embedding = get_embeddings().embed_query(query)
+    _remember(key, embedding)
+    _write_disk(key, embedding)
+    return embedding
+
+
+def query_cache_stats() -> dict:
+    """Return hit/miss counters and current cache size."""
+    with _lock:
+        return {**_stats, "size": len(_memory_cache)}
+
+
+def clear_query_cache() -> None:
+    """Drop all in-memory entries (the disk tier is left untouched)."""
+    with _lock:
+        _memory_cache.clear()
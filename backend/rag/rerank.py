@@ -1,47 +1,99 @@
-"""Cross-encoder reranking with BGE."""
-
-import importlib.util
-
+"""Cross-encoder reranking with BGE.
+
+The model runs through the backend chosen by ``reranker_backend``
+(``backend.rag.rerankers``): FlagEmbedding, a quantized ONNX model, or a
+cascade of the two.
+
+Concurrent requests share cross-encoder calls: their (query, passage)
+pairs go through one micro-batcher (``backend.services.batching``) that
+runs the model on the "rerank" pool. Scores are cached per (query, chunk
+id) (``backend.rag.rerank_cache``), so only unseen pairs reach the model.
+The final ``top_k`` are picked by MMR (``backend.rag.mmr``) when enabled.
+"""
+
+from backend.rag.mmr import diversify
+from backend.rag.rerank_cache import get_rerank_cache
+from backend.rag.rerankers import Reranker, create_reranker, missing_modules, reranker_class
+from backend.services.batching import MicroBatcher
 from backend.settings import get_settings
 
-# Don't import FlagEmbedding at module level - only when actually using it
+# Don't import model packages at module level - only when actually using them
 RERANKER_AVAILABLE = None
 
 # Lazy load reranker
-_reranker = None
+_reranker: Reranker | None = None
+_batcher: MicroBatcher | None = None
 
 
 def _check_reranker_available():
-    """Check if FlagEmbedding is available (cached)."""
+    """Check if the configured backend's packages are available (cached)."""
     global RERANKER_AVAILABLE
     if RERANKER_AVAILABLE is None:
-        RERANKER_AVAILABLE = importlib.util.find_spec("FlagEmbedding") is not None
-        if not RERANKER_AVAILABLE:
+        backend = get_settings().reranker_backend
+        missing = missing_modules(backend)
+        RERANKER_AVAILABLE = not missing
+        if missing:
             print(
-                "⚠️  FlagEmbedding not available. Using simple similarity fallback for reranking."
+                f"⚠️  {', '.join(missing)} not available for the '{backend}' reranker. "
+                "Using simple similarity fallback for reranking."
             )
     return RERANKER_AVAILABLE
 
 
-def get_reranker():
-    """Get or create BGE reranker model (more accurate than MiniLM)."""
+def get_reranker() -> Reranker | None:
+    """Get or create the configured reranker backend."""
     if not _check_reranker_available():
         return None
 
     global _reranker
     if _reranker is None:
-        from FlagEmbedding import FlagReranker
-
-        _reranker = FlagReranker("BAAI/bge-reranker-large", use_fp16=True)
+        _reranker = create_reranker()
     return _reranker
 
 
+def warm_up_reranker() -> bool:
+    """Load the reranker and score a dummy batch so the first request is fast.
+
+    Returns False if the backend's packages are unavailable (similarity
+    fallback is used).
+    """
+    reranker = get_reranker()
+    if reranker is None:
+        return False
+    reranker.score([["warm-up query", "warm-up passage"]] * 4)
+    return True
+
+
+def _score_pairs(pairs: list[list[str]]) -> list[float]:
+    """Score one (already batched) list of pairs in a single model call."""
+    return get_reranker().score(pairs)
+
+
+def get_rerank_batcher() -> MicroBatcher:
+    """The shared cross-encoder batcher."""
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        _batcher = MicroBatcher(
+            "rerank",
+            _score_pairs,
+            max_batch=settings.rerank_batch_max_pairs,
+            max_wait_ms=settings.rerank_batch_max_wait_ms,
+            pool="rerank",
+        )
+    return _batcher
+
+
 async def rerank_documents(
     query: str,
     documents: list[dict],
     top_k: int | None = None,
 ) -> list[dict]:
-    """Rerank documents using BGE cross-encoder (batch processing) or fallback."""
+    """Rerank documents using BGE cross-encoder (batch processing) or fallback.
+
+    With ``mmr_enabled``, the top ``k`` are then chosen by MMR over the
+    stored chunk vectors instead of by score alone.
+    """
     settings = get_settings()
     k = top_k or settings.rerank_top_k
 
@@ -50,25 +102,43 @@ async def rerank_documents(
 
     # Fallback: use existing similarity scores if reranker unavailable
     if not _check_reranker_available():
+        if settings.mmr_enabled:
+            # Documents arrive in retrieval order; diversify that ranking
+            return await diversify(documents, k)
         # Documents already have similarity scores from retriever
         documents.sort(key=lambda x: x.get("score", 0), reverse=True)
         return documents[:k]
 
-    # Prepare query-document pairs
-    pairs = [[query, doc["content"]] for doc in documents]
-
-    # Score with BGE reranker (increased batch size for better throughput)
-    reranker = get_reranker()
-    scores = reranker.compute_score(pairs, batch_size=32)
-
-    # Handle single document case (scores is float, not list)
-    if not isinstance(scores, list):
-        scores = [scores]
+    # Cached scores first (not for backends whose scores depend on the batch)
+    chunk_ids = [doc.get("chunk_id") for doc in documents]
+    cache = None
+    if settings.rerank_cache_enabled and reranker_class().pairwise:
+        cache = get_rerank_cache()
+        scores = cache.lookup(query, chunk_ids)
+    else:
+        scores = [None] * len(documents)
+    missing = [i for i, score in enumerate(scores) if score is None]
+
+    if missing:
+        # Score the rest with the cross-encoder, batched with other in-flight
+        # requests. Model load and scoring are CPU-bound, so they run on the
+        # "rerank" pool.
+        pairs = [[query, documents[i]["content"]] for i in missing]
+        new_scores = await get_rerank_batcher().submit(pairs)
+        for i, score in zip(missing, new_scores):
+            scores[i] = score
+        if cache is not None:
+            cache.put(
+                query,
+                {chunk_ids[i]: score for i, score in zip(missing, new_scores) if chunk_ids[i] is not None},
+            )
 
     # Add scores and sort by relevance
     for doc, score in zip(documents, scores):
-        doc["rerank_score"] = float(score)
+        doc["rerank_score"] = score
 
     documents.sort(key=lambda x: x["rerank_score"], reverse=True)
 
+    if settings.mmr_enabled:
+        return await diversify(documents, k)
     return documents[:k]
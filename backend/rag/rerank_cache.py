@@ -0,0 +1,104 @@
+"""Cross-encoder score cache.
+
+Scores are keyed by (normalized query hash, chunk id): the same popular
+question brings back the same candidate chunks, and a pair's score doesn't
+depend on the rest of the batch. Entries are evicted LRU and the whole
+cache is dropped whenever the loaded vector store version changes.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from backend.rag.store import get_store_version
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+from backend.utils.text import normalize_query
+
+
+def rerank_query_key(query: str) -> str:
+    """Cache key part for a query (hash of its normalized text)."""
+    return hash_content(normalize_query(query))[:32]
+
+
+class RerankCache:
+    """Bounded LRU of cross-encoder scores per (query, chunk)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scores: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._version: str | None = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "full_hits": 0,
+            "partial_hits": 0,
+            "full_misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _check_version(self) -> None:
+        version = get_store_version()
+        if version != self._version:
+            if self._scores:
+                self._stats["invalidations"] += 1
+            self._scores.clear()
+            self._version = version
+
+    def lookup(self, query: str, chunk_ids: list[str | None]) -> list[float | None]:
+        """Cached score per chunk id (None where missing or the id is None)."""
+        key = rerank_query_key(query)
+        scores: list[float | None] = []
+        with self._lock:
+            self._check_version()
+            for chunk_id in chunk_ids:
+                score = self._scores.get((key, chunk_id)) if chunk_id is not None else None
+                if score is not None:
+                    self._scores.move_to_end((key, chunk_id))
+                scores.append(score)
+
+            hits = sum(score is not None for score in scores)
+            self._stats["hits"] += hits
+            self._stats["misses"] += len(scores) - hits
+            if hits == len(scores):
+                self._stats["full_hits"] += 1
+            elif hits:
+                self._stats["partial_hits"] += 1
+            else:
+                self._stats["full_misses"] += 1
+        return scores
+
+    def put(self, query: str, scores: dict[str, float]) -> None:
+        """Cache scores for a query, by chunk id."""
+        key = rerank_query_key(query)
+        with self._lock:
+            self._check_version()
+            for chunk_id, score in scores.items():
+                self._scores[(key, chunk_id)] = score
+                self._scores.move_to_end((key, chunk_id))
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            pairs = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._scores),
+                "hit_rate": round(self._stats["hits"] / pairs, 3) if pairs else 0.0,
+                "store_version": self._version,
+            }
+
+
+@lru_cache
+def get_rerank_cache() -> RerankCache:
+    """Get the process-wide rerank score cache."""
+    return RerankCache(max_entries=get_settings().rerank_cache_size)
@@ -0,0 +1,222 @@
+"""Cross-encoder reranker backends.
+
+``reranker_backend`` picks one:
+
+- "flag": FlagEmbedding's ``FlagReranker`` (``reranker_model``, default
+  bge-reranker-large). Accurate, but ~1s per request on CPU.
+- "onnx": a smaller cross-encoder (``onnx_reranker_model``, bge-reranker-base
+  class) exported to ONNX and dynamically quantized to int8, run with ONNX
+  Runtime. An fp32 export is quantized on first load and cached.
+- "cascade": the ONNX model scores every candidate, and only the top
+  ``cascade_top_n`` per query go to the large model, with passages capped at
+  ``cascade_max_tokens`` tokens.
+
+Every backend scores a flat list of (query, passage) pairs, which may mix
+queries (see the micro-batcher in ``backend.rag.rerank``). Dependencies
+are optional and only imported when a backend loads.
+"""
+
+import importlib.util
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+from backend.settings import get_settings
+
+RERANKER_BACKENDS = ("flag", "onnx", "cascade")
+
+_REQUIRED_MODULES = {
+    "flag": ("FlagEmbedding",),
+    "onnx": ("onnxruntime", "tokenizers"),
+    "cascade": ("FlagEmbedding", "onnxruntime", "tokenizers"),
+}
+
+
+def missing_modules(backend: str) -> list[str]:
+    """Optional packages a backend needs that aren't installed."""
+    if backend not in _REQUIRED_MODULES:
+        raise ValueError(f"Unknown reranker backend '{backend}' (expected one of {RERANKER_BACKENDS})")
+    return [name for name in _REQUIRED_MODULES[backend] if importlib.util.find_spec(name) is None]
+
+
+class Reranker(ABC):
+    """Scores (query, passage) pairs; higher is more relevant."""
+
+    name = "base"
+    # Whether a pair's score is independent of the other pairs in the call
+    # (false scores can't be cached per pair)
+    pairwise = True
+
+    @abstractmethod
+    def score(self, pairs: list[list[str]]) -> list[float]:
+        """One score per pair, in order."""
+
+
+class FlagBackend(Reranker):
+    """BGE cross-encoder through FlagEmbedding."""
+
+    name = "flag"
+
+    def __init__(self, model: str | None = None, use_fp16: bool | None = None, max_tokens: int | None = None):
+        from FlagEmbedding import FlagReranker
+
+        settings = get_settings()
+        self.model_name = model or settings.reranker_model
+        self.max_tokens = max_tokens or settings.reranker_max_tokens
+        use_fp16 = settings.reranker_use_fp16 if use_fp16 is None else use_fp16
+        self.model = FlagReranker(self.model_name, use_fp16=use_fp16)
+
+    def score(self, pairs: list[list[str]], max_tokens: int | None = None) -> list[float]:
+        scores = self.model.compute_score(
+            pairs, batch_size=max(32, len(pairs)), max_length=max_tokens or self.max_tokens
+        )
+        # Handle single pair case (scores is float, not list)
+        if not isinstance(scores, list):
+            scores = [scores]
+        return [float(score) for score in scores]
+
+
+def _onnx_model_path(model: str, filename: str) -> Path:
+    """Local path of the int8 ONNX model, downloading or quantizing it if needed.
+
+    ``model`` is a local directory or a Hugging Face repo holding an ONNX
+    export (plus tokenizer.json). If ``filename`` isn't there but an fp32
+    ``model.onnx`` is, it is dynamically quantized to int8 next to it.
+    """
+    from huggingface_hub import snapshot_download
+
+    root = Path(model)
+    if not root.is_dir():
+        # "*.json" brings tokenizer.json (and the configs) along with the model
+        root = Path(snapshot_download(model, allow_patterns=[filename, "onnx/model.onnx", "*.json", "*.txt"]))
+    target = root / filename
+    if target.exists():
+        return target
+
+    source = next((path for path in (root / "onnx/model.onnx", root / "model.onnx") if path.exists()), None)
+    if source is None:
+        raise FileNotFoundError(f"No {filename} or fp32 model.onnx in {root}")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"[reranker] Quantizing {source} to int8 -> {target}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+    return target
+
+
+class OnnxBackend(Reranker):
+    """int8 ONNX Runtime cross-encoder (CPU)."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model: str | None = None,
+        filename: str | None = None,
+        threads: int | None = None,
+        max_tokens: int | None = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        settings = get_settings()
+        self.model_name = model or settings.onnx_reranker_model
+        path = _onnx_model_path(self.model_name, filename or settings.onnx_reranker_file)
+        candidates = [parent / "tokenizer.json" for parent in (path.parent, path.parent.parent)]
+        tokenizer_file = next((candidate for candidate in candidates if candidate.exists()), None)
+        if tokenizer_file is None:
+            raise FileNotFoundError(f"No tokenizer.json next to {path} (looked for {', '.join(map(str, candidates))})")
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_file))
+        self.tokenizer.enable_truncation(max_length=max_tokens or settings.reranker_max_tokens)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = settings.onnx_reranker_threads if threads is None else threads
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def score(self, pairs: list[list[str]]) -> list[float]:
+        if not pairs:
+            return []
+        encodings = self.tokenizer.encode_batch([(query, passage) for query, passage in pairs])
+        feeds = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        (logits,) = self.session.run(None, feeds)[:1]
+        return [float(score) for score in np.asarray(logits).reshape(len(pairs), -1)[:, 0]]
+
+
+class CascadeBackend(Reranker):
+    """Cheap model on every pair, large model on each query's top N."""
+
+    name = "cascade"
+    # Scores below the shortlist depend on the other candidates
+    pairwise = False
+
+    def __init__(
+        self,
+        cheap: Reranker | None = None,
+        large: FlagBackend | None = None,
+        top_n: int | None = None,
+        max_tokens: int | None = None,
+    ):
+        settings = get_settings()
+        self.cheap = cheap or OnnxBackend()
+        self.large = large or FlagBackend()
+        self.top_n = top_n or settings.cascade_top_n
+        self.max_tokens = max_tokens or settings.cascade_max_tokens
+
+    def score(self, pairs: list[list[str]]) -> list[float]:
+        if not pairs:
+            return []
+        cheap = self.cheap.score(pairs)
+        by_query: dict[str, list[int]] = {}
+        for i, (query, _) in enumerate(pairs):
+            by_query.setdefault(query, []).append(i)
+
+        # One large-model call for every query's shortlist
+        shortlists = {
+            query: sorted(indices, key=lambda i: cheap[i], reverse=True)[: self.top_n]
+            for query, indices in by_query.items()
+        }
+        selected = [i for shortlist in shortlists.values() for i in shortlist]
+        large = dict(zip(selected, self.large.score([pairs[i] for i in selected], max_tokens=self.max_tokens)))
+
+        scores = [0.0] * len(pairs)
+        for query, indices in by_query.items():
+            shortlist = set(shortlists[query])
+            floor = min(large[i] for i in shortlist)
+            rest = sorted((i for i in indices if i not in shortlist), key=lambda i: cheap[i], reverse=True)
+            for i in shortlist:
+                scores[i] = large[i]
+            # Below the cut: keep the cheap model's order, beneath every shortlisted pair
+            for rank, i in enumerate(rest):
+                scores[i] = floor - 1.0 - rank / len(rest)
+        return scores
+
+
+_BACKEND_CLASSES: dict[str, type[Reranker]] = {
+    "flag": FlagBackend,
+    "onnx": OnnxBackend,
+    "cascade": CascadeBackend,
+}
+
+
+def reranker_class(backend: str | None = None) -> type[Reranker]:
+    """Class of the configured (or named) backend, without loading it."""
+    backend = backend or get_settings().reranker_backend
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown reranker backend '{backend}' (expected one of {RERANKER_BACKENDS})")
+    return _BACKEND_CLASSES[backend]
+
+
+def create_reranker(backend: str | None = None) -> Reranker:
+    """Load the configured (or named) backend."""
+    return reranker_class(backend)()
@@ -1,55 +1,170 @@
-"""Dense retrieval with FAISS."""
+"""Dense, lexical (BM25) and hybrid retrieval over the FAISS store."""
 
+import asyncio
 from pathlib import Path
 
-from backend.rag.store import load_store
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from backend.rag.lexical import get_lexical_index, reciprocal_rank_fusion
+from backend.rag.query_cache import embed_query_cached
+from backend.rag.store import StoreHandle, acquire_store
+from backend.services.executor import run_in_pool
+from backend.services.singleflight import SingleFlight
 from backend.settings import get_settings
-from backend.deps import get_embeddings
+from backend.utils.text import normalize_query
 
+RETRIEVAL_MODES = ("dense", "hybrid", "lexical")
 
-async def retrieve_documents(query: str, top_k: int | None = None) -> list[dict]:
-    """
-    Retrieve top-k documents for a query.
+# Identical concurrent searches share one embedding call + FAISS search
+_retrieval_flight = SingleFlight("retrieve")
 
-    Retrieves more documents than needed for downstream reranking.
-    Default: 12 documents retrieved (optimized from 20 for faster performance),
-    then reranker picks best 5.
+
+def _to_dict(store: FAISS, doc, score: float, chunk_id: str) -> dict:
+    result = {
+        "content": doc.page_content,
+        "source": doc.metadata.get("source", "Unknown"),
+        "score": float(score),
+        "metadata": doc.metadata,
+        "chunk_id": chunk_id,  # docstore id, stable across index versions
+    }
+    # Where the chunk sits in its source document (lets context assembly merge neighbours)
+    span = store.docstore.span(chunk_id) if hasattr(store.docstore, "span") else None
+    if span is not None:
+        result["doc_id"], result["start"], result["end"] = span
+    return result
+
+
+def _doc_key(doc: dict) -> str:
+    return f"{doc['source']}\n{doc['content']}"
+
+
+def _dense(store: FAISS, embedding: list[float], k: int) -> list[dict]:
+    """FAISS search by query embedding."""
+    # Same search as FAISS.similarity_search_with_score_by_vector, keeping the docstore ids
+    vector = np.array([embedding], dtype=np.float32)
+    if store._normalize_L2:
+        faiss.normalize_L2(vector)
+    scores, positions = store.index.search(vector, k)
+    documents = []
+    for score, position in zip(scores[0], positions[0]):
+        if position == -1:
+            continue
+        chunk_id = store.index_to_docstore_id[position]
+        doc = store.docstore.search(chunk_id)
+        if hasattr(doc, "page_content"):
+            documents.append(_to_dict(store, doc, score, chunk_id))
+    return documents
+
+
+def _lexical(handle: StoreHandle, query: str, k: int) -> list[dict]:
+    """BM25 search; never calls the embeddings API."""
+    store = handle.store
+    index = get_lexical_index(store, handle.path, handle.version)
+    documents = []
+    for doc_id, score in index.search(query, k):
+        doc = store.docstore.search(doc_id)
+        if hasattr(doc, "page_content"):
+            documents.append(_to_dict(store, doc, score, doc_id))
+    return documents
+
+
+def _search(query: str, k: int, mode: str, embedding: list[float] | None = None) -> list[dict]:
+    """Blocking part of retrieval: load store, then dense/lexical/hybrid search.
+
+    ``embedding`` is the query's embedding, required for dense and hybrid.
     """
     settings = get_settings()
-    # Reduced from 20 to 12 for better performance (still enough for reranking)
-    k = top_k if top_k else 12
+    # Pin the current store version (now cached globally) for this search
+    with acquire_store(Path(settings.vector_store_path)) as handle:
+        if handle is None:
+            print("[retriever] No vector store available after load attempt.")
+            return []
+        return _search_store(handle, query, k, mode, embedding)
 
-    # Load vector store (now cached globally)
-    store = load_store(Path(settings.vector_store_path))
-    if store is None:
-        print("[retriever] No vector store available after load attempt.")
-        return []
 
-    # Basic embedding/index dimension sanity check to surface issues early
+def _search_store(
+    handle: StoreHandle, query: str, k: int, mode: str, embedding: list[float] | None
+) -> list[dict]:
+    if mode == "lexical":
+        return _lexical(handle, query, k)
+
     try:
-        test_vec = get_embeddings().embed_query("dimension-check")
-        index_dim = getattr(store.index, "d", None)
-        if index_dim is not None and len(test_vec) != index_dim:
-            print(f"[retriever] Dimension mismatch: embed={len(test_vec)} index={index_dim}")
+        dense = _dense(handle.store, embedding, k)
     except Exception as e:
-        print(f"[retriever] Embedding dimension check failed: {e}")
+        # e.g. an embedding of the wrong dimension: serve lexical results instead of nothing
+        print(f"[retriever] Dense search failed ({e}); falling back to lexical")
+        return _lexical(handle, query, k)
+
+    if mode == "dense":
+        return dense
+
+    # Hybrid: reciprocal rank fusion of dense and BM25 rankings
+    lexical = _lexical(handle, query, k)
+    by_key = {_doc_key(doc): doc for doc in lexical + dense}
+    fused = reciprocal_rank_fusion(
+        [[_doc_key(doc) for doc in dense], [_doc_key(doc) for doc in lexical]],
+        k=get_settings().rrf_k,
+    )
+    documents = []
+    for key, score in fused[:k]:
+        doc = dict(by_key[key])
+        doc["score"] = score
+        documents.append(doc)
+    return documents
+
 
-    # Search
+async def _retrieve(query: str, k: int, mode: str) -> list[dict]:
+    """Run the search on worker pools; fall back to lexical if embedding fails or is too slow."""
+    if mode == "lexical":
+        return await run_in_pool("lexical", _search, query, k, "lexical")
+
+    # Only the embedding call is timed: a cold store load or the FAISS search isn't the provider's fault
+    timeout = get_settings().embedding_timeout_s
     try:
-        results = store.similarity_search_with_score(query, k=k)
+        # Cached; the dimension check already ran once in load_store
+        embedding = await asyncio.wait_for(run_in_pool("embed", embed_query_cached, query), timeout)
+    except asyncio.TimeoutError:
+        print(f"[retriever] Query embedding exceeded {timeout}s; serving lexical results")
+        return await run_in_pool("lexical", _search, query, k, "lexical")
     except Exception as e:
-        print(f"[retriever] similarity_search_with_score failed: {e}")
-        return []
+        # Embedding provider down: serve lexical results instead of nothing
+        print(f"[retriever] Query embedding failed ({e}); falling back to lexical")
+        return await run_in_pool("lexical", _search, query, k, "lexical")
+    return await run_in_pool("embed", _search, query, k, mode, embedding)
 
-    documents = []
-    for doc, score in results:
-        documents.append(
-            {
-                "content": doc.page_content,
-                "source": doc.metadata.get("source", "Unknown"),
-                "score": float(score),
-                "metadata": doc.metadata,
-            }
-        )
 
-    return documents
+async def retrieve_documents(
+    query: str,
+    top_k: int | None = None,
+    mode: str | None = None,
+) -> list[dict]:
+    """
+    Retrieve top-k documents for a query.
+
+    Retrieves more documents than needed for downstream reranking.
+    Default: 12 documents retrieved (optimized from 20 for faster performance),
+    then reranker picks best 5.
+
+    ``mode`` is "dense", "hybrid" (dense + BM25 with reciprocal rank fusion)
+    or "lexical" (BM25 only, no embedding call); defaults to
+    ``settings.retrieval_mode``. Dense and hybrid fall back to lexical when
+    the embedding call fails or exceeds ``embedding_timeout_s``.
+
+    The embedding call and FAISS search run on the "embed" worker pool so
+    they never block the event loop. Concurrent identical queries are
+    coalesced; each caller gets its own copies of the result dicts since
+    downstream stages annotate them in place.
+    """
+    # Reduced from 20 to 12 for better performance (still enough for reranking)
+    k = top_k if top_k else 12
+    mode = mode or get_settings().retrieval_mode
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}' (expected one of {RETRIEVAL_MODES})")
+
+    documents = await _retrieval_flight.do(
+        (normalize_query(query), k, mode),
+        lambda: _retrieve(query, k, mode),
+    )
+    return [dict(doc) for doc in documents]
@@ -1,10 +1,50 @@
-"""Text splitter with attribution."""
+"""Text splitter with attribution.
 
+Chunks are spans of their source document: besides its text, each chunk
+carries ``doc_id``, ``start`` and ``end`` (character offsets) and a
+reference to the full ``document`` text, so the store can keep one copy of
+each document (and its metadata) and slice chunk text on read instead of
+storing every chunk's text and overlap separately.
+"""
+
+from functools import lru_cache
 from typing import Any
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+
+
+@lru_cache
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
+def document_id(source: str, text: str) -> str:
+    """Stable id for one version of a source document."""
+    return hash_content(f"{source}\n{text}")[:32]
+
+
+def split_spans(text: str) -> list[tuple[int, int]]:
+    """Split text into chunks, returned as [start, end) character offsets into ``text``."""
+    settings = get_settings()
+    spans = []
+    cursor = 0
+    for chunk in _splitter(settings.chunk_size, settings.chunk_overlap).split_text(text):
+        # Chunks are substrings in order; each starts at or after the previous start
+        start = text.find(chunk, cursor)
+        if start < 0:
+            start = text.find(chunk)
+        if start < 0:
+            raise ValueError("Splitter produced a chunk that is not a substring of the text")
+        spans.append((start, start + len(chunk)))
+        cursor = start + 1
+    return spans
 
 
 def split_with_attribution(
@@ -19,22 +59,20 @@ def split_with_attribution(
     - content: The text content
     - source: Source identifier
     - metadata: Additional metadata
+    - doc_id, start, end: The chunk's span in ``document``
+    - document: The full text (shared by all chunks, not copied)
     """
-    settings = get_settings()
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-
-    chunks = splitter.split_text(text)
-
+    doc_id = document_id(source, text)
+    metadata = metadata or {}
     return [
         {
-            "content": chunk,
+            "content": text[start:end],
             "source": source,
-            "metadata": metadata or {},
+            "metadata": metadata,
+            "doc_id": doc_id,
+            "start": start,
+            "end": end,
+            "document": text,
         }
-        for chunk in chunks
+        for start, end in split_spans(text)
     ]
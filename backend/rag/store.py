@@ -1,15 +1,97 @@
-"""FAISS vector store management with caching for performance."""
+"""FAISS vector store management with caching for performance.
 
+Stores are versioned: each write goes to ``<root>/versions/<version>/`` and
+``<root>/CURRENT`` names the live one (replaced atomically). A running
+process can hot-swap to a new version with ``reload_store``; requests that
+hold the old version (``acquire_store``) finish on it before it is freed.
+A root without CURRENT (legacy layout) is used as the store directory itself.
+"""
+
+import json
 import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 from urllib.request import urlretrieve
 
+import numpy as np
 from langchain_community.vectorstores import FAISS
 
 from backend.deps import get_embeddings
+from backend.rag.artifact import (
+    SpanDocstore,
+    SqliteDocstore,
+    convert_legacy,
+    has_artifact,
+    load_artifact,
+    read_manifest,
+    save_artifact,
+)
+from backend.rag.embedding_cache import embed_texts_cached
+from backend.rag.index_builder import (
+    apply_search_params,
+    VECTORS_FILENAME,
+    build_index,
+    copy_vector_rows,
+    read_vectors,
+)
+from backend.rag.lexical import build_lexical_index
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+
+CURRENT_FILENAME = "CURRENT"
+VERSIONS_DIRNAME = "versions"
+SOURCES_FILENAME = "sources.json"
+STAGING_DIRNAME = "staging"
+STAGED_FILENAME = "staged.sqlite"
+
+STAGED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sources (key TEXT PRIMARY KEY, entry TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, text TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    key TEXT NOT NULL,
+    chunk TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_key ON chunks (key);
+CREATE TABLE IF NOT EXISTS alt_sources (
+    id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (id, owner)
+);
+"""
+
+
+class StoreHandle:
+    """A loaded store version plus a count of requests currently using it."""
+
+    def __init__(self, store: FAISS, path: Path, version: str):
+        self.store: FAISS | None = store
+        self.path = path
+        self.version = version
+        self.refs = 0
+        self.retired = False
+
+    def _free(self) -> None:
+        if self.store is not None and isinstance(self.store.docstore, SqliteDocstore):
+            self.store.docstore.close()
+        self.store = None
+        print(f"[store] Freed version {self.version}")
+
 
 # Global cache for vector store (avoid reloading on every request)
-_vector_store_cache = None
+_current: StoreHandle | None = None
+_handle_lock = threading.Lock()
+_reload_lock = threading.Lock()
 
 # Azure Blob Storage URLs for vector store files
 BLOB_BASE_URL = "https://ndtchatbotstorage.blob.core.windows.net/vectorstore"
@@ -35,86 +117,255 @@ def _download_vector_store_from_blob(store_path: Path) -> bool:
         return False
 
 
-def load_store(store_path: Path, use_cache: bool = True) -> FAISS | None:
+def get_store_version() -> str | None:
+    """Version of the currently loaded vector store (None if not loaded).
+
+    Caches derived from the index key on this and drop entries when it changes.
     """
-    Load existing FAISS store with caching.
+    handle = _current
+    return handle.version if handle is not None else None
 
-    Args:
-        store_path: Path to vector store
-        use_cache: Use cached store (default True for performance)
 
-    Returns:
-        FAISS vector store or None if not found
+def _has_legacy_files(store_path: Path) -> bool:
+    return all((store_path / filename).exists() for filename in VECTOR_STORE_FILES)
+
+
+def read_current_version(root: Path) -> str | None:
+    """Version named by <root>/CURRENT, or None for the unversioned layout."""
+    pointer = root / CURRENT_FILENAME
+    if not pointer.exists():
+        return None
+    return pointer.read_text(encoding="utf-8").strip() or None
+
+
+def resolve_store_dir(root: Path) -> Path:
+    """Directory holding the live store under a root."""
+    version = read_current_version(root)
+    return root / VERSIONS_DIRNAME / version if version else root
+
+
+def _set_current_version(root: Path, version: str) -> None:
+    """Atomically point <root>/CURRENT at a version."""
+    tmp = root / f"{CURRENT_FILENAME}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILENAME)
+
+
+def _version_order(path: Path) -> tuple[str, str]:
+    """Sort key for version directories: manifest ``created_at``, then the name.
+
+    Names carry microseconds, so versions published within the same second
+    still sort in publish order; unfinished versions (no manifest) sort first.
     """
-    global _vector_store_cache
+    try:
+        created_at = read_manifest(path).get("created_at", "")
+    except (OSError, ValueError):
+        created_at = ""
+    return created_at, path.name
 
-    # Return cached store if available
-    if use_cache and _vector_store_cache is not None:
-        return _vector_store_cache
-
-    # Ensure vector store exists locally; if not, download from blob
-    if not (store_path / "index.faiss").exists() or not (store_path / "index.pkl").exists():
-        print("Vector store not found locally, attempting to download from Azure Blob Storage...")
-        if not _download_vector_store_from_blob(store_path):
-            print("Failed to download vector store from blob storage")
-            return None
-        print("Vector store downloaded successfully from blob storage")
 
+def _prune_versions(root: Path, keep: int) -> None:
+    """Delete all but the newest ``keep`` version directories (never the current one)."""
+    versions_dir = root / VERSIONS_DIRNAME
+    if not versions_dir.exists():
+        return
+    current = read_current_version(root)
+    versions = sorted((p for p in versions_dir.iterdir() if p.is_dir()), key=_version_order)
+    for path in versions[:-keep] if keep > 0 else versions:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _open(store_path: Path) -> StoreHandle | None:
+    """Open the live store under a root (converting a legacy layout once)."""
+    settings = get_settings()
     embeddings = get_embeddings()
-    def _load() -> FAISS | None:
+    store_dir = resolve_store_dir(store_path)
+
+    if not has_artifact(store_dir):
+        # Ensure vector store exists locally; if not, download from blob
+        if not _has_legacy_files(store_dir):
+            print("Vector store not found locally, attempting to download from Azure Blob Storage...")
+            if not _download_vector_store_from_blob(store_dir):
+                print("Failed to download vector store from blob storage")
+                return None
+            print("Vector store downloaded successfully from blob storage")
+
+        print("Converting legacy FAISS + pickle store to the artifact layout...")
         try:
-            # Prefer newer signature
-            return FAISS.load_local(
-                str(store_path),
-                embeddings,
-                allow_dangerous_deserialization=True,
-            )
-        except TypeError:
-            # Older signature without allow_dangerous_deserialization
-            return FAISS.load_local(
-                str(store_path),
-                embeddings,
-            )
+            convert_legacy(store_dir, embeddings, settings.embedding_model)
         except Exception as e:
-            print(f"Error loading vector store: {e}")
+            print(f"Error converting vector store: {e}")
             return None
 
-    store = _load()
-    if store is None:
+    try:
+        store = load_artifact(store_dir, embeddings)
+    except Exception as e:
+        print(f"Error loading vector store: {e}")
         return None
 
-    # Validate embedding dimension matches FAISS index dimension
+    # Validate embedding dimension matches FAISS index dimension (once per load)
     try:
         test_vec = embeddings.embed_query("dimension-check")
         index_dim = getattr(store.index, "d", None)
         if index_dim is not None and len(test_vec) != index_dim:
             print(
                 f"Embedding dimension mismatch (embed={len(test_vec)} vs index={index_dim}). "
-                "Refreshing local vector store from Azure Blob Storage..."
+                f"Check that embedding_model matches the one the index was built with."
             )
-            # Redownload and reload (overwrite local files)
-            if _download_vector_store_from_blob(store_path):
-                store = _load()
-            else:
-                print("Redownload failed; returning None.")
-                return None
     except Exception as e:
         print(f"Error during embedding/index dimension validation: {e}")
 
-    # Cache for future requests
-    if use_cache:
-        _vector_store_cache = store
+    # Query-time parameters (nprobe / efSearch) for approximate indexes
+    apply_search_params(store.index)
 
-    return store
+    return StoreHandle(store, store_dir, read_manifest(store_dir)["index_version"])
 
 
-def add_to_store(chunks: list[dict], store_path: Path) -> None:
-    """Add chunks to vector store (creates if doesn't exist)."""
-    store_path.mkdir(parents=True, exist_ok=True)
-    embeddings = get_embeddings()
+def _warm(handle: StoreHandle) -> None:
+    """Touch the index, docstore and BM25 index before a version takes traffic."""
+    from backend.rag.lexical import get_lexical_index
+
+    store = handle.store
+    if store.index.ntotal:
+        store.index.search(np.zeros((1, store.index.d), dtype=np.float32), 1)
+        store.docstore.search(store.index_to_docstore_id[0])
+    get_lexical_index(store, handle.path, handle.version)
+
+
+def _swap(handle: StoreHandle) -> None:
+    """Make a handle current; free the old one once no request holds it."""
+    global _current
+    with _handle_lock:
+        old, _current = _current, handle
+        if old is not None:
+            old.retired = True
+            if old.refs == 0:
+                old._free()
+
+
+def load_store(store_path: Path, use_cache: bool = True) -> FAISS | None:
+    """
+    Load existing FAISS store with caching.
 
-    texts = [chunk["content"] for chunk in chunks]
-    metadatas = [
+    Opens the pickle-free artifact layout (see ``backend.rag.artifact``):
+    memory-mapped index and a lazily-read SQLite docstore. A legacy
+    index.faiss + index.pkl pair (local or downloaded from blob storage)
+    is converted to that layout once, on first load.
+
+    Args:
+        store_path: Path to vector store (root; CURRENT selects the version)
+        use_cache: Use cached store (default True for performance)
+
+    Returns:
+        FAISS vector store or None if not found
+    """
+    # Return cached store if available
+    handle = _current
+    if use_cache and handle is not None:
+        return handle.store
+
+    with _reload_lock:
+        if use_cache and _current is not None:
+            return _current.store
+        handle = _open(store_path)
+        if handle is None:
+            return None
+        # Cache for future requests
+        if use_cache:
+            _swap(handle)
+        return handle.store
+
+
+@contextmanager
+def acquire_store(store_path: Path) -> Iterator[StoreHandle | None]:
+    """
+    Pin the current store version for the duration of a request.
+
+    A concurrent ``reload_store`` won't free this version until released.
+    """
+    if _current is None:
+        load_store(store_path)
+    with _handle_lock:
+        handle = _current
+        if handle is not None:
+            handle.refs += 1
+    try:
+        yield handle
+    finally:
+        if handle is not None:
+            with _handle_lock:
+                handle.refs -= 1
+                if handle.retired and handle.refs == 0:
+                    handle._free()
+
+
+def reload_store(store_path: Path) -> str | None:
+    """
+    Hot-swap to the version named by CURRENT if it differs from the loaded one.
+
+    The new version is loaded and warmed next to the old one before the
+    swap. Returns the newly loaded version, or None if nothing changed.
+    """
+    with _reload_lock:
+        target = read_current_version(store_path)
+        if target is None or (_current is not None and _current.version == target):
+            return None
+        handle = _open(store_path)
+        if handle is None:
+            print(f"[store] Failed to load version {target}; keeping the current one")
+            return None
+        _warm(handle)
+        _swap(handle)
+        print(f"[store] Now serving version {handle.version}")
+        return handle.version
+
+
+def _new_version_name() -> str:
+    now = time.time()
+    stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))
+    return f"{stamp}{int(now % 1 * 1_000_000):06d}-{uuid.uuid4().hex[:8]}"
+
+
+def embed_chunks(chunks: list[dict]) -> np.ndarray:
+    """Embed chunk texts as a float32 (n, dim) array.
+
+    Goes through the persistent chunk embedding cache, so only text that
+    was never embedded with this model reaches the API, in token-budgeted
+    concurrent batches (``backend.rag.embedder``).
+    """
+    return embed_texts_cached([chunk["content"] for chunk in chunks])
+
+
+@dataclass
+class SourceUpdate:
+    """New content for one tracked source (URL or file path)."""
+
+    key: str
+    kind: str  # ingester that owns the source ("html", "pdf"); scopes purges
+    content_hash: str
+    chunks: list[dict]
+    vectors: np.ndarray | None = None  # embedded chunks, if already computed
+    # Near-duplicates dropped by backend.rag.dedup: surviving chunk id -> its source
+    dedup_survivors: dict[str, str] = field(default_factory=dict)
+    alt_source: str | None = None  # name recorded in the survivors' ``alt_sources``
+
+
+def read_sources(store_dir: Path) -> dict[str, dict]:
+    """Source manifest of a store directory: key -> {kind, hash, chunk_ids[, dedup_survivors]}."""
+    path = store_dir / SOURCES_FILENAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def chunk_id(key: str, position: int, content: str) -> str:
+    """Stable id for the chunk at ``position`` of a source."""
+    return hash_content(f"{key}\n{position}\n{content}")[:32]
+
+
+def _metadatas(chunks: list[dict]) -> list[dict]:
+    return [
         {
             "source": chunk["source"],
             **chunk.get("metadata", {}),
@@ -122,13 +373,308 @@ def add_to_store(chunks: list[dict], store_path: Path) -> None:
         for chunk in chunks
     ]
 
-    if (store_path / "index.faiss").exists():
-        # Load existing and add
-        store = load_store(store_path)
-        store.add_texts(texts, metadatas=metadatas)
-    else:
-        # Create new
-        store = FAISS.from_texts(texts, embeddings, metadatas=metadatas)
 
-    # Save
-    store.save_local(str(store_path))
+def _publish(
+    store_path: Path,
+    drop_keys: set[str],
+    ids: list[str],
+    chunks: list[dict],
+    vectors: np.ndarray,
+    sources: dict[str, dict] | None = None,
+    alt_sources: dict[str, list[str]] | None = None,
+    index_type: str | None = None,
+    vector_rows: list[int] | None = None,
+) -> None:
+    """Write a new store version: the current one minus chunks of ``drop_keys``, plus ``chunks``.
+
+    Chunks are dropped by the ids recorded in the source manifest, and also
+    by ``source`` / ``file_path`` metadata so stores built before the
+    manifest existed don't keep stale copies. ``alt_sources`` (chunk id ->
+    sources) is merged into the ``alt_sources`` metadata of those chunks.
+    The index is built as ``index_type`` (default: the ``index_type`` setting).
+
+    The new version's vector file is written block by block from the
+    previous version's (memory-mapped) file and ``vectors`` (only rows
+    ``vector_rows`` if given; may be mapped too), and the index is built
+    from a map of that file, so the vectors are never all copied in memory.
+    """
+    store_path.mkdir(parents=True, exist_ok=True)
+    settings = get_settings()
+    embeddings = get_embeddings()
+
+    source_dir = resolve_store_dir(store_path)
+    if not has_artifact(source_dir) and _has_legacy_files(source_dir):
+        convert_legacy(source_dir, embeddings, settings.embedding_model)
+
+    manifest = read_sources(source_dir)
+    drop_ids = {cid for key in drop_keys for cid in manifest.get(key, {}).get("chunk_ids", [])}
+    docstore = SpanDocstore()
+    kept_ids: list[str] = []
+    previous = None
+    keep: list[int] = []
+    dim = vectors.shape[1] if len(vectors) else 0
+    if has_artifact(source_dir):
+        # Load existing (in memory, writable) and keep what isn't replaced
+        store = load_artifact(source_dir, embeddings, writable=True)
+        dim = store.index.d
+        previous = read_vectors(source_dir, dim, mmap=True)
+        for position in range(len(store.index_to_docstore_id)):
+            doc_id = store.index_to_docstore_id[position]
+            metadata = store.docstore.metadata(doc_id)
+            if doc_id in drop_ids or metadata.get("source") in drop_keys or metadata.get("file_path") in drop_keys:
+                continue
+            keep.append(position)
+            kept_ids.append(doc_id)
+        # Kept chunks stay spans of their (shared) documents
+        docstore = store.docstore
+        docstore.spans = {doc_id: docstore.spans[doc_id] for doc_id in kept_ids}
+        # Only the docstore is reused; free the old index before building the new one
+        del store
+    elif not chunks:
+        print("Nothing to write to the vector store")
+        return
+
+    for doc_id, chunk, metadata in zip(ids, chunks, _metadatas(chunks)):
+        if "doc_id" in chunk:
+            # One copy of the source text and metadata; the chunk is a span of it
+            docstore.add_document(chunk["doc_id"], chunk["document"], metadata)
+            document_metadata = docstore.documents[chunk["doc_id"]][1]
+            extra = {key: value for key, value in metadata.items() if document_metadata.get(key) != value}
+            docstore.add_span(doc_id, chunk["doc_id"], chunk["start"], chunk["end"], extra)
+        else:
+            docstore.add_text(doc_id, chunk["content"], metadata)
+    for doc_id, alternates in (alt_sources or {}).items():
+        if doc_id in docstore.spans:
+            merged = sorted(set(docstore.metadata(doc_id).get("alt_sources", [])) | set(alternates))
+            docstore.annotate(doc_id, {"alt_sources": merged})
+    all_ids = kept_ids + ids
+    if len(set(all_ids)) != len(all_ids):
+        raise ValueError("Duplicate chunk ids in store update")
+
+    # Kept rows, then the new ones, streamed into the new version's vector file
+    version = _new_version_name()
+    version_dir = store_path / VERSIONS_DIRNAME / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    tmp_vectors = version_dir / f"{VECTORS_FILENAME}.tmp"
+    with open(tmp_vectors, "wb") as vectors_file:
+        if previous is not None:
+            copy_vector_rows(vectors_file, previous, keep)
+        copy_vector_rows(vectors_file, vectors, vector_rows)
+    tmp_vectors.replace(version_dir / VECTORS_FILENAME)
+    previous = None
+    all_vectors = read_vectors(version_dir, dim, mmap=True)
+
+    # Index rebuilt from the exact vectors (approximate types are retrained)
+    index_type = (index_type or settings.index_type) if len(all_vectors) else "flat"
+    if index_type != "flat":
+        print(f"Building {index_type} index over {len(all_vectors)} vectors...")
+    store = FAISS(
+        embeddings,
+        build_index(all_vectors, index_type),
+        docstore,
+        dict(enumerate(all_ids)),
+    )
+
+    # Save as the new version (with the BM25 index and source manifest alongside), then publish it
+    del all_vectors
+    save_artifact(store, version_dir, None, settings.embedding_model, index_version=version)
+    build_lexical_index(store, version_dir)
+    if sources is None:
+        sources = {key: entry for key, entry in manifest.items() if key not in drop_keys}
+    (version_dir / SOURCES_FILENAME).write_text(json.dumps(sources), encoding="utf-8")
+    _set_current_version(store_path, version)
+    _prune_versions(store_path, settings.store_versions_keep)
+    print(f"Published vector store version {version}")
+
+
+def rebuild_index(store_path: Path, index_type: str) -> None:
+    """Publish the live store again as a new version with its index rebuilt as ``index_type``."""
+    _publish(store_path, set(), [], [], np.zeros((0, 0), dtype=np.float32), index_type=index_type)
+
+
+def add_to_store(chunks: list[dict], store_path: Path, vectors: np.ndarray | None = None) -> None:
+    """
+    Add chunks to vector store (creates if doesn't exist).
+
+    Writes a new version directory under ``store_path`` and then points
+    CURRENT at it; running servers pick it up via ``reload_store``.
+    ``vectors`` may be passed if the chunks were already embedded. Chunks
+    added this way aren't tracked by source; see ``update_store``.
+    """
+    if vectors is None:
+        vectors = embed_chunks(chunks)
+    ids = [uuid.uuid4().hex for _ in chunks]
+    _publish(store_path, set(), ids, chunks, vectors)
+
+
+class StagedVersion:
+    """Chunks and vectors of an ingest run, staged until published as one version.
+
+    Lives in ``<root>/staging/<name>/``: ``staged.sqlite`` (source manifest
+    entries and chunks) and ``vectors.f32`` (appended rows, one per staged
+    chunk). Nothing is visible to readers until ``publish`` merges it with
+    the live version in a single new version. Staging a source again
+    replaces its staged chunks; reopening by name continues a staging
+    version left by an interrupted run.
+    """
+
+    def __init__(self, root: Path, name: str | None = None):
+        self.root = root
+        self.name = name or _new_version_name()
+        self.path = root / STAGING_DIRNAME / self.name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path / STAGED_FILENAME, check_same_thread=False)
+        self._conn.executescript(STAGED_SCHEMA)
+        row = self._conn.execute("SELECT value FROM info WHERE name = 'dimension'").fetchone()
+        self.dimension: int | None = int(row[0]) if row else None
+        # Vectors appended by a write whose transaction never committed are dropped
+        last = self._conn.execute("SELECT MAX(row) FROM chunks").fetchone()[0]
+        self._rows = last + 1 if last is not None else 0
+        vectors_path = self.path / VECTORS_FILENAME
+        if vectors_path.exists() and self.dimension:
+            os.truncate(vectors_path, self._rows * self.dimension * 4)
+
+    @staticmethod
+    def exists(root: Path, name: str) -> bool:
+        return (root / STAGING_DIRNAME / name / STAGED_FILENAME).exists()
+
+    @staticmethod
+    def remove(root: Path, name: str) -> None:
+        """Delete a staging version by name (left by an abandoned run)."""
+        shutil.rmtree(root / STAGING_DIRNAME / name, ignore_errors=True)
+
+    def sources(self) -> dict[str, dict]:
+        """Manifest entries staged so far: key -> {kind, hash, chunk_ids}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, entry FROM sources").fetchall()
+        return {key: json.loads(entry) for key, entry in rows}
+
+    def add(self, updates: list[SourceUpdate]) -> None:
+        """Stage new content for sources (replacing anything staged for them before)."""
+        with self._lock:
+            vectors_path = self.path / VECTORS_FILENAME
+            with open(vectors_path, "ab") as vectors_file:
+                for update in updates:
+                    ids = [chunk_id(update.key, i, chunk["content"]) for i, chunk in enumerate(update.chunks)]
+                    entry = {"kind": update.kind, "hash": update.content_hash, "chunk_ids": ids}
+                    if update.dedup_survivors:
+                        entry["dedup_survivors"] = update.dedup_survivors
+                    self._conn.execute("DELETE FROM chunks WHERE key = ?", (update.key,))
+                    self._conn.execute("DELETE FROM alt_sources WHERE owner = ?", (update.key,))
+                    if update.alt_source is not None:
+                        self._conn.executemany(
+                            "INSERT INTO alt_sources (id, source, owner) VALUES (?, ?, ?)",
+                            [(survivor, update.alt_source, update.key) for survivor in update.dedup_survivors],
+                        )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sources (key, entry) VALUES (?, ?)", (update.key, json.dumps(entry))
+                    )
+                    if not update.chunks:
+                        continue
+                    vectors = update.vectors if update.vectors is not None else embed_chunks(update.chunks)
+                    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                    if self.dimension is None:
+                        self.dimension = vectors.shape[1]
+                        self._conn.execute(
+                            "INSERT INTO info (name, value) VALUES ('dimension', ?)", (str(self.dimension),)
+                        )
+                    elif vectors.shape[1] != self.dimension:
+                        raise ValueError(f"Staged vectors have dimension {self.dimension}, got {vectors.shape[1]}")
+                    for doc_id, chunk in zip(ids, update.chunks):
+                        if "doc_id" in chunk:
+                            # The source text is stored once; chunks keep their span
+                            self._conn.execute(
+                                "INSERT OR IGNORE INTO documents (id, text) VALUES (?, ?)",
+                                (chunk["doc_id"], chunk["document"]),
+                            )
+                        fields = {key: value for key, value in chunk.items() if key != "document"}
+                        self._conn.execute(
+                            "INSERT INTO chunks (row, id, key, chunk) VALUES (?, ?, ?, ?)",
+                            (self._rows, doc_id, update.key, json.dumps(fields)),
+                        )
+                        self._rows += 1
+                    # Vectors land before the commit that makes their rows visible
+                    vectors_file.write(vectors.tobytes())
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+            self._conn.commit()
+
+    def _staged(self) -> tuple[list[str], list[dict], np.ndarray, list[int]]:
+        """Staged chunk ids and chunk dicts, the mapped vector file and their rows in it."""
+        documents = dict(self._conn.execute("SELECT id, text FROM documents"))
+        rows = self._conn.execute("SELECT row, id, chunk FROM chunks ORDER BY row").fetchall()
+        ids, chunks = [], []
+        for _, doc_id, fields in rows:
+            chunk = json.loads(fields)
+            if "doc_id" in chunk:
+                chunk["document"] = documents[chunk["doc_id"]]
+            ids.append(doc_id)
+            chunks.append(chunk)
+        if not rows:
+            return ids, chunks, np.zeros((0, self.dimension or 0), dtype=np.float32), []
+        vectors = read_vectors(self.path, self.dimension, mmap=True)
+        return ids, chunks, vectors, [row for row, _, _ in rows]
+
+    def publish(self, deleted: list[str] | None = None, invalidate: list[str] | None = None) -> None:
+        """Merge the staged sources into the live version as one new version, then drop the staging.
+
+        ``deleted`` sources are purged in the same version. ``invalidate``
+        sources keep their chunks but lose their manifest hash, so their
+        ingester re-ingests them on its next run.
+        """
+        deleted = deleted or []
+        with self._lock:
+            staged = {key: json.loads(entry) for key, entry in self._conn.execute("SELECT key, entry FROM sources")}
+            ids, chunks, vectors, rows = self._staged()
+            alternates: dict[str, set[str]] = {}
+            for doc_id, source in self._conn.execute("SELECT id, source FROM alt_sources"):
+                alternates.setdefault(doc_id, set()).add(source)
+            manifest = read_sources(resolve_store_dir(self.root))
+            manifest.update(staged)
+            for key in deleted:
+                manifest.pop(key, None)
+            for key in invalidate or []:
+                if key in manifest:
+                    manifest[key] = {**manifest[key], "hash": None}
+            alt_sources = {doc_id: sorted(sources) for doc_id, sources in alternates.items()}
+            _publish(
+                self.root, set(staged) | set(deleted), ids, chunks, vectors, manifest, alt_sources, vector_rows=rows
+            )
+            del vectors
+            self._discard()
+
+    def discard(self) -> None:
+        """Delete the staging version without publishing it."""
+        with self._lock:
+            self._discard()
+
+    def _discard(self) -> None:
+        self._conn.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def update_store(
+    store_path: Path,
+    updates: list[SourceUpdate],
+    deleted: list[str] | None = None,
+) -> None:
+    """
+    Replace the chunks of changed sources and purge deleted ones, in one new version.
+
+    Each updated source's old vectors are removed before its new chunks are
+    added, so re-ingesting never duplicates. The source manifest
+    (``sources.json`` in the version directory) records each source's
+    content hash and chunk ids so unchanged sources can be skipped next time.
+    An update's ``dedup_survivors`` are the chunks its near-duplicates were
+    dropped for (``backend.rag.dedup``); its ``alt_source`` is recorded on
+    them as ``alt_sources`` (ids not in the store are ignored).
+    Incremental writers stage batches with ``StagedVersion`` and publish once.
+    """
+    staged = StagedVersion(store_path)
+    try:
+        staged.add(updates)
+        staged.publish(deleted)
+    except BaseException:
+        staged.discard()
+        raise
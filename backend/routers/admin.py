@@ -0,0 +1,39 @@
+"""Admin endpoints (vector store hot reload).
+
+Disabled (404) unless ADMIN_TOKEN is set; requests must send it as X-Admin-Token.
+"""
+
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+
+from backend.rag.store import get_store_version
+from backend.services.store_reload import reload_now
+from backend.settings import get_settings
+
+router = APIRouter()
+
+
+def _check_token(token: str | None) -> None:
+    expected = get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin API disabled (ADMIN_TOKEN is not set)")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/admin/store")
+async def store_version(x_admin_token: str | None = Header(None)):
+    """Return the vector store version currently being served."""
+    _check_token(x_admin_token)
+    return {"version": get_store_version()}
+
+
+@router.post("/admin/reload-store")
+async def reload_store_endpoint(x_admin_token: str | None = Header(None)):
+    """Hot-swap to the vector store version named by CURRENT.
+
+    In-flight requests finish on the old version, which is freed afterwards.
+    """
+    _check_token(x_admin_token)
+    return await reload_now()
@@ -1,18 +1,42 @@
 """Chat endpoint with RAG pipeline."""
 
+import asyncio
+import time
+
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.responses import StreamingResponse
 
 from backend.models.schemas import ChatRequest, ChatResponse
-from backend.rag.pipelines import rag_pipeline
+from backend.rag.pipelines import rag_pipeline, rag_pipeline_with_sources
 from backend.services.guardrails import check_scope
-from backend.services.llm import generate_response
-from backend.llm.provider import generate_chat
-from backend.services.telemetry import log_request
+from backend.services.llm import stream_response
+from backend.llm.provider import NOT_CONFIGURED, generate_chat
+from backend.rag.query_cache import embed_query_cached
+from backend.rag.store import get_store_version
+from backend.services.answer_cache import get_answer_cache
+from backend.services.executor import run_in_pool
+from backend.services.singleflight import SingleFlight, StreamFlight
+from backend.services.telemetry import log_request, log_stream
+from backend.settings import get_settings
+from backend.utils.hashing import hash_content
+from backend.utils.sse import sse_event
+from backend.utils.text import normalize_query
 
 router = APIRouter()
 
+# Identical in-flight prompts share one LLM call / one upstream token stream
+_llm_flight = SingleFlight("llm")
+_stream_flight = StreamFlight("llm_stream")
+
+
+async def _llm_stream_events(question: str, context: str):
+    """Upstream for coalesced streams: ("token", text)... then ("usage", dict)."""
+    usage: dict[str, int] = {}
+    async for token in stream_response(question, context, usage):
+        yield ("token", token)
+    yield ("usage", usage)
+
 
 @router.options("/chat")
 async def chat_options():
@@ -41,9 +65,10 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
     Chat endpoint with RAG pipeline.
 
     1. Check scope/guardrails
-    2. Retrieve relevant context
-    3. Generate response with LLM
-    4. Validate and return
+    2. Serve from the answer cache (exact or near-duplicate question)
+    3. Retrieve relevant context
+    4. Generate response with LLM
+    5. Validate, cache and return
     """
     try:
         # Log request
@@ -55,6 +80,30 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
                 status_code=400, detail="Question is outside NDT's scope (science/education only)"
             )
 
+        # Answer cache: the query embedding is reused by retrieval on a miss
+        settings = get_settings()
+        answer_cache = get_answer_cache() if settings.answer_cache_enabled else None
+        query_embedding = None
+        # Version the answer will be retrieved from; a swap before the put makes it stale
+        store_version = get_store_version()
+        if answer_cache is not None:
+            try:
+                query_embedding = await asyncio.wait_for(
+                    run_in_pool("embed", embed_query_cached, request.message), settings.embedding_timeout_s
+                )
+            except asyncio.TimeoutError:
+                print(f"[chat] Query embedding for answer cache exceeded {settings.embedding_timeout_s}s; exact match only")
+            except Exception as e:
+                print(f"[chat] Query embedding for answer cache failed: {e}")
+            # Similarity scan over the cached questions: off the event loop
+            cached, cache_status = await run_in_pool("embed", answer_cache.lookup, request.message, query_embedding)
+            if cached is not None:
+                return ChatResponse(
+                    response=cached["answer"],
+                    sources=cached["sources"],
+                    metadata={**cached.get("metadata", {}), "cache": cache_status},
+                )
+
         # Run RAG pipeline
         context = await rag_pipeline(request.message)
 
@@ -63,9 +112,10 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         prompt = f"Use the context to answer.\n\nContext:\n{context}\n\nQuestion: {request.message}"
         
         try:
-            answer_text = generate_chat([
-                {"role": "user", "content": prompt}
-            ], max_tokens=800)
+            answer_text = await _llm_flight.do(
+                hash_content(prompt),
+                lambda: generate_chat([{"role": "user", "content": prompt}], max_tokens=800),
+            )
         except Exception as gen_err:
             print(f"ERROR in generate_chat: {gen_err}")
             import traceback
@@ -86,6 +136,16 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
             "metadata": {"provider": "model"}
         }
 
+        # Only cache real answers (not provider/format error strings), and only with the embedding
+        if (
+            answer_cache is not None
+            and query_embedding is not None
+            and answer_text != NOT_CONFIGURED
+            and not answer_text.startswith("Error:")
+        ):
+            answer_cache.put(request.message, query_embedding, response, store_version)
+            response["metadata"] = {**response["metadata"], "cache": "miss"}
+
         return ChatResponse(
             response=response["answer"],
             sources=response["sources"],
@@ -102,23 +162,67 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
 
 @router.post("/chat/stream")
 async def chat_stream_endpoint(request: ChatRequest):
-    """Streaming chat endpoint (SSE)."""
+    """
+    Streaming chat endpoint (SSE).
+
+    Emits JSON-encoded events with incrementing ids:
+    - retrieval: {"documents": n, "retrieval_ms": ...}
+    - sources: {"sources": [{"title", "domain", "url"}, ...]}
+    - token: {"text": "..."} (one per streamed delta)
+    - done: {"usage": {...}, "ttft_ms": ..., "total_ms": ...}
+    - error: {"error": "..."}
+    """
+    log_request("chat_stream", {"message": request.message})
 
     async def generate():
-        # Check scope
-        if not check_scope(request.message):
-            yield "data: {'error': 'Out of scope'}\n\n"
-            return
+        event_id = 0
 
-        # Run RAG pipeline
-        context = await rag_pipeline(request.message)
+        def emit(event: str, data: dict) -> str:
+            nonlocal event_id
+            event_id += 1
+            return sse_event(event, data, event_id)
 
-        # Stream response
-        async for chunk in generate_response(
-            question=request.message,
-            context=context,
-            stream=True,
-        ):
-            yield f"data: {chunk}\n\n"
-
-    return StreamingResponse(generate(), media_type="text/event-stream")
+        started = time.perf_counter()
+        try:
+            # Check scope
+            if not check_scope(request.message):
+                yield emit("error", {"error": "Out of scope"})
+                return
+
+            # Run RAG pipeline
+            result = await rag_pipeline_with_sources(request.message)
+            retrieval_ms = (time.perf_counter() - started) * 1000
+            yield emit(
+                "retrieval",
+                {"documents": len(result["documents"]), "retrieval_ms": round(retrieval_ms, 1)},
+            )
+            yield emit("sources", {"sources": result["context_sources"]})
+
+            # Stream response tokens (identical concurrent prompts share one upstream)
+            usage: dict[str, int] = {}
+            ttft_ms = None
+            context = result["context"]
+            stream_key = hash_content(f"{normalize_query(request.message)}\n{context}")
+            async for kind, value in _stream_flight.subscribe(
+                stream_key,
+                lambda: _llm_stream_events(request.message, context),
+            ):
+                if kind == "usage":
+                    usage = value
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                yield emit("token", {"text": value})
+
+            total_ms = round((time.perf_counter() - started) * 1000, 1)
+            log_stream("chat_stream", ttft_ms, total_ms, usage)
+            yield emit("done", {"usage": usage, "ttft_ms": ttft_ms, "total_ms": total_ms})
+        except Exception as e:
+            print(f"Error in chat stream: {e}")
+            yield emit("error", {"error": str(e)})
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
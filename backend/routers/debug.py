@@ -1,6 +1,12 @@
 """Debug endpoints for verifying LLM/provider configuration at runtime."""
 
 from fastapi import APIRouter
+from backend.rag.query_cache import query_cache_stats
+from backend.rag.rerank_cache import get_rerank_cache
+from backend.services.answer_cache import get_answer_cache
+from backend.services.batching import batcher_stats
+from backend.services.executor import pool_stats
+from backend.services.singleflight import singleflight_stats
 from backend.settings import get_settings, get_cors_origins
 
 router = APIRouter()
@@ -23,3 +29,31 @@ async def debug_cors():
         "cors_origins": get_cors_origins(),
         "cors_origins_raw": get_settings().cors_origins,
     }
+
+
+@router.get("/debug/pools")
+async def debug_pools():
+    """Return queue depth and wait times for the worker pools."""
+    return {"pools": pool_stats()}
+
+
+@router.get("/debug/cache")
+async def debug_cache():
+    """Return answer cache, query embedding cache and rerank score cache statistics."""
+    return {
+        "answer_cache": get_answer_cache().stats(),
+        "query_embedding_cache": query_cache_stats(),
+        "rerank_cache": get_rerank_cache().stats(),
+    }
+
+
+@router.get("/debug/singleflight")
+async def debug_singleflight():
+    """Return request-coalescing counters (leaders vs. shared callers)."""
+    return {"flights": singleflight_stats()}
+
+
+@router.get("/debug/batching")
+async def debug_batching():
+    """Return micro-batching stats (batch sizes, queue wait, model time)."""
+    return {"batchers": batcher_stats()}
@@ -1,6 +1,9 @@
 """Health check endpoints."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from backend.services.warmup import readiness_state
 
 router = APIRouter()
 
@@ -19,10 +22,10 @@ async def healthz():
 
 @router.get("/ready")
 async def readiness():
-    """Readiness check (includes dependencies)."""
-    # TODO: Check vector store, LLM connectivity, etc.
-    return {
-        "status": "ready",
-        "vector_store": "ok",
-        "llm": "ok",
-    }
+    """Readiness check: 503 until startup warm-up has loaded the dependencies.
+
+    Reports per-component status and load times.
+    """
+    state = readiness_state()
+    body = {"status": "ready" if state["ready"] else "starting", **state}
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=body)
@@ -13,11 +13,13 @@ router = APIRouter()
 async def search_endpoint(request: SearchRequest) -> list[SearchResult]:
     """
     Retrieve relevant documents without generating a response.
-    Useful for testing retrieval quality.
+    Useful for testing retrieval quality. ``mode`` selects dense, hybrid or
+    lexical (BM25-only, no embedding call) retrieval.
     """
     documents = await retrieve_documents(
         query=request.query,
         top_k=request.top_k or 10,
+        mode=request.mode,
     )
 
     return [
@@ -3,7 +3,8 @@
 from pathlib import Path
 from fastapi import APIRouter, Query
 
-from backend.rag.store import load_store
+from backend.rag.artifact import iter_metadata
+from backend.rag.store import acquire_store
 from backend.settings import get_settings
 
 router = APIRouter()
@@ -37,18 +38,17 @@ def _load_training_urls() -> list[str]:
 def _load_vector_store_sources() -> list[str]:
     """Extract unique source URLs from the FAISS vector store if present."""
     settings = get_settings()
-    store = load_store(Path(settings.vector_store_path))
-    if store is None:
-        return []
     sources: set[str] = set()
-    # langchain FAISS store keeps documents in docstore._dict
-    try:
-        for doc in store.docstore._dict.values():  # type: ignore[attr-defined]
-            src = doc.metadata.get("source") if hasattr(doc, "metadata") else None
-            if isinstance(src, str) and (src.startswith("http://") or src.startswith("https://")):
-                sources.add(src)
-    except Exception as e:  # pragma: no cover - defensive
-        print(f"Error extracting sources from vector store: {e}")
+    with acquire_store(Path(settings.vector_store_path)) as handle:
+        if handle is None:
+            return []
+        try:
+            for metadata in iter_metadata(handle.store):
+                src = metadata.get("source")
+                if isinstance(src, str) and (src.startswith("http://") or src.startswith("https://")):
+                    sources.add(src)
+        except Exception as e:  # pragma: no cover - defensive
+            print(f"Error extracting sources from vector store: {e}")
     return sorted(sources)
 
 
@@ -0,0 +1,161 @@
+"""Semantic answer cache for /api/chat.
+
+Two lookups: exact match on normalized question text, then nearest neighbour
+over cached question embeddings above a similarity threshold. Entries expire
+after a TTL, are evicted LRU, and the whole cache is dropped whenever the
+loaded vector store version changes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from backend.rag.store import get_store_version
+from backend.settings import get_settings
+from backend.utils.text import normalize_query
+
+
+class AnswerCache:
+    """Bounded TTL/LRU cache of chat answers with embedding near-match."""
+
+    def __init__(self, max_entries: int, ttl_s: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # normalized question -> (slot, created_at, response)
+        self._entries: OrderedDict[str, tuple[int, float, dict[str, Any]]] = OrderedDict()
+        # Row-per-slot matrix of unit-norm question embeddings
+        self._matrix: np.ndarray | None = None
+        self._slot_keys: list[str | None] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._version: str | None = None
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self) -> None:
+        version = get_store_version()
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._slot_keys = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _drop(self, key: str) -> None:
+        slot, _, _ = self._entries.pop(key)
+        self._slot_keys[slot] = None
+        self._free_slots.append(slot)
+
+    def _expired(self, created_at: float) -> bool:
+        return time.monotonic() - created_at > self.ttl_s
+
+    @staticmethod
+    def _unit(embedding: list[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, question: str, embedding: list[float] | None) -> tuple[dict | None, str]:
+        """
+        Find a cached answer.
+
+        Returns (response, kind) where kind is "hit", "near_hit" or "miss".
+        """
+        key = normalize_query(question)
+        with self._lock:
+            self._check_version()
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[1]):
+                    self._drop(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[2], "hit"
+
+            if embedding is not None and self._entries and self._matrix is not None:
+                sims = self._matrix @ self._unit(embedding)
+                for slot in np.argsort(-sims):
+                    if sims[slot] < self.threshold:
+                        break
+                    match_key = self._slot_keys[slot]
+                    if match_key is None:
+                        continue
+                    match = self._entries[match_key]
+                    if self._expired(match[1]):
+                        self._drop(match_key)
+                        continue
+                    self._entries.move_to_end(match_key)
+                    self._stats["near_hits"] += 1
+                    return match[2], "near_hit"
+
+            self._stats["misses"] += 1
+            return None, "miss"
+
+    def put(
+        self,
+        question: str,
+        embedding: list[float] | None,
+        response: dict[str, Any],
+        store_version: str | None = None,
+    ) -> None:
+        """Cache an answer for a question.
+
+        With ``store_version`` (the version the answer was retrieved from),
+        the answer is dropped if the store has been swapped since.
+        """
+        key = normalize_query(question)
+        with self._lock:
+            self._check_version()
+            if store_version is not None and store_version != self._version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            while not self._free_slots:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats["evictions"] += 1
+
+            slot = self._free_slots.pop()
+            if embedding is not None:
+                vec = self._unit(embedding)
+                if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                    self._matrix = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+                self._matrix[slot] = vec
+                self._slot_keys[slot] = key
+            self._entries[key] = (slot, time.monotonic(), response)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["near_hits"] + self._stats["misses"]
+            served = self._stats["hits"] + self._stats["near_hits"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+                "store_version": self._version,
+            }
+
+
+@lru_cache
+def get_answer_cache() -> AnswerCache:
+    """Get the process-wide answer cache."""
+    settings = get_settings()
+    return AnswerCache(
+        max_entries=settings.answer_cache_size,
+        ttl_s=settings.answer_cache_ttl_s,
+        threshold=settings.answer_cache_similarity,
+    )
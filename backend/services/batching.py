@@ -0,0 +1,224 @@
+"""Dynamic micro-batching of model calls across concurrent requests.
+
+Requests submit lists of items; a single worker task drains them into one
+batch, flushed when it holds ``max_batch`` items or the oldest request has
+waited ``max_wait_ms``, runs the model once on a worker pool, and hands
+each request back its own slice of the results. While a batch runs, new
+requests queue up, so under load batches grow on their own and callers
+stop competing for the CPU.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from backend.services.executor import run_in_pool
+
+InT = TypeVar("InT")
+OutT = TypeVar("OutT")
+
+# All batchers, by name, for stats reporting
+_registry: dict[str, "MicroBatcher"] = {}
+
+
+@dataclass
+class _Pending:
+    items: list
+    future: asyncio.Future
+    enqueued: float
+
+
+class MicroBatcher(Generic[InT, OutT]):
+    """Coalesce concurrent ``submit`` calls into batched ``fn`` calls on a pool."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[list[InT]], list[OutT]],
+        max_batch: int,
+        max_wait_ms: float,
+        pool: str,
+    ):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self.pool = pool
+        self._queue: deque[_Pending] = deque()
+        self._queued_items = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stats = {
+            "requests": 0,
+            "batched_requests": 0,
+            "batches": 0,
+            "items": 0,
+            "flush_full": 0,
+            "flush_wait": 0,
+            "errors": 0,
+            "max_batch_items": 0,
+            "total_queue_ms": 0.0,
+            "max_queue_ms": 0.0,
+            "total_model_ms": 0.0,
+            "max_model_ms": 0.0,
+        }
+        _registry[name] = self
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        if self._loop is not loop:
+            # New event loop (e.g. a second asyncio.run): old waiters are gone
+            self._queue.clear()
+            self._queued_items = 0
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def submit(self, items: list[InT]) -> list[OutT]:
+        """Results for ``items`` (in order), computed in a shared batch."""
+        if not items:
+            return []
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_Pending(list(items), future, time.perf_counter()))
+        self._queued_items += len(items)
+        self._stats["requests"] += 1
+        self._wakeup.set()
+        return await future
+
+    def _take(self) -> list[_Pending]:
+        """Pop whole requests (skipping cancelled ones) up to ``max_batch`` items."""
+        batch: list[_Pending] = []
+        size = 0
+        while self._queue:
+            pending = self._queue[0]
+            if pending.future.done():
+                self._queue.popleft()
+                self._queued_items -= len(pending.items)
+                continue
+            if batch and size + len(pending.items) > self.max_batch:
+                break
+            self._queue.popleft()
+            self._queued_items -= len(pending.items)
+            batch.append(pending)
+            size += len(pending.items)
+        return batch
+
+    async def _wait_for_batch(self) -> None:
+        """Return once a batch is full or the oldest request's wait is up."""
+        while not self._queue:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        deadline = self._queue[0].enqueued + self.max_wait_s
+        while self._queued_items < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self) -> None:
+        try:
+            await self._serve()
+        finally:
+            # The worker only stops when cancelled; requests still queued
+            # would otherwise wait for a worker that never comes
+            for pending in self._queue:
+                pending.future.cancel()
+            self._queue.clear()
+            self._queued_items = 0
+
+    async def _serve(self) -> None:
+        while True:
+            await self._wait_for_batch()
+            full = self._queued_items >= self.max_batch
+            batch = self._take()
+            if not batch:
+                continue
+            items = [item for pending in batch for item in pending.items]
+            started = time.perf_counter()
+            try:
+                results = await run_in_pool(self.pool, self.fn, items)
+                if len(results) != len(items):
+                    raise ValueError(f"{self.name}: {len(results)} results for {len(items)} items")
+            except Exception as e:
+                self._stats["errors"] += 1
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+            except BaseException:
+                # Cancelled (worker stopped, or the pool shut down): the worker
+                # exits, so don't leave this batch's callers waiting forever
+                self._stats["errors"] += 1
+                for pending in batch:
+                    pending.future.cancel()
+                raise
+            model_ms = (time.perf_counter() - started) * 1000
+
+            offset = 0
+            for pending in batch:
+                count = len(pending.items)
+                if not pending.future.done():
+                    pending.future.set_result(results[offset:offset + count])
+                offset += count
+                self._stats["batched_requests"] += 1
+                queue_ms = (started - pending.enqueued) * 1000
+                self._stats["total_queue_ms"] += queue_ms
+                self._stats["max_queue_ms"] = max(self._stats["max_queue_ms"], queue_ms)
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["flush_full" if full else "flush_wait"] += 1
+            self._stats["max_batch_items"] = max(self._stats["max_batch_items"], len(items))
+            self._stats["total_model_ms"] += model_ms
+            self._stats["max_model_ms"] = max(self._stats["max_model_ms"], model_ms)
+
+    async def close(self) -> None:
+        """Stop the worker (queued requests are cancelled)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for pending in self._queue:
+            pending.future.cancel()
+        self._queue.clear()
+        self._queued_items = 0
+
+    def stats(self) -> dict[str, Any]:
+        s = self._stats
+        batches = s["batches"]
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "requests": s["requests"],
+            "batches": batches,
+            "queued_items": self._queued_items,
+            "avg_batch_items": round(s["items"] / batches, 2) if batches else 0.0,
+            "avg_batch_requests": round(s["batched_requests"] / batches, 2) if batches else 0.0,
+            "max_batch_items": s["max_batch_items"],
+            "flush_full": s["flush_full"],
+            "flush_wait": s["flush_wait"],
+            "errors": s["errors"],
+            "avg_queue_ms": round(s["total_queue_ms"] / max(1, s["batched_requests"]), 2),
+            "max_queue_ms": round(s["max_queue_ms"], 2),
+            "avg_model_ms": round(s["total_model_ms"] / batches, 2) if batches else 0.0,
+            "max_model_ms": round(s["max_model_ms"], 2),
+        }
+
+
+def batcher_stats() -> dict[str, dict[str, Any]]:
+    return {name: batcher.stats() for name, batcher in _registry.items()}
+
+
+async def close_batchers() -> None:
+    """Stop every batcher's worker (used on application shutdown)."""
+    for batcher in _registry.values():
+        await batcher.close()
@@ -0,0 +1,114 @@
+"""Bounded worker pools for blocking work.
+
+Embedding/search, BM25 search and cross-encoder scoring each get their own
+thread pool so a slow stage can't starve the event loop or the other stages. (LLM calls are
+natively async, see ``backend.llm.provider``.) Threads (not processes) are
+used because the heavy parts (HTTP, FAISS, torch) release the GIL and the
+models are too large to copy per process.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from backend.settings import get_settings
+
+T = TypeVar("T")
+
+POOL_NAMES = ("embed", "lexical", "rerank")
+
+_pools: dict[str, ThreadPoolExecutor] = {}
+_stats: dict[str, dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+def _pool_size(name: str) -> int:
+    settings = get_settings()
+    return {
+        "embed": settings.embed_pool_workers,
+        "lexical": settings.lexical_pool_workers,
+        "rerank": settings.rerank_pool_workers,
+    }[name]
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    """Get or create the named worker pool."""
+    if name not in POOL_NAMES:
+        raise ValueError(f"Unknown pool '{name}' (expected one of {POOL_NAMES})")
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=_pool_size(name), thread_name_prefix=f"{name}-pool")
+            _pools[name] = pool
+            _stats[name] = {
+                "queued": 0,
+                "active": 0,
+                "completed": 0,
+                "failed": 0,
+                "total_wait_ms": 0.0,
+                "max_wait_ms": 0.0,
+            }
+        return pool
+
+
+async def run_in_pool(name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the named pool and await its result."""
+    pool = get_pool(name)
+    stats = _stats[name]
+    submitted = time.perf_counter()
+    with _lock:
+        stats["queued"] += 1
+
+    def _task() -> T:
+        wait_ms = (time.perf_counter() - submitted) * 1000
+        with _lock:
+            stats["queued"] -= 1
+            stats["active"] += 1
+            stats["total_wait_ms"] += wait_ms
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with _lock:
+                stats["active"] -= 1
+                stats["completed" if ok else "failed"] += 1
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, functools.partial(_task))
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """Queue depth, in-flight count and wait times per pool."""
+    with _lock:
+        out = {}
+        for name in POOL_NAMES:
+            if name not in _stats:
+                continue
+            stats = _stats[name]
+            done = stats["completed"] + stats["failed"]
+            out[name] = {
+                "workers": _pool_size(name),
+                "queue_depth": int(stats["queued"]),
+                "active": int(stats["active"]),
+                "completed": int(stats["completed"]),
+                "failed": int(stats["failed"]),
+                "avg_wait_ms": round(stats["total_wait_ms"] / done, 2) if done else 0.0,
+                "max_wait_ms": round(stats["max_wait_ms"], 2),
+            }
+        return out
+
+
+def shutdown_pools(wait: bool = True) -> None:
+    """Shut down all worker pools (used on application shutdown)."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
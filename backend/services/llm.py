@@ -2,66 +2,64 @@
 
 from collections.abc import AsyncIterator
 
-from backend.deps import get_llm
+from backend.llm.provider import astream_chat, generate_chat
 from backend.prompts import RESPONSE_TEMPLATE, SYSTEM_PROMPT
 from backend.settings import get_settings
 
 
-async def generate_response(
-    question: str,
-    context: str,
-    stream: bool = False,
-) -> dict[str, any] | AsyncIterator[str]:
+def build_messages(question: str, context: str) -> list[dict[str, str]]:
+    """Build system + user messages for a question and retrieved context."""
+    prompt = RESPONSE_TEMPLATE.format(
+        context=context,
+        question=question,
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+async def generate_response(question: str, context: str) -> dict[str, any]:
     """
-    Generate response using LLM.
+    Generate a complete response using the configured provider.
 
     Args:
         question: User question
         context: Retrieved context
-        stream: Whether to stream response
 
     Returns:
-        Dict with answer and sources, or stream of chunks
+        Dict with answer, sources and metadata
     """
-    llm = get_llm()
     settings = get_settings()
+    answer = await generate_chat(build_messages(question, context), max_tokens=800)
 
-    # Format prompt
-    prompt = RESPONSE_TEMPLATE.format(
-        context=context,
-        question=question,
-    )
+    # Extract sources from context
+    sources = []
+    for line in context.split("\n"):
+        if line.startswith("[Source:"):
+            source = line.replace("[Source:", "").replace("]", "").strip()
+            if source not in sources:
+                sources.append(source)
 
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt},
-    ]
+    return {
+        "answer": answer,
+        "sources": sources,
+        "metadata": {
+            "provider": settings.model_provider,
+            "model": settings.llm_model,
+            "temperature": settings.temperature,
+        },
+    }
 
-    if stream:
-        # Streaming response
-        async def stream_chunks():
-            async for chunk in llm.astream(messages):
-                if chunk.content:
-                    yield chunk.content
 
-        return stream_chunks()
-    else:
-        # Complete response
-        response = await llm.ainvoke(messages)
-
-        # Extract sources from context
-        sources = []
-        for line in context.split("\n"):
-            if line.startswith("[Source:"):
-                source = line.replace("[Source:", "").replace("]", "").strip()
-                if source not in sources:
-                    sources.append(source)
+def stream_response(
+    question: str,
+    context: str,
+    usage: dict[str, int] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream response tokens from the configured provider (Anthropic or OpenAI).
 
-        return {
-            "answer": response.content,
-            "sources": sources,
-            "metadata": {
-                "model": settings.llm_model,
-                "temperature": settings.temperature,
-            },
-        }
+    ``usage`` is filled with token counts once the provider reports them.
+    """
+    return astream_chat(build_messages(question, context), max_tokens=800, usage=usage)
@@ -0,0 +1,151 @@
+"""Request coalescing (single-flight) for identical in-flight work.
+
+Concurrent callers with the same key share one computation. The shared task
+is only cancelled once every caller waiting on it has gone away, so the first
+client disconnecting doesn't fail everyone else. ``StreamFlight`` does the
+same for async streams: one upstream producer, fanned out to all subscribers
+(late joiners replay what has been produced so far).
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+# All flights, by name, for stats reporting
+_registry: dict[str, "SingleFlight | StreamFlight"] = {}
+
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent awaitable calls by key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._stats = {"leaders": 0, "shared": 0, "cancelled": 0}
+        _registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn()`` unless an identical call is already in flight; share its result."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["shared"] += 1
+
+        call.waiters += 1
+        try:
+            # shield: a cancelled waiter must not cancel the shared task
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                self._stats["cancelled"] += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._calls)}
+
+
+class _Broadcast(Generic[T]):
+    def __init__(self, source: AsyncIterator[T]):
+        self.items: list[T] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                async with self.changed:
+                    self.items.append(item)
+                    self.changed.notify_all()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            async with self.changed:
+                self.changed.notify_all()
+
+
+class StreamFlight:
+    """Fan one upstream async stream out to every concurrent subscriber with the same key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._streams: dict[Hashable, _Broadcast] = {}
+        self._stats = {"leaders": 0, "shared": 0, "cancelled": 0}
+        _registry[name] = self
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        factory: Callable[[], AsyncIterator[T]],
+    ) -> AsyncIterator[T]:
+        """Yield every item of the shared stream for ``key`` (starting one if needed)."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(factory())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(key, broadcast))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["shared"] += 1
+
+        broadcast.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with broadcast.changed:
+                    await broadcast.changed.wait_for(
+                        lambda: len(broadcast.items) > index or broadcast.done
+                    )
+                    pending = broadcast.items[index:]
+                    finished = broadcast.done
+                for item in pending:
+                    yield item
+                index += len(pending)
+                if finished and index >= len(broadcast.items):
+                    break
+            if broadcast.error is not None:
+                raise broadcast.error
+        finally:
+            broadcast.subscribers -= 1
+            # Last subscriber gone: stop the upstream (e.g. LLM stream) early
+            if broadcast.subscribers == 0 and not broadcast.task.done():
+                broadcast.task.cancel()
+                self._forget(key, broadcast)
+                self._stats["cancelled"] += 1
+
+    def _forget(self, key: Hashable, broadcast: _Broadcast) -> None:
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "in_flight": len(self._streams)}
+
+
+def singleflight_stats() -> dict[str, dict[str, Any]]:
+    """Leader/shared/cancelled counts for every registered flight."""
+    return {name: flight.stats() for name, flight in _registry.items()}
@@ -0,0 +1,26 @@
+"""Background hot reload of the vector store when CURRENT changes."""
+
+import asyncio
+from pathlib import Path
+
+from backend.rag.store import get_store_version, reload_store
+from backend.services.executor import run_in_pool
+from backend.settings import get_settings
+
+
+async def reload_now() -> dict:
+    """Load, warm and swap in the version named by CURRENT (if it changed)."""
+    previous = get_store_version()
+    loaded = await run_in_pool("embed", reload_store, Path(get_settings().vector_store_path))
+    return {"reloaded": loaded is not None, "previous_version": previous, "version": get_store_version()}
+
+
+async def watch_store_versions() -> None:
+    """Poll CURRENT every ``store_reload_interval_s`` seconds and hot-swap on change."""
+    interval = get_settings().store_reload_interval_s
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_now()
+        except Exception as e:
+            print(f"[store_reload] Reload failed: {e}")
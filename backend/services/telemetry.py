@@ -43,3 +43,20 @@ def log_error(endpoint: str, error: Exception) -> None:
         "error_type": type(error).__name__,
     }
     logger.error(json.dumps(log_entry))
+
+
+def log_stream(
+    endpoint: str,
+    ttft_ms: float | None,
+    duration_ms: float,
+    usage: dict[str, int],
+) -> None:
+    """Log streaming timings: time-to-first-token, total duration, token usage."""
+    log_entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "endpoint": endpoint,
+        "ttft_ms": ttft_ms,
+        "duration_ms": duration_ms,
+        "usage": usage,
+    }
+    logger.info(json.dumps(log_entry))
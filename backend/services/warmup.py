@@ -0,0 +1,113 @@
+"""Startup warm-up and readiness state.
+
+Loads the vector store, opens the embeddings and LLM clients, loads and warms
+the reranker and the context tokenizer, and optionally replays warm-up queries. ``/api/ready`` stays
+not-ready until this has finished, so new replicas don't take traffic cold.
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from backend.llm.provider import get_client, get_provider
+from backend.rag.context import load_encoding
+from backend.rag.pipelines import rag_pipeline
+from backend.rag.rerank import warm_up_reranker
+from backend.rag.store import get_store_version, load_store
+from backend.services.executor import run_in_pool
+from backend.settings import get_settings
+
+_state: dict[str, Any] = {
+    "ready": False,
+    "warmup_ms": None,
+    "components": {},
+}
+
+# Components that must load for the service to be ready
+REQUIRED_COMPONENTS = ("vector_store",)
+
+
+async def _component(name: str, load: Callable[[], Awaitable[str]]) -> None:
+    """Run one warm-up step, recording status and load time."""
+    _state["components"][name] = {"status": "loading"}
+    started = time.perf_counter()
+    try:
+        status = await load()
+        _state["components"][name] = {"status": status}
+    except Exception as e:
+        print(f"[warmup] {name} failed: {e}")
+        _state["components"][name] = {"status": "error", "error": str(e)}
+    _state["components"][name]["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _load_vector_store() -> str:
+    store = await run_in_pool("embed", load_store, Path(get_settings().vector_store_path))
+    if store is None:
+        raise RuntimeError("vector store unavailable")
+    return "ok"
+
+
+async def _open_llm_client() -> str:
+    provider = get_provider()
+    if provider is None:
+        return "not_configured"
+    get_client(provider)
+    return "ok"
+
+
+async def _warm_reranker() -> str:
+    loaded = await run_in_pool("rerank", warm_up_reranker)
+    return "ok" if loaded else "fallback"
+
+
+async def _load_tokenizer() -> str:
+    # May download the tiktoken encoding file: keep it off the event loop and out of the first request
+    encoding = await run_in_pool("embed", load_encoding)
+    return "ok" if encoding is not None else "fallback"
+
+
+async def _replay_queries() -> str:
+    queries = [q.strip() for q in get_settings().warmup_queries.split("|") if q.strip()]
+    if not queries:
+        return "skipped"
+    for query in queries:
+        await rag_pipeline(query)
+    return "ok"
+
+
+async def warm_up() -> None:
+    """Load and warm every component, then mark the service ready."""
+    started = time.perf_counter()
+    await _component("vector_store", _load_vector_store)
+    await _component("llm_client", _open_llm_client)
+    await _component("reranker", _warm_reranker)
+    await _component("tokenizer", _load_tokenizer)
+    await _component("warmup_queries", _replay_queries)
+
+    _state["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _state["ready"] = _required_loaded()
+    print(f"[warmup] Finished in {_state['warmup_ms']}ms (ready={_state['ready']})")
+
+
+def _required_loaded() -> bool:
+    # A store that failed at boot may since have been loaded by reload_store
+    if get_store_version() is not None and _state["components"].get("vector_store", {}).get("status") == "error":
+        _state["components"]["vector_store"] = {"status": "ok", "loaded_by": "reload"}
+    return all(_state["components"].get(name, {}).get("status") == "ok" for name in REQUIRED_COMPONENTS)
+
+
+def mark_ready() -> None:
+    """Mark ready without warming (warm-up disabled)."""
+    _state["ready"] = True
+
+
+def readiness_state() -> dict[str, Any]:
+    """Current readiness and per-component load status/times."""
+    if not _state["ready"] and _state["warmup_ms"] is not None:
+        _state["ready"] = _required_loaded()
+    return {
+        "ready": _state["ready"],
+        "warmup_ms": _state["warmup_ms"],
+        "components": {name: dict(info) for name, info in _state["components"].items()},
+    }
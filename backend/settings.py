@@ -19,20 +19,133 @@ class Settings(BaseSettings):
     embedding_model: str = "text-embedding-3-large"
     temperature: float = 0.7
 
+    # LLM client pool (one long-lived async client per provider)
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 60.0  # seconds an idle connection is kept warm
+    llm_timeout: float = 30.0  # per-call timeout (seconds)
+    llm_connect_timeout: float = 5.0
+    llm_max_retries: int = 2
+    llm_retry_base_delay: float = 0.5  # seconds; full-jitter exponential backoff
+
     # RAG Configuration
     top_k: int = 10
     rerank_top_k: int = 5
     chunk_size: int = 512
     chunk_overlap: int = 50
+    retrieval_mode: str = "dense"  # "dense", "hybrid" (dense + BM25) or "lexical"
+    rrf_k: int = 60  # reciprocal rank fusion constant
+    embedding_timeout_s: float = 2.0  # past this, dense/hybrid fall back to lexical
+
+    # Query embedding cache
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_dir: str | None = None  # Set to enable the on-disk tier
+
+    # Answer cache (/api/chat)
+    answer_cache_enabled: bool = True
+    answer_cache_size: int = 1000
+    answer_cache_ttl_s: float = 3600.0
+    answer_cache_similarity: float = 0.95  # cosine threshold for near-duplicate questions
+
+    # Worker pools (blocking work kept off the event loop)
+    embed_pool_workers: int = 8  # query embedding + FAISS search
+    rerank_pool_workers: int = 1  # cross-encoder scoring (CPU-bound)
+    lexical_pool_workers: int = 2  # BM25 search (kept apart so it isn't stuck behind slow embeds)
+
+    # Cross-encoder micro-batching across concurrent requests (backend.services.batching)
+    rerank_batch_max_pairs: int = 64  # (query, passage) pairs per model call
+    rerank_batch_max_wait_ms: float = 5.0  # longest the first request in a batch waits for others
+
+    # Reranker backend (backend.rag.rerankers)
+    reranker_backend: str = "flag"  # "flag", "onnx" (int8 ONNX Runtime) or "cascade" (onnx, then flag on the top N)
+    reranker_model: str = "BAAI/bge-reranker-large"  # FlagEmbedding model ("flag", and the cascade's second stage)
+    reranker_use_fp16: bool = True
+    reranker_max_tokens: int = 512  # query + passage tokens per pair
+    onnx_reranker_model: str = "Xenova/bge-reranker-base"  # HF repo or local directory with an ONNX export
+    onnx_reranker_file: str = "onnx/model_quantized.onnx"  # quantized from onnx/model.onnx if missing
+    onnx_reranker_threads: int = 0  # ONNX Runtime intra-op threads (0 = runtime default)
+    cascade_top_n: int = 6  # candidates per query rescored by the large model
+    cascade_max_tokens: int = 256  # token cap per pair for the large model in the cascade
+
+    # Rerank score cache, by (normalized query, chunk id) (backend.rag.rerank_cache)
+    rerank_cache_enabled: bool = True
+    rerank_cache_size: int = 50000  # cached (query, chunk) scores
+
+    # MMR diversity selection of the final rerank_top_k chunks (backend.rag.mmr)
+    mmr_enabled: bool = True
+    mmr_lambda: float = 0.7  # 1.0 = relevance only, lower = more diverse
+
+    # Prompt context assembly (backend.rag.context)
+    context_max_tokens: int = 2000  # retrieved context budget, headers and source lines included
 
     # Vector Store
     vector_store_path: str = "storage/vector_store"
+    index_type: str = "flat"  # "flat", "ivf_flat", "ivf_pq" or "hnsw"
+    ivf_nlist: int = 256  # IVF centroids (capped at ~n/39 for small corpora)
+    ivf_nprobe: int = 16  # IVF lists probed per query
+    pq_m: int = 64  # PQ sub-quantizers (must divide the embedding dimension)
+    pq_nbits: int = 8  # bits per PQ code
+    hnsw_m: int = 32  # HNSW graph degree
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    store_versions_keep: int = 3  # version directories kept on disk after publishing
+    store_reload_interval_s: float = 30.0  # poll CURRENT for new versions (0 disables)
+
+    # Ingestion crawler (backend.rag.crawler)
+    crawl_max_concurrency: int = 32  # requests in flight across all hosts
+    crawl_per_host_concurrency: int = 4
+    crawl_delay_s: float = 0.25  # minimum gap between request starts to the same host
+    crawl_max_retries: int = 3  # on connection errors, 408/429/5xx (honours Retry-After)
+    crawl_max_retry_after_s: float = 60.0  # longest Retry-After honoured before retrying anyway
+    crawl_timeout: float = 30.0
+
+    # Ingestion extraction (backend.rag.extract)
+    extract_workers: int = 0  # extraction processes (0 = one per CPU core)
+    extract_timeout_s: float = 120.0  # per document (or PDF page range)
+    pdf_pages_per_task: int = 16  # PDFs longer than this are extracted in parallel page ranges
+
+    # Fetch cache: compressed response bodies + extracted text (backend.rag.fetch_cache)
+    fetch_cache_max_mb: float = 4096.0  # compressed bodies, least recently used evicted past this
+    fetch_cache_fresh_s: float = 3600.0  # pages fetched more recently aren't revalidated
+    extract_cache_max_mb: float = 1024.0  # extracted text + metadata
+
+    # Batch embedding for index builds (backend.rag.embedder)
+    embedding_base_url: str = "https://api.openai.com/v1"  # any OpenAI-compatible /embeddings endpoint
+    embedding_batch_tokens: int = 100_000  # token budget per request
+    embedding_batch_size: int = 512  # max inputs per request
+    embedding_concurrency: int = 8  # requests in flight
+    embedding_max_retries: int = 6  # on 429/5xx/connection errors (honours Retry-After)
+    embedding_retry_base_delay: float = 1.0  # seconds; full-jitter exponential backoff
+    embedding_max_retry_after_s: float = 60.0  # longest Retry-After honoured before retrying anyway
+    embedding_request_timeout: float = 60.0
+
+    # Chunk embedding cache for ingestion (backend.rag.embedding_cache)
+    embedding_cache_path: str | None = "storage/embedding_cache.sqlite"  # empty disables
+    embedding_cache_max_mb: float = 2048.0  # least recently used vectors evicted past this
+
+    # Streaming ingest pipeline (backend.rag.ingest_pipeline)
+    ingest_queue_size: int = 16  # documents buffered between stages
+    ingest_split_concurrency: int = 2
+    ingest_embed_concurrency: int = 4  # documents being embedded at once
+    ingest_flush_chunks: int = 2000  # chunks per store flush + checkpoint
+    ingest_progress_interval_s: float = 10.0
+
+    # Near-duplicate chunk removal (backend.rag.dedup)
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.85  # estimated Jaccard similarity of word shingles
+    dedup_num_perm: int = 128  # MinHash signature length
+    dedup_shingle_size: int = 5  # words per shingle
 
     # API Configuration
+    admin_token: str | None = None  # Required as X-Admin-Token on /api/admin/*; the admin API is disabled (404) when unset
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     cors_origins: str = "http://localhost:3000,http://localhost:5173,https://polite-sand-06dd6b31e.3.azurestaticapps.net,https://neil-degrasse-tyson-ai-chatbot.com,https://www.neil-degrasse-tyson-ai-chatbot.com"
 
+    # Startup warm-up
+    warmup_enabled: bool = True
+    warmup_queries: str = ""  # "|"-separated queries replayed through the RAG pipeline at startup
+
     # Logging
     log_level: str = "INFO"
 
@@ -8,6 +8,11 @@ def hash_content(content: str) -> str:
     return hashlib.sha256(content.encode()).hexdigest()
 
 
+def hash_bytes(content: bytes) -> str:
+    """Generate SHA-256 hash of raw bytes."""
+    return hashlib.sha256(content).hexdigest()
+
+
 def hash_file(file_path: str) -> str:
     """Generate SHA-256 hash of file contents."""
     hasher = hashlib.sha256()
@@ -0,0 +1,20 @@
+"""Server-Sent Events framing."""
+
+import json
+from typing import Any
+
+
+def sse_event(event: str, data: Any, event_id: int | str | None = None) -> str:
+    """
+    Format one SSE event with a JSON-encoded payload.
+
+    id: {event_id}
+    event: {event}
+    data: {json}
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
@@ -31,3 +31,13 @@ def clean_whitespace(text: str) -> str:
     # Replace multiple newlines with double newline
     text = re.sub(r"\n\n+", "\n\n", text)
     return text.strip()
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a user query for use as a cache key.
+
+    Lowercases, collapses whitespace and drops trailing punctuation so that
+    "What is a black hole?" and "what is a  black hole" share a key.
+    """
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.rstrip("?!.,;: ")
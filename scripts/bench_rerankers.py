@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark reranker backends: latency and ranking agreement.
+
+For each query, candidates are retrieved from the vector store (as
+/api/chat does), then every backend reranks them. Reports, per backend:
+  - per-request latency (p50 / p95 / max), on the calling thread, no GPU
+  - NDCG@k against the reference backend's ranking (default "flag", i.e.
+    bge-reranker-large), with graded gains from the reference ranks, and
+    top-k overlap
+
+Backends whose packages aren't installed are skipped.
+
+Usage:
+    python scripts/bench_rerankers.py
+    python scripts/bench_rerankers.py --backends onnx cascade --queries-file queries.txt
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.rag.rerankers import RERANKER_BACKENDS, create_reranker, missing_modules  # noqa: E402
+from backend.rag.retriever import retrieve_documents  # noqa: E402
+from backend.settings import get_settings  # noqa: E402
+
+DEFAULT_QUERIES = [
+    "What is a black hole?",
+    "How big is the observable universe?",
+    "Why was Pluto reclassified as a dwarf planet?",
+    "What is dark matter made of?",
+    "How do stars form?",
+    "What happens when a star goes supernova?",
+    "Are we made of star stuff?",
+    "What is the cosmic microwave background?",
+    "How fast is the universe expanding?",
+    "Could there be life on Mars?",
+    "What is spaghettification?",
+    "How did the Moon form?",
+]
+
+
+def ndcg(ranking: list[int], reference: list[int], k: int) -> float:
+    """NDCG@k of ``ranking`` with gains from positions in ``reference``.
+
+    The reference's first document gets gain k, the k-th gets 1, the rest 0.
+    """
+    gain = {doc: k - rank for rank, doc in enumerate(reference[:k])}
+    dcg = sum(gain.get(doc, 0) / math.log2(rank + 2) for rank, doc in enumerate(ranking[:k]))
+    ideal = sum((k - rank) / math.log2(rank + 2) for rank in range(min(k, len(reference))))
+    return dcg / ideal if ideal else 1.0
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def candidates(queries: list[str], top_k: int) -> list[tuple[str, list[str]]]:
+    results = []
+    for query in queries:
+        documents = await retrieve_documents(query, top_k=top_k)
+        if documents:
+            results.append((query, [doc["content"] for doc in documents]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reranker backends")
+    parser.add_argument("--backends", nargs="+", default=list(RERANKER_BACKENDS), choices=RERANKER_BACKENDS)
+    parser.add_argument("--reference", default="flag", choices=RERANKER_BACKENDS, help="Backend rankings are compared to")
+    parser.add_argument("--queries-file", type=Path, help="One query per line (default: built-in sample)")
+    parser.add_argument("--candidates", type=int, help="Candidates per query (default: top_k setting)")
+    parser.add_argument("-k", type=int, help="NDCG cutoff (default: rerank_top_k setting)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the queries")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    k = args.k or settings.rerank_top_k
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        queries = [line.strip() for line in args.queries_file.read_text().splitlines() if line.strip()]
+    workload = asyncio.run(candidates(queries, args.candidates or settings.top_k))
+    if not workload:
+        raise SystemExit("No candidates retrieved (is the vector store built?)")
+    print(f"{len(workload)} queries, {sum(len(docs) for _, docs in workload) / len(workload):.1f} candidates each")
+
+    names = [args.reference] + [name for name in args.backends if name != args.reference]
+    rankings: dict[str, list[list[int]]] = {}
+    latencies: dict[str, list[float]] = {}
+    for name in names:
+        missing = missing_modules(name)
+        if missing:
+            print(f"Skipping {name}: {', '.join(missing)} not installed")
+            continue
+        started = time.perf_counter()
+        reranker = create_reranker(name)
+        reranker.score([["warm-up query", "warm-up passage"]] * 4)
+        print(f"Loaded {name} in {time.perf_counter() - started:.1f}s")
+
+        latencies[name] = []
+        for _ in range(args.repeat):
+            rankings[name] = []
+            for query, documents in workload:
+                started = time.perf_counter()
+                scores = reranker.score([[query, doc] for doc in documents])
+                latencies[name].append((time.perf_counter() - started) * 1000)
+                rankings[name].append(sorted(range(len(documents)), key=lambda i: scores[i], reverse=True))
+
+    if not latencies:
+        raise SystemExit("No backend could be loaded")
+    reference = rankings.get(args.reference)
+    print(f"{'':8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {f'NDCG@{k}':>8} {f'top{k} overlap':>12}")
+    for name, times in latencies.items():
+        agreement = overlap = "-"
+        if reference is not None:
+            agreement = f"{statistics.mean(ndcg(r, ref, k) for r, ref in zip(rankings[name], reference)):.3f}"
+            overlap = f"{statistics.mean(len(set(r[:k]) & set(ref[:k])) / k for r, ref in zip(rankings[name], reference)):.0%}"
+        print(
+            f"{name:8} {percentile(times, 0.5):>8.1f} {percentile(times, 0.95):>8.1f} {max(times):>8.1f} "
+            f"{agreement:>8} {overlap:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
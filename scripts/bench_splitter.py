@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Benchmark the span splitter and docstore layout against per-chunk copies.
+
+Compares, over the same documents:
+  - legacy: a new RecursiveCharacterTextSplitter per document, every chunk
+    stored with its own text (overlap included) and metadata dict
+  - spans:  split_with_attribution, each document's text and metadata
+    stored once, chunks as (document, start, end) spans
+
+Reports split throughput and the docstore size (chunks.sqlite on disk and
+the text + metadata payload). Input is a directory of .txt/.md files, or a
+synthetic corpus.
+
+Usage:
+    python scripts/bench_splitter.py --input-dir data/texts
+    python scripts/bench_splitter.py --synthetic 500
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+
+from backend.rag.artifact import CHUNKS_SCHEMA, SpanDocstore  # noqa: E402
+from backend.rag.splitter import split_with_attribution  # noqa: E402
+from backend.settings import get_settings  # noqa: E402
+
+# Chunk table of format 1 artifacts
+_LEGACY_SCHEMA = (
+    "CREATE TABLE chunks (position INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+    "content TEXT NOT NULL, metadata TEXT NOT NULL)"
+)
+
+
+def load_documents(input_dir: Path | None, synthetic: int) -> list[tuple[str, str, dict]]:
+    """(source, text, metadata) per document."""
+    if input_dir is not None:
+        return [
+            (str(path), path.read_text(encoding="utf-8", errors="ignore"), {"file_path": str(path), "title": path.stem})
+            for path in sorted(input_dir.rglob("*"))
+            if path.suffix in (".txt", ".md")
+        ]
+    rng = random.Random(0)
+    words = "the universe star galaxy light years cosmos planet orbit gravity energy matter dark black hole".split()
+    documents = []
+    for i in range(synthetic):
+        paragraphs = [
+            ". ".join(" ".join(rng.choices(words, k=rng.randint(6, 20))) for _ in range(rng.randint(2, 8)))
+            for _ in range(rng.randint(10, 60))
+        ]
+        url = f"https://example.org/articles/{i}"
+        metadata = {
+            "source_url": url,
+            "title": f"Article {i} about the cosmos",
+            "author": "Staff Writer",
+            "date": "2024-01-01",
+            "sitename": "Example Science",
+            "description": " ".join(rng.choices(words, k=30)),
+        }
+        documents.append((url, "\n\n".join(paragraphs), metadata))
+    return documents
+
+
+def split_legacy(documents) -> list[dict]:
+    settings = get_settings()
+    chunks = []
+    for source, text, metadata in documents:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+        chunks.extend({"content": c, "source": source, "metadata": metadata} for c in splitter.split_text(text))
+    return chunks
+
+
+def split_spans(documents) -> list[dict]:
+    chunks = []
+    for source, text, metadata in documents:
+        chunks.extend(split_with_attribution(text, source, metadata))
+    return chunks
+
+
+def timed(fn, documents) -> tuple[list[dict], float]:
+    started = time.perf_counter()
+    chunks = fn(documents)
+    return chunks, time.perf_counter() - started
+
+
+def legacy_size(chunks: list[dict], path: Path) -> tuple[int, int]:
+    """(payload bytes, file bytes) of a format 1 chunk table."""
+    rows = [
+        (i, str(i), c["content"], json.dumps({"source": c["source"], **c["metadata"]}, ensure_ascii=False))
+        for i, c in enumerate(chunks)
+    ]
+    conn = sqlite3.connect(path)
+    conn.execute(_LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    payload = sum(len(content.encode()) + len(metadata.encode()) for _, _, content, metadata in rows)
+    return payload, path.stat().st_size
+
+
+def span_size(chunks: list[dict], path: Path) -> tuple[int, int]:
+    """(payload bytes, file bytes) of a format 2 document + span table."""
+    docstore = SpanDocstore()
+    for i, c in enumerate(chunks):
+        docstore.add_document(c["doc_id"], c["document"], {"source": c["source"], **c["metadata"]})
+        docstore.add_span(str(i), c["doc_id"], c["start"], c["end"])
+    documents, rows = docstore.rows([str(i) for i in range(len(chunks))])
+    conn = sqlite3.connect(path)
+    for statement in CHUNKS_SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO documents VALUES (?, ?, ?, ?)", documents)
+    conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    payload = sum(len(text.encode()) + len(metadata.encode()) for _, _, text, metadata in documents)
+    return payload, path.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark span splitting and docstore size")
+    parser.add_argument("--input-dir", type=Path, help="Directory of .txt/.md files")
+    parser.add_argument("--synthetic", type=int, default=300, help="Synthetic documents if no --input-dir")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.input_dir, args.synthetic)
+    if not documents:
+        raise SystemExit("No documents to benchmark")
+    mb = sum(len(text.encode()) for _, text, _ in documents) / 1e6
+    print(f"{len(documents)} documents, {mb:.1f} MB of text")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, split, size in (("legacy", split_legacy, legacy_size), ("spans", split_spans, span_size)):
+            runs = [timed(split, documents) for _ in range(args.repeat)]
+            chunks, elapsed = min(runs, key=lambda run: run[1])
+            payload, file_bytes = size(chunks, Path(tmp) / f"{name}.sqlite")
+            results[name] = (len(chunks), elapsed, payload, file_bytes)
+
+    print(f"{'':8} {'chunks':>8} {'split s':>8} {'MB/s':>8} {'payload MB':>11} {'sqlite MB':>10}")
+    for name, (chunks, elapsed, payload, file_bytes) in results.items():
+        print(
+            f"{name:8} {chunks:>8} {elapsed:>8.2f} {mb / elapsed if elapsed else 0.0:>8.1f} "
+            f"{payload / 1e6:>11.2f} {file_bytes / 1e6:>10.2f}"
+        )
+    legacy, spans = results["legacy"], results["spans"]
+    print(
+        f"Spans store {1 - spans[3] / legacy[3]:.0%} less on disk "
+        f"({1 - spans[2] / legacy[2]:.0%} less text + metadata); "
+        f"split throughput x{legacy[1] / spans[1] if spans[1] else 0.0:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
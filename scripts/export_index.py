@@ -3,20 +3,57 @@
 
 import argparse
 import shutil
+import sys
+import zipfile
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend.rag.artifact import (  # noqa: E402
+    ARTIFACT_FILES,
+    MANIFEST_FILENAME,
+    convert_legacy,
+    has_artifact,
+    verify_artifact,
+)
+from backend.rag.lexical import BM25_FILENAME  # noqa: E402
+from backend.rag.store import SOURCES_FILENAME, resolve_store_dir  # noqa: E402
+
+
+def convert_index(source_dir: Path, remove_pickle: bool = False):
+    """Convert a legacy index.faiss + index.pkl store to the artifact layout."""
+    from backend.deps import get_embeddings
+    from backend.settings import get_settings
+
+    print(f"Converting {source_dir} to the artifact layout")
+    manifest = convert_legacy(source_dir, get_embeddings(), get_settings().embedding_model, remove_pickle)
+    print(f"✅ Converted {manifest['count']} chunks (dim {manifest['dimension']})")
+
 
 def pack_index(source_dir: Path, output_file: Path):
-    """Pack vector store into a single archive."""
+    """Pack vector store artifact (no pickle) into a single archive."""
+    # A versioned store root packs the version CURRENT points at
+    source_dir = resolve_store_dir(source_dir)
+    if not has_artifact(source_dir):
+        convert_index(source_dir)
     print(f"Packing {source_dir} -> {output_file}")
-    shutil.make_archive(str(output_file.with_suffix("")), "zip", source_dir)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    names = [MANIFEST_FILENAME, *ARTIFACT_FILES, BM25_FILENAME, SOURCES_FILENAME]
+    with zipfile.ZipFile(output_file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name in names:
+            if (source_dir / name).exists():
+                zf.write(source_dir / name, arcname=name)
     print(f"✅ Packed to {output_file}")
 
 
 def unpack_index(archive_file: Path, target_dir: Path):
-    """Unpack vector store archive."""
+    """Unpack vector store archive and verify it against its manifest."""
     print(f"Unpacking {archive_file} -> {target_dir}")
     shutil.unpack_archive(archive_file, target_dir)
+    if has_artifact(target_dir):
+        problems = verify_artifact(target_dir)
+        if problems:
+            raise SystemExit(f"❌ Unpacked artifact is corrupt: {', '.join(problems)}")
     print(f"✅ Unpacked to {target_dir}")
 
 
@@ -24,14 +61,14 @@ def main():
     parser = argparse.ArgumentParser(description="Pack/unpack vector store")
     parser.add_argument(
         "--action",
-        choices=["pack", "unpack"],
+        choices=["pack", "unpack", "convert"],
         required=True,
         help="Action to perform",
     )
     parser.add_argument(
         "--source",
         default="storage/vector_store",
-        help="Source directory (for pack)",
+        help="Source directory (for pack/convert)",
     )
     parser.add_argument(
         "--archive",
@@ -48,6 +85,8 @@ def main():
 
     if args.action == "pack":
         pack_index(Path(args.source), Path(args.archive))
+    elif args.action == "convert":
+        convert_index(Path(args.source))
     else:
         unpack_index(Path(args.archive), Path(args.target))
 